@@ -7,11 +7,15 @@ import datetime
 
 import streamlit as st
 
+from applications.streamlit.data import cache_sidebar
+from applications.streamlit.datasets import refresher
 from applications.streamlit.style import divider_style
 from applications.streamlit.subpages.page_1 \
     import page_1
 from applications.streamlit.subpages.page_2 \
     import page_2
+from applications.streamlit.subpages.table_browser \
+    import table_browser
 
 YEAR = datetime.datetime.now().year
 
@@ -22,11 +26,14 @@ def home_page():
 
 
 def main():
+    # Start refreshing shared datasets on the first run of the app
+    refresher()
     st.title("My Streamlit App")
     st.markdown(divider_style, unsafe_allow_html=True)
-    
+
     # Navigation
-    page = st.sidebar.selectbox("Menu", ["Home", "Page 1", "Page 2"])
+    page = st.sidebar.selectbox("Menu",
+                                ["Home", "Page 1", "Page 2", "Table Browser"])
 
     if page == "Home":
         home_page()
@@ -34,7 +41,10 @@ def main():
         page_1()
     elif page == "Page 2":
         page_2()
+    elif page == "Table Browser":
+        table_browser()
 
+    cache_sidebar()
     st.sidebar.write(f"**© {YEAR} [Be Happy]"
                      f"(https://github.com/mthnguyener/pyproject_starter)**")
 
@@ -0,0 +1,250 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+""" Cached Data Access Module
+
+Streamlit reruns the page script on every widget interaction, so pages read
+data through these wrappers instead of calling `pyproject_starter.db`
+directly. Connections are created once per process with `st.cache_resource`
+and share their engine's connection pool across sessions, while query
+results are cached with `st.cache_data` keyed on the query parameters.
+Parameters starting with an underscore are not hashed by Streamlit, so
+callables are passed that way together with a key identifying them.
+"""
+from collections import defaultdict
+import functools
+import os
+import threading
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional, Union
+
+import pandas as pd
+import streamlit as st
+
+from pyproject_starter import db
+
+CACHE_MAX_ENTRIES = int(os.getenv('STREAMLIT_CACHE_MAX_ENTRIES', '64'))
+CACHE_TTL = int(os.getenv('STREAMLIT_CACHE_TTL', '600'))
+QUERY_TIMEOUT = float(os.getenv('STREAMLIT_QUERY_TIMEOUT', '30'))
+
+_stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {
+    'calls': 0,
+    'misses': 0,
+})
+_stats_lock = threading.Lock()
+
+
+def _count(name: str, counter: str):
+    """Increment a cache counter."""
+    with _stats_lock:
+        _stats[name][counter] += 1
+
+
+def _tracked(func: Callable) -> Callable:
+    """
+    Count calls of a cached function.
+
+    The cached body counts its own misses, so hits are the calls that did \
+    not reach it.
+
+    :param func: function decorated with `st.cache_data`
+    :return: wrapper exposing the cache `clear` method
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        _count(func.__name__, 'calls')
+        return func(*args, **kwargs)
+
+    wrapper.clear = func.clear
+    return wrapper
+
+
+@st.cache_resource(show_spinner=False)
+def connection(host: Optional[str],
+               database: Optional[str],
+               dialect: str = 'postgresql') -> db.Connect:
+    """
+    Shared database connection for all sessions of the app.
+
+    Only the engine and its connection pool are shared: the connection \
+    opened by `db.Connect` is returned to the pool and each database call \
+    reflects tables into its own `MetaData`.
+
+    :param host: name of database host
+    :param database: name of database
+    :param dialect: SQLAlchemy dialect
+    :return: connection whose engine pools database connections
+    """
+    conn = db.Connect(host=host, database=database, dialect=dialect)
+    conn.conn.close()
+    return conn
+
+
+@_tracked
+@st.cache_data(ttl=CACHE_TTL,
+               max_entries=CACHE_MAX_ENTRIES,
+               show_spinner=False)
+def sql_aggregate(host: Optional[str],
+                  database: Optional[str],
+                  schema: Optional[str],
+                  table_name: str,
+                  aggs: Mapping[str, Union[str, Iterable[str]]],
+                  group_by: Optional[Union[str, Iterable[str]]] = None,
+                  where: Optional[Mapping[str, Any]] = None,
+                  dialect: str = 'postgresql',
+                  timeout: Optional[float] = QUERY_TIMEOUT) -> pd.DataFrame:
+    """
+    Cached `pyproject_starter.db.sql_aggregate`.
+
+    :param host: name of database host
+    :param database: name of database
+    :param schema: name of table schema
+    :param table_name: name of table
+    :param aggs: aggregate function name or names by column
+    :param group_by: column names to group by
+    :param where: filter as values by column name, a list or tuple \
+        matching any of its values (callable filters cannot be part of the \
+        cache key, call `pyproject_starter.db.sql_aggregate` for those)
+    :param dialect: SQLAlchemy dialect
+    :param timeout: seconds before the query is aborted (failures are not \
+        cached)
+    :return: data frame with one row per group
+    """
+    _count('sql_aggregate', 'misses')
+    return db.sql_aggregate(host=host,
+                            database=database,
+                            schema=schema,
+                            table_name=table_name,
+                            aggs=aggs,
+                            group_by=group_by,
+                            where=where,
+                            dialect=dialect,
+                            connection=connection(host, database, dialect),
+                            timeout=timeout)
+
+
+@_tracked
+@st.cache_data(ttl=CACHE_TTL,
+               max_entries=CACHE_MAX_ENTRIES,
+               show_spinner=False)
+def sql_data(host: Optional[str],
+             database: Optional[str],
+             schema: Optional[str],
+             table_name: str,
+             _query: Callable,
+             query_key: str,
+             dialect: str = 'postgresql',
+             timeout: Optional[float] = QUERY_TIMEOUT) -> pd.DataFrame:
+    """
+    Cached `pyproject_starter.db.sql_data`.
+
+    :param host: name of database host
+    :param database: name of database
+    :param schema: name of table schema
+    :param table_name: name of table
+    :param _query: callable that returns an ORM SQLAlchemy select statement \
+        (not part of the cache key)
+    :param query_key: name identifying the statement returned by `_query`, \
+        including any values it depends on, in the cache key
+    :param dialect: SQLAlchemy dialect
+    :param timeout: seconds before the query is aborted (failures are not \
+        cached)
+    :return: data frame containing data from query
+    """
+    _count('sql_data', 'misses')
+    return db.sql_data(host=host,
+                       database=database,
+                       schema=schema,
+                       table_name=table_name,
+                       query=_query,
+                       dialect=dialect,
+                       connection=connection(host, database, dialect),
+                       timeout=timeout)
+
+
+@_tracked
+@st.cache_data(ttl=CACHE_TTL,
+               max_entries=CACHE_MAX_ENTRIES,
+               show_spinner=False)
+def sql_table(host: Optional[str],
+              database: Optional[str],
+              schema: Optional[str],
+              table_name: str,
+              columns: Optional[Union[str, Iterable[str]]] = None,
+              date_columns: Optional[Union[str, Iterable[str]]] = None,
+              dialect: str = 'postgresql',
+              timeout: Optional[float] = QUERY_TIMEOUT) -> pd.DataFrame:
+    """
+    Cached `pyproject_starter.db.sql_table`.
+
+    :param host: name of database host
+    :param database: name of database
+    :param schema: name of table schema
+    :param table_name: name of table
+    :param columns: column names to return (default: returns all columns)
+    :param date_columns: column names to be formatted as dates
+    :param dialect: SQLAlchemy dialect
+    :param timeout: seconds before the query is aborted (failures are not \
+        cached)
+    :return: data frame containing data from table
+    """
+    _count('sql_table', 'misses')
+    return db.sql_table(host=host,
+                        database=database,
+                        schema=schema,
+                        table_name=table_name,
+                        columns=columns,
+                        date_columns=date_columns,
+                        dialect=dialect,
+                        connection=connection(host, database, dialect),
+                        timeout=timeout)
+
+
+CACHED_FUNCTIONS = {
+    'sql_aggregate': sql_aggregate,
+    'sql_data': sql_data,
+    'sql_table': sql_table,
+}
+
+
+def cache_stats() -> pd.DataFrame:
+    """
+    Hit rates of the cached data functions.
+
+    :return: calls, hits, misses and hit rate by function
+    """
+    with _stats_lock:
+        stats = {name: dict(_stats[name]) for name in CACHED_FUNCTIONS}
+    df = pd.DataFrame.from_dict(stats, orient='index')
+    df['hits'] = df['calls'] - df['misses']
+    df['hit_rate'] = (df['hits'] /
+                      df['calls'].where(df['calls'] > 0)).fillna(0)
+    return df[['calls', 'hits', 'misses', 'hit_rate']]
+
+
+def clear_cache(name: Optional[str] = None):
+    """
+    Invalidate cached results and reset their statistics.
+
+    :param name: cached function to clear (default: all of them)
+    """
+    names = [name] if name else list(CACHED_FUNCTIONS)
+    for n in names:
+        CACHED_FUNCTIONS[n].clear()
+        with _stats_lock:
+            _stats.pop(n, None)
+
+
+def cache_sidebar():
+    """Show cache hit rates in the sidebar with a control to invalidate."""
+    with st.sidebar.expander('Data cache'):
+        st.dataframe(cache_stats().style.format({'hit_rate': '{:.0%}'}))
+        st.caption(f'Results expire after {CACHE_TTL} s, keeping at most '
+                   f'{CACHE_MAX_ENTRIES} per function.')
+        name = st.selectbox('Function', ['all', *CACHED_FUNCTIONS])
+        if st.button('Clear cache'):
+            clear_cache(None if name == 'all' else name)
+            st.rerun()
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,258 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+""" Shared Dataset Module
+
+Heavy datasets are loaded once per server process and shared by every
+Streamlit session. A background thread reloads each dataset on its schedule
+and swaps the new copy in atomically. Readers are never blocked by a
+refresh: they get the current copy while the next one loads
+(stale-while-revalidate). Only the very first load of a dataset is waited
+on, and `warm` starts those loads when the app starts.
+"""
+import concurrent.futures as cf
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import streamlit as st
+
+logger = logging.getLogger('package')
+
+DEFAULT_INTERVAL = 300
+TICK = 1.0
+WORKERS = 2
+
+
+class _Dataset:
+    """
+    Registered dataset and its current copy.
+
+    :Attributes:
+
+    - **name**: *str* dataset name
+    - **loader**: *Callable* function returning a fresh copy
+    - **interval**: *float* seconds between refreshes
+    - **snapshot**: *tuple* current copy and monotonic time it was loaded \
+        (replaced as a whole so readers always see a consistent pair)
+    - **attempted**: *float* monotonic time the last load started
+    - **future**: *Future* refresh in flight
+    - **loads**: *int* number of successful loads
+    - **failures**: *int* number of failed loads
+    - **error**: *Exception* error of the last failed load
+    """
+
+    def __init__(self, name: str, loader: Callable[[], Any], interval: float):
+        self.name = name
+        self.loader = loader
+        self.interval = interval
+        self.snapshot = None
+        self.attempted: Optional[float] = None
+        self.future: Optional[cf.Future] = None
+        self.loads = 0
+        self.failures = 0
+        self.error: Optional[Exception] = None
+
+
+class DatasetRefresher:
+    """
+    Process level cache of datasets refreshed in the background.
+
+    :Attributes:
+
+    - **interval**: *float* default seconds between refreshes
+    - **tick**: *float* seconds between checks for due refreshes
+
+    Example::
+        refresher = DatasetRefresher()
+        refresher.register('sales', load_sales, interval=600)
+        refresher.start()
+        refresher.warm(wait=False)
+        df = refresher.get('sales')
+    """
+
+    def __init__(self,
+                 interval: float = DEFAULT_INTERVAL,
+                 tick: float = TICK,
+                 workers: int = WORKERS):
+        self.interval = interval
+        self.tick = tick
+        self._datasets: Dict[str, _Dataset] = {}
+        self._executor = cf.ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix='dataset_refresh')
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __repr__(self) -> str:
+        return (f'<{type(self).__name__}('
+                f'datasets={list(self._datasets)!r}'
+                f')>')
+
+    def _load(self, dataset: _Dataset):
+        """Load a fresh copy and swap it in, keeping the old one on error."""
+        dataset.attempted = time.monotonic()
+        try:
+            value = dataset.loader()
+        except Exception as e:
+            dataset.failures += 1
+            dataset.error = e
+            logger.warning('Dataset refresh failed for %s: %r' %
+                           (dataset.name, e))
+            raise
+        dataset.snapshot = (value, time.monotonic())
+        dataset.loads += 1
+        dataset.error = None
+        logger.debug('Dataset refreshed: %s' % dataset.name)
+
+    def _run(self):
+        """Schedule due refreshes until stopped."""
+        while not self._stop.wait(self.tick):
+            now = time.monotonic()
+            for dataset in list(self._datasets.values()):
+                attempted = dataset.attempted
+                if attempted is None or now - attempted >= dataset.interval:
+                    self.refresh(dataset.name)
+
+    def get(self, name: str, timeout: Optional[float] = None) -> Any:
+        """
+        Return the current copy of a dataset.
+
+        Stale copies are returned immediately while a refresh runs in the \
+        background. Only a dataset that has never loaded is waited for.
+
+        :param name: dataset name
+        :param timeout: seconds to wait for the first load
+        :return: current copy of the dataset
+        """
+        dataset = self._datasets[name]
+        snapshot = dataset.snapshot
+        if snapshot is None:
+            self.refresh(name).result(timeout)
+            return dataset.snapshot[0]
+        if time.monotonic() - snapshot[1] >= dataset.interval:
+            self.refresh(name)
+        return snapshot[0]
+
+    def refresh(self, name: str) -> cf.Future:
+        """
+        Start a background refresh unless one is already running.
+
+        :param name: dataset name
+        :return: future completing when the refresh finishes
+        """
+        dataset = self._datasets[name]
+        with self._lock:
+            if dataset.future is None or dataset.future.done():
+                dataset.future = self._executor.submit(self._load, dataset)
+            return dataset.future
+
+    def register(self,
+                 name: str,
+                 loader: Callable[[], Any],
+                 interval: Optional[float] = None):
+        """
+        Register a dataset.
+
+        :param name: unique dataset name
+        :param loader: function returning a fresh copy of the dataset
+        :param interval: seconds between refreshes (default: refresher \
+            interval)
+        """
+        interval = self.interval if interval is None else interval
+        self._datasets[name] = _Dataset(name, loader, interval)
+
+    def start(self):
+        """Start the background refresh thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run,
+                                        name='dataset_scheduler',
+                                        daemon=True)
+        self._thread.start()
+
+    def status(self) -> List[Dict[str, Any]]:
+        """
+        Describe every registered dataset.
+
+        :return: name, age in seconds, loads, failures, last error and \
+            whether a refresh is running
+        """
+        now = time.monotonic()
+        return [{
+            'name': d.name,
+            'age': None if d.snapshot is None else now - d.snapshot[1],
+            'loads': d.loads,
+            'failures': d.failures,
+            'error': None if d.error is None else repr(d.error),
+            'refreshing': d.future is not None and not d.future.done(),
+        } for d in self._datasets.values()]
+
+    def stop(self):
+        """Stop the background refresh thread and wait for running loads."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._executor.shutdown(wait=True)
+
+    def warm(self,
+             names: Optional[Iterable[str]] = None,
+             wait: bool = True) -> List[cf.Future]:
+        """
+        Load datasets that have no copy yet.
+
+        :param names: datasets to load (default: all registered datasets)
+        :param wait: if True block until the loads finish
+        :return: futures of the started loads
+        """
+        names = list(self._datasets) if names is None else names
+        futures = [
+            self.refresh(name) for name in names
+            if self._datasets[name].snapshot is None
+        ]
+        if wait:
+            cf.wait(futures)
+        return futures
+
+
+DATASETS: Dict[str, tuple] = {}
+
+
+def dataset(name: str, interval: Optional[float] = None):
+    """
+    Decorator to register a loader with the app's shared refresher.
+
+    :param name: unique dataset name
+    :param interval: seconds between refreshes (default: \
+        `DEFAULT_INTERVAL`)
+    """
+
+    def dataset_decorator(loader):
+        DATASETS[name] = (loader, interval)
+        return loader
+
+    return dataset_decorator
+
+
+@st.cache_resource(show_spinner=False)
+def refresher() -> DatasetRefresher:
+    """
+    Refresher shared by every session of the app.
+
+    Created on the first script run, which starts the background thread \
+    and the first load of every registered dataset without waiting for them.
+
+    :return: running refresher holding all registered datasets
+    """
+    shared = DatasetRefresher()
+    for name, (loader, interval) in DATASETS.items():
+        shared.register(name, loader, interval)
+    shared.start()
+    shared.warm(wait=False)
+    return shared
+
+
+if __name__ == '__main__':
+    pass
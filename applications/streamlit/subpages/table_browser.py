@@ -0,0 +1,193 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+""" Table Browser Module
+
+Browse large tables one page at a time with keyset pagination. The session
+only keeps the current page and the first key of each visited page, so
+server memory stays flat however far the user pages. The row count runs in
+the background and the next page is fetched while the current one is read.
+"""
+import concurrent.futures as cf
+import os
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+import sqlalchemy as sa
+import streamlit as st
+
+from applications.streamlit.data import CACHE_TTL, connection
+from pyproject_starter import db
+
+# Seconds between checks of the background row count (0: only on demand)
+COUNT_REFRESH = float(os.getenv('STREAMLIT_COUNT_REFRESH', '0')) or None
+PAGE_SIZES = (100, 500, 1000, 5000)
+WORKERS = 4
+
+
+@st.cache_resource(show_spinner=False)
+def _executor() -> cf.ThreadPoolExecutor:
+    """Thread pool shared by all sessions for counts and prefetches."""
+    return cf.ThreadPoolExecutor(max_workers=WORKERS,
+                                 thread_name_prefix='table_browser')
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _key_columns(host: Optional[str], database: Optional[str],
+                 schema: Optional[str], table_name: str, dialect: str,
+                 _conn: db.Connect) -> List[str]:
+    """
+    Columns able to order the pages, the primary key first.
+
+    Keyset pagination skips rows sharing the last key of a page and rows \
+    whose key is NULL, so only single column primary keys and unique \
+    constraints or indexes on columns that are not nullable are offered.
+    """
+    inspector = sa.inspect(_conn.engine)
+    primary_key = inspector.get_pk_constraint(
+        table_name, schema=schema)['constrained_columns']
+    not_null = {
+        x['name']
+        for x in inspector.get_columns(table_name, schema=schema)
+        if not x['nullable']
+    }
+    unique = [
+        *(x['column_names'] for x in inspector.get_unique_constraints(
+            table_name, schema=schema)),
+        *(x['column_names']
+          for x in inspector.get_indexes(table_name, schema=schema)
+          if x['unique']),
+    ]
+    keys = [primary_key] if len(primary_key) == 1 else []
+    keys += [x for x in unique if len(x) == 1 and x[0] in not_null]
+    return list(dict.fromkeys(x[0] for x in keys))
+
+
+def _fetch(conn: db.Connect, params: Dict[str, Any],
+           after: Optional[Any]) -> pd.DataFrame:
+    """Fetch the page following `after`."""
+    return db.sql_page(after=after, connection=conn, **params)
+
+
+def _next_page(state, conn: db.Connect, params: Dict[str, Any],
+               after: Optional[Any]) -> pd.DataFrame:
+    """
+    Return the page following `after` and prefetch the one after it.
+
+    Only a single prefetched page is held per session.
+    """
+    prefetch = state.get('tb_prefetch')
+    if prefetch and prefetch[0] == (params, after):
+        df = prefetch[1].result()
+    else:
+        df = _fetch(conn, params, after)
+    if len(df) == params['limit']:
+        last = df[params['key']].tolist()[-1]
+        future = _executor().submit(_fetch, conn, params, last)
+        state['tb_prefetch'] = ((params, last), future)
+    else:
+        state['tb_prefetch'] = None
+    return df
+
+
+def _go_first():
+    st.session_state['tb_starts'] = [None]
+
+
+def _go_next(last: Any):
+    st.session_state['tb_starts'].append(last)
+
+
+def _go_previous():
+    st.session_state['tb_starts'].pop()
+
+
+@st.fragment(run_every=COUNT_REFRESH)
+def _row_count():
+    """
+    Show the row count once the background count has finished.
+
+    The count runs once per table. While it runs, its status is checked \
+    every `COUNT_REFRESH` seconds or when the user asks for it.
+    """
+    count = st.session_state.get('tb_count')
+    if count is None:
+        return
+    future = count[1]
+    if not future.done():
+        status, refresh = st.columns([3, 1])
+        status.caption('Counting rows...')
+        refresh.button('Refresh count')
+    elif future.exception():
+        st.caption('Row count unavailable.')
+    else:
+        st.caption(f'{future.result():,} rows')
+
+
+def table_browser():
+    st.subheader('Table Browser')
+    state = st.session_state
+
+    with st.sidebar.expander('Database', expanded=True):
+        dialect = st.selectbox('Dialect', ['postgresql', 'sqlite'])
+        host = st.text_input('Host') or None
+        database = st.text_input('Database') or None
+        schema = st.text_input('Schema') or None
+    try:
+        conn = connection(host, database, dialect)
+    except Exception as e:
+        st.error(f'Unable to connect: {e}')
+        return
+
+    table_name = st.selectbox('Table', conn.tables)
+    if table_name is None:
+        st.info('No tables found.')
+        return
+    columns = _key_columns(host, database, schema, table_name, dialect, conn)
+    if not columns:
+        st.info('The table has no single column primary key or unique '
+                'constraint to page on.')
+        return
+    key = st.selectbox('Order by (unique column)', columns)
+    limit = st.selectbox('Rows per page', PAGE_SIZES, index=2)
+    params = {
+        'host': host,
+        'database': database,
+        'schema': schema,
+        'table_name': table_name,
+        'key': key,
+        'limit': limit,
+        'dialect': dialect,
+    }
+
+    table_key = (host, database, schema, table_name)
+    if state.get('tb_count', (None, ))[0] != table_key:
+        state['tb_count'] = (table_key,
+                             _executor().submit(db.sql_count,
+                                                host,
+                                                database,
+                                                schema,
+                                                table_name,
+                                                dialect,
+                                                connection=conn))
+    if state.get('tb_params') != params:
+        state['tb_params'] = params
+        state['tb_starts'] = [None]
+        state['tb_prefetch'] = None
+
+    df = _next_page(state, conn, params, state['tb_starts'][-1])
+    last = df[key].tolist()[-1] if len(df) else None
+
+    first, previous, following = st.columns(3)
+    at_start = len(state['tb_starts']) == 1
+    first.button('First', disabled=at_start, on_click=_go_first)
+    previous.button('Previous', disabled=at_start, on_click=_go_previous)
+    following.button('Next',
+                     disabled=len(df) < limit,
+                     on_click=_go_next,
+                     args=(last, ))
+
+    page = len(state['tb_starts'])
+    st.caption(f'Page {page:,}: rows {(page - 1) * limit + 1:,} to '
+               f'{(page - 1) * limit + len(df):,}')
+    _row_count()
+    st.dataframe(df, hide_index=True)
@@ -1,24 +1,38 @@
 #! /usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-from pkg_resources import get_distribution, DistributionNotFound
+import importlib
+from importlib.metadata import distribution, PackageNotFoundError
 from os import path
 
 from pyproject_starter import pkg_globals
-# from . import cli
-# from . import db
-from . import exceptions
-from . import utils
 
 __version__ = '0.1.0'
 
+_SUBMODULES = (
+    'cli',
+    'db',
+    'exceptions',
+    'parallel',
+    'plots',
+    'synthetic',
+    'utils',
+)
+
 try:
-    _dist = get_distribution('pyproject_starter')
-    dist_loc = path.normcase(_dist.location)
+    _dist = distribution('pyproject_starter')
+    dist_loc = path.normcase(str(_dist.locate_file('')))
     here = path.normcase(__file__)
     if not here.startswith(path.join(dist_loc, 'pyproject_starter')):
-        raise DistributionNotFound
-except DistributionNotFound:
+        raise PackageNotFoundError
+except PackageNotFoundError:
     __version__ = 'Please install this project with setup.py'
 else:
     __version__ = _dist.version
+
+
+def __getattr__(name: str):
+    """Import submodules on first access to keep package import fast."""
+    if name in _SUBMODULES:
+        return importlib.import_module(f'.{name}', __name__)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -0,0 +1,296 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+""" Benchmark Module
+
+"""
+import contextlib
+import fnmatch
+import functools
+import json
+import logging
+from pathlib import Path
+import statistics
+import tempfile
+import time
+import tracemalloc
+from typing import (Any, Callable, ContextManager, Dict, Iterator, List,
+                    NamedTuple, Optional, Union)
+
+import numpy as np
+import pandas as pd
+import sqlalchemy as sa
+
+from pyproject_starter import db
+from pyproject_starter import utils
+
+logger = logging.getLogger('package')
+
+LOGGING_CALLS = 1000
+LOGGING_CONFIGURATIONS = {
+    'text': {},
+    'json': {
+        'json_format': True
+    },
+    'async text': {
+        'async_handlers': True
+    },
+    'async json': {
+        'async_handlers': True,
+        'json_format': True
+    },
+    'rate limited': {
+        'rate_limits': {
+            'package': 10
+        }
+    },
+}
+RLE_SIZES = (1_000, 100_000, 1_000_000)
+SQL_ROWS = 10_000
+
+
+class Benchmark(NamedTuple):
+    """
+    Registered benchmark.
+
+    :Attributes:
+
+    - **name**: *str* unique benchmark name
+    - **func**: *Callable* timed function called with the setup state
+    - **setup**: *Callable* returns a context manager yielding the state \
+        passed to `func` (setup and teardown are not timed)
+    """
+    name: str
+    func: Callable
+    setup: Callable[[], ContextManager]
+
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def register(name: str, setup: Optional[Callable[[], ContextManager]] = None):
+    """
+    Decorator to register a benchmark.
+
+    :param name: unique benchmark name
+    :param setup: callable returning a context manager that yields the \
+        argument passed to the benchmark (default: no argument)
+    """
+
+    def register_decorator(func):
+        BENCHMARKS[name] = Benchmark(name, func, setup)
+        return func
+
+    return register_decorator
+
+
+def select(pattern: Optional[str] = None) -> List[Benchmark]:
+    """
+    Select registered benchmarks by name.
+
+    :param pattern: shell style wildcard pattern (default: all benchmarks)
+    :return: matching benchmarks sorted by name
+    """
+    return [
+        BENCHMARKS[name] for name in sorted(BENCHMARKS)
+        if pattern is None or fnmatch.fnmatch(name, pattern)
+    ]
+
+
+def run(benchmark: Benchmark,
+        repeats: int = 20,
+        warmup: int = 3) -> Dict[str, Union[float, int, str]]:
+    """
+    Time a benchmark.
+
+    Peak memory is measured in a separate call, so `tracemalloc` overhead \
+    does not affect the timings.
+
+    :param benchmark: benchmark to run
+    :param repeats: number of timed calls
+    :param warmup: number of untimed calls made first
+    :return: median and 95th percentile latency in seconds and peak memory \
+        allocated in bytes
+    """
+    setup = benchmark.setup if benchmark.setup else contextlib.nullcontext
+    with setup() as state:
+        args = () if state is None else (state, )
+        for _ in range(warmup):
+            benchmark.func(*args)
+
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            benchmark.func(*args)
+            times.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        benchmark.func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    p95 = (statistics.quantiles(times, n=20, method='inclusive')[-1]
+           if len(times) > 1 else times[0])
+    result = {
+        'name': benchmark.name,
+        'median': statistics.median(times),
+        'p95': p95,
+        'peak_memory': peak,
+        'repeats': repeats,
+    }
+    logger.debug('Benchmark: %s', result)
+    return result
+
+
+def compare(results: List[Dict[str, Any]],
+            baseline: List[Dict[str, Any]],
+            threshold: float = 0.1) -> List[Dict[str, Any]]:
+    """
+    Find benchmarks slower than a saved baseline.
+
+    :param results: benchmark results
+    :param baseline: previously saved benchmark results
+    :param threshold: allowed fractional increase of the median latency
+    :return: results whose median exceeds the baseline by more than \
+        `threshold`, with the baseline median and ratio added (benchmarks \
+        with a baseline median of zero cannot be compared and are skipped)
+    """
+    base = {r['name']: r for r in baseline}
+    regressions = []
+    for result in results:
+        if result['name'] not in base:
+            continue
+        base_median = base[result['name']]['median']
+        if base_median <= 0:
+            logger.warning('Baseline median of %s is zero, not compared.',
+                           result['name'])
+            continue
+        ratio = result['median'] / base_median
+        if ratio > 1 + threshold:
+            regressions.append({
+                **result,
+                'baseline_median': base_median,
+                'ratio': ratio,
+            })
+    return regressions
+
+
+def load_results(file_path: Union[Path, str]) -> List[Dict[str, Any]]:
+    """
+    Load benchmark results from a JSON file.
+
+    :param file_path: path to results file
+    """
+    with open(file_path, 'r') as f:
+        return json.load(f)['results']
+
+
+def save_results(results: List[Dict[str, Any]],
+                 file_path: Union[Path, str]):
+    """
+    Save benchmark results to a JSON file.
+
+    :param results: benchmark results
+    :param file_path: path to results file
+    """
+    output = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+    }
+    with open(file_path, 'w') as f:
+        json.dump(output, f, indent=2)
+
+
+# Registered benchmarks
+def _rle_array(size: int) -> ContextManager:
+    rng = np.random.default_rng(0)
+    return contextlib.nullcontext(rng.integers(0, 3, size))
+
+
+for _size in RLE_SIZES:
+    register(f'rle[{_size}]',
+             functools.partial(_rle_array, _size))(utils.rle)
+
+
+@contextlib.contextmanager
+def _logger(**kwargs) -> Iterator[logging.Logger]:
+    """Configure the package logger to write to a temporary directory."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        package_logger = utils.logger_setup(Path(tmp_dir) / 'bench',
+                                            **kwargs)
+        try:
+            yield package_logger
+        finally:
+            utils.logger_shutdown()
+            for handler in logging.getLogger().handlers:
+                for log_filter in handler.filters[:]:
+                    handler.removeFilter(log_filter)
+            for handler in package_logger.handlers[:]:
+                package_logger.removeHandler(handler)
+                handler.close()
+
+
+def _log(package_logger: logging.Logger):
+    for _ in range(LOGGING_CALLS):
+        package_logger.info('Processing: %d', 1)
+
+
+for _name, _kwargs in LOGGING_CONFIGURATIONS.items():
+    register(f'logging[{_name}]',
+             functools.partial(_logger, **_kwargs))(_log)
+
+
+@register('nested_get')
+def _nested_get():
+    nested = {'a': {'b': {'c': {'d': 1}}}}
+    for _ in range(1000):
+        utils.nested_get(nested, ['a', 'b', 'c', 'd'])
+
+
+@register('progress_str')
+def _progress_str():
+    for n in range(1000):
+        utils.progress_str(n, 1000)
+
+
+@contextlib.contextmanager
+def _sqlite_table(rows: int = SQL_ROWS) -> Iterator[str]:
+    """Create a temporary SQLite database with a `data` table."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        database = str(Path(tmp_dir) / 'bench.db')
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame({
+            'id': np.arange(rows),
+            'category': rng.integers(0, 10, rows),
+            'value': rng.random(rows),
+        })
+        engine = sa.create_engine(f'sqlite:///{database}')
+        df.to_sql('data', engine, index=False)
+        engine.dispose()
+        yield database
+
+
+@register('sql_table', _sqlite_table)
+def _sql_table(database: str):
+    db.sql_table(host=None,
+                 database=database,
+                 schema=None,
+                 table_name='data',
+                 dialect='sqlite')
+
+
+@register('sql_data', _sqlite_table)
+def _sql_data(database: str):
+
+    def category_query(session, table):
+        return sa.select(table).where(table.c['category'] == 1)
+
+    db.sql_data(host=None,
+                database=database,
+                schema=None,
+                table_name='data',
+                query=category_query,
+                dialect='sqlite')
+
+
+if __name__ == '__main__':
+    pass
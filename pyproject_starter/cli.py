@@ -4,10 +4,86 @@
 
 """
 import logging
+import sys
 import time
 
 import click
 
+from pyproject_starter.utils import Progress
+
+
+@click.group()
+def bench():
+    """Run the registered microbenchmark suite."""
+
+
+@bench.command('list')
+@click.option('-k',
+              'pattern',
+              default=None,
+              help='Only list benchmarks matching this wildcard pattern.')
+def bench_list(pattern):
+    """List registered benchmarks."""
+    from pyproject_starter import bench as benchmarks
+
+    for benchmark in benchmarks.select(pattern):
+        click.echo(benchmark.name)
+
+
+@bench.command('run')
+@click.option('-k',
+              'pattern',
+              default=None,
+              help='Only run benchmarks matching this wildcard pattern.')
+@click.option('--repeats',
+              default=20,
+              show_default=True,
+              help='Number of timed calls per benchmark.')
+@click.option('--warmup',
+              default=3,
+              show_default=True,
+              help='Number of untimed calls made before timing.')
+@click.option('-o',
+              '--output',
+              type=click.Path(dir_okay=False),
+              help='Write results to this JSON file.')
+@click.option('-b',
+              '--baseline',
+              type=click.Path(exists=True, dir_okay=False),
+              help='Compare results against this saved JSON file.')
+@click.option('--threshold',
+              default=0.1,
+              show_default=True,
+              help='Allowed fractional increase of median latency.')
+def bench_run(pattern, repeats, warmup, output, baseline, threshold):
+    """
+    Run benchmarks and report median and p95 latency and peak memory.
+
+    Exits with status 1 if any benchmark regressed against the baseline.
+    """
+    from pyproject_starter import bench as benchmarks
+
+    results = []
+    click.echo(f'{"benchmark":<24}{"median":>12}{"p95":>12}{"peak":>12}')
+    for benchmark in benchmarks.select(pattern):
+        result = benchmarks.run(benchmark, repeats=repeats, warmup=warmup)
+        results.append(result)
+        click.echo(f'{result["name"]:<24}'
+                   f'{result["median"] * 1e3:>10.3f}ms'
+                   f'{result["p95"] * 1e3:>10.3f}ms'
+                   f'{result["peak_memory"] / 1024:>10.1f}KB')
+    if output:
+        benchmarks.save_results(results, output)
+    if baseline:
+        regressions = benchmarks.compare(results,
+                                         benchmarks.load_results(baseline),
+                                         threshold)
+        for r in regressions:
+            click.secho(f'Regression: {r["name"]} {r["ratio"]:0.2f}x baseline',
+                        fg='red')
+        if regressions:
+            raise SystemExit(1)
+
 
 @click.command()
 @click.argument('number')
@@ -26,11 +102,123 @@ def count(number: int, q, v):
     click.clear()
     logging_level = logging.INFO + 10 * q - 10 * v
     logging.basicConfig(level=logging_level)
-    with click.progressbar(range(int(number)), label='Counting') as bar:
-        for n in bar:
-            click.secho(f'\n\nProcessing: {n}', fg='green')
+    with Progress(range(int(number)), msg='Counting',
+                  stream=sys.stdout) as progress:
+        for n in progress:
+            logging.debug('Processing: %d', n)
             time.sleep(0.5)
 
 
+@click.command()
+@click.option('--host', default=None, help='Database host.')
+@click.option('--database',
+              default=None,
+              help='Database name (file path for SQLite).')
+@click.option('--schema', default=None, help='Table schema.')
+@click.option('--table', 'table_name', required=True, help='Table name.')
+@click.option('--format',
+              'file_format',
+              type=click.Choice(['csv', 'feather', 'parquet']),
+              default='parquet',
+              show_default=True,
+              help='Output file format.')
+@click.option('--out',
+              'file_path',
+              required=True,
+              type=click.Path(dir_okay=False),
+              help='Output file path.')
+@click.option('--chunk-size',
+              default=100_000,
+              show_default=True,
+              help='Rows fetched and written per chunk.')
+@click.option('--compression',
+              default=None,
+              help='Compression codec (e.g. snappy, zstd, lz4, gzip).')
+@click.option('--dialect',
+              default='postgresql',
+              show_default=True,
+              help='SQLAlchemy dialect.')
+def export(host, database, schema, table_name, file_format, file_path,
+           chunk_size, compression, dialect):
+    """
+    Stream a database table to a Parquet, Feather or CSV file.
+    """
+    from pyproject_starter.db import export_table
+
+    with Progress(msg='Exporting rows', stream=sys.stderr) as progress:
+        rows = export_table(host=host,
+                            database=database,
+                            schema=schema,
+                            table_name=table_name,
+                            file_path=file_path,
+                            file_format=file_format,
+                            chunk_size=chunk_size,
+                            compression=compression,
+                            dialect=dialect,
+                            progress=progress)
+    click.secho(f'Exported {rows} rows to: {file_path}', fg='green')
+
+
+@click.command()
+@click.option('--host', default=None, help='Database host.')
+@click.option('--database',
+              default=None,
+              help='Database name (file path for SQLite).')
+@click.option('--schema', default=None, help='Table schema.')
+@click.option('--users',
+              'n_users',
+              default=1000,
+              show_default=True,
+              help='Number of users.')
+@click.option('--prefs',
+              'prefs_per_user',
+              default=5,
+              show_default=True,
+              help='Number of preferences per user.')
+@click.option('--seed', default=0, show_default=True, help='Random seed.')
+@click.option('--chunk-size',
+              default=500_000,
+              show_default=True,
+              help='Users generated and loaded per chunk.')
+@click.option('--dialect',
+              default='postgresql',
+              show_default=True,
+              help='SQLAlchemy dialect.')
+@click.option('--replace',
+              is_flag=True,
+              help='Drop existing user tables instead of failing.')
+def generate(host, database, schema, n_users, prefs_per_user, seed,
+             chunk_size, dialect, replace):
+    """
+    Load synthetic users and preferences into the `user` tables.
+    """
+    from pyproject_starter.synthetic import load
+
+    with Progress(total=n_users, msg='Loading users',
+                  stream=sys.stderr) as progress:
+        users, prefs = load(host=host,
+                            database=database,
+                            n_users=n_users,
+                            prefs_per_user=prefs_per_user,
+                            seed=seed,
+                            chunk_size=chunk_size,
+                            schema=schema,
+                            dialect=dialect,
+                            progress=progress,
+                            replace=replace)
+    click.secho(f'Loaded {users} users and {prefs} preferences',
+                fg='green')
+
+
+@click.group()
+def main():
+    """pyproject_starter command line interface."""
+
+
+main.add_command(bench)
+main.add_command(count)
+main.add_command(export)
+main.add_command(generate)
+
 if __name__ == '__main__':
-    pass
+    main()
@@ -3,18 +3,64 @@
 """ Database Module
 
 """
+import asyncio
+from collections import defaultdict, deque
+import concurrent.futures as cf
+import contextlib
+import copy
+import datetime
+import decimal
+import functools
+import gzip
+import hashlib
 import logging
-from typing import Callable, Iterable, Optional, Union
+from pathlib import Path
+import queue
+import random
+import re
+import threading
+import time
+from typing import (Any, Callable, Dict, Hashable, Iterable, Iterator, List,
+                    Mapping, Optional, Tuple, Union)
 
 import pandas as pd
 import sqlalchemy as sa
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.sql import select
 
-from pyproject_starter.utils import docker_secret
+from pyproject_starter.exceptions import (InputError, QueryCancelledError,
+                                          QueryTimeoutError)
+from pyproject_starter.pkg_globals import (DB_HOST, DB_PORT,
+                                           SLOW_QUERY_SAMPLE_RATE,
+                                           SLOW_QUERY_SECONDS)
+from pyproject_starter.utils import Progress, docker_secrets
 
 logger = logging.getLogger('package')
 
+AGGREGATES = {
+    'count': sa.func.count,
+    'max': sa.func.max,
+    'mean': lambda c: sa.func.avg(sa.cast(c, sa.Float)),
+    'min': sa.func.min,
+    'nunique': lambda c: sa.func.count(sa.distinct(c)),
+    'size': lambda c: sa.func.count(),
+    'std': lambda c: sa.func.stddev_samp(sa.cast(c, sa.Float)),
+    'sum': sa.func.sum,
+    'var': lambda c: sa.func.var_samp(sa.cast(c, sa.Float)),
+}
+CSV_COMPRESSION = (None, 'gzip')
+EXPORT_FORMATS = ('csv', 'feather', 'parquet')
+LITERAL_REGEX = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+PG_QUERY_CANCELED = '57014'
+
+_query_stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {
+    'calls': 0,
+    'timeouts': 0,
+    'cancelled': 0,
+    'coalesced': 0,
+})
+_query_stats_lock = threading.Lock()
+
 
 class Connect:
     """
@@ -23,7 +69,7 @@ class Connect:
     :Attributes:
 
     - **conn**: *Connection* SQLAlchemy connection object
-    - **db_name**: *str* database name
+    - **db_name**: *str* database name (file path for SQLite)
     - **dialect**: *str* SQLAlchemy dialect
     - **driver**: *str* SQLAlchemy driver \
         (if None the default value will be used)
@@ -39,21 +85,26 @@ class Connect:
 
     def __init__(self,
                  host: Optional[str] = None,
-                 database: Optional[str] = None):
-        self.dialect = 'postgresql'
+                 database: Optional[str] = None,
+                 dialect: str = 'postgresql',
+                 port: Optional[int] = None):
+        db_name, self.password, self.user = docker_secrets(
+            'db-database', 'db-password', 'db-username')
+        self.dialect = dialect
         self.driver = None
-        self.db_name = database if database else docker_secret('db-database')
-        self.host = host if host else 'junk_postgres'
+        self.db_name = database if database else db_name
+        self.host = host if host else DB_HOST
         self.meta = sa.MetaData()
-        self.password = docker_secret('db-password')
-        self.port = 5432
-        self.user = docker_secret('db-username')
+        self.port = port if port else DB_PORT
 
         self.dialect = (f'{self.dialect}+{self.driver}'
                         if self.driver else self.dialect)
-        self.engine = sa.create_engine(
-            f'{self.dialect}://{self.user}:{self.password}'
-            f'@{self.host}:{self.port}/{self.db_name}')
+        if self.dialect.startswith('sqlite'):
+            self.engine = sa.create_engine(f'{self.dialect}:///{self.db_name}')
+        else:
+            self.engine = sa.create_engine(
+                f'{self.dialect}://{self.user}:{self.password}'
+                f'@{self.host}:{self.port}/{self.db_name}')
         self.conn = self.engine.connect()
         self.session = sessionmaker(bind=self.engine)
         self.tables = self.engine.table_names()
@@ -73,6 +124,31 @@ class Connect:
         self.session.close_all()
 
 
+def user_tables(meta: sa.MetaData) -> Tuple[sa.Table, sa.Table]:
+    """
+    Define the user and user preference tables.
+
+    :param meta: metadata collection the tables are added to
+    :return: `user` and `user_pref` tables
+    """
+    user = sa.Table(
+        'user', meta,
+        sa.Column('user_id', sa.Integer, primary_key=True),
+        sa.Column('User_name', sa.String(16), nullable=False),
+        sa.Column('email_address', sa.String(60), key='email'),
+        sa.Column('password', sa.String(20), nullable=False))
+    pref = sa.Table(
+        'user_pref', meta,
+        sa.Column('pref_id', sa.Integer, primary_key=True),
+        sa.Column('user_id',
+                  sa.Integer,
+                  sa.ForeignKey("user.user_id"),
+                  nullable=False),
+        sa.Column('pref_name', sa.String(40), nullable=False),
+        sa.Column('pref_value', sa.String(100)))
+    return user, pref
+
+
 class User(Connect):
     """
     User Tables
@@ -84,23 +160,14 @@ class User(Connect):
     - **pref_df**: *DataFrame* table with user preferences
     """
 
-    def __init__(self):
-        super(User, self).__init__()
-        self._user = sa.Table(
-            'user', self.meta,
-            sa.Column('user_id', sa.Integer, primary_key=True),
-            sa.Column('User_name', sa.String(16), nullable=False),
-            sa.Column('email_address', sa.String(60), key='email'),
-            sa.Column('password', sa.String(20), nullable=False))
-        self._pref = sa.Table(
-            'user_pref', self.meta,
-            sa.Column('pref_id', sa.Integer, primary_key=True),
-            sa.Column('user_id',
-                      sa.Integer,
-                      sa.ForeignKey("user.user_id"),
-                      nullable=False),
-            sa.Column('pref_name', sa.String(40), nullable=False),
-            sa.Column('pref_value', sa.String(100)))
+    def __init__(self,
+                 host: Optional[str] = None,
+                 database: Optional[str] = None,
+                 dialect: str = 'postgresql'):
+        super(User, self).__init__(host=host,
+                                   database=database,
+                                   dialect=dialect)
+        self._user, self._pref = user_tables(self.meta)
         self.meta.create_all(self.engine)
 
         self._user_df = pd.read_sql(select([self._user]), self.engine)
@@ -119,21 +186,880 @@ class User(Connect):
         return self._user_df
 
 
+@contextlib.contextmanager
+def _connect(host: str,
+             database: str,
+             dialect: str,
+             connection: Optional[Connect] = None) -> Iterator[Connect]:
+    """
+    Yield a shared connection or open a new one for the duration.
+
+    A shared connection is yielded as a copy with its own `MetaData`, so \
+    calls running in several threads only share the engine and its \
+    connection pool.
+
+    :param host: name of database host
+    :param database: name of database
+    :param dialect: SQLAlchemy dialect
+    :param connection: open connection to reuse (left open on exit)
+    """
+    if connection is not None:
+        shared = copy.copy(connection)
+        shared.meta = sa.MetaData()
+        yield shared
+        return
+    with Connect(host=host, database=database, dialect=dialect) as c:
+        yield c
+
+
+class CancelToken:
+    """
+    Cooperative cancellation of database reads.
+
+    Pass the same token to one or more queries and call `cancel` from any \
+    thread. Running statements are interrupted by the driver and chunked \
+    reads stop before their next chunk.
+
+    Example::
+        token = CancelToken()
+        future = executor.submit(sql_table, host, database, schema, table,
+                                 token=token)
+        token.cancel()
+    """
+
+    def __init__(self):
+        self._callbacks: List[Callable[[], None]] = []
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return (f'<{type(self).__name__}('
+                f'cancelled={self.cancelled!r}'
+                f')>')
+
+    @property
+    def cancelled(self) -> bool:
+        """True once `cancel` has been called."""
+        return self._event.is_set()
+
+    def cancel(self):
+        """Cancel every query using the token."""
+        with self._lock:
+            self._event.set()
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            callback()
+
+    def check(self):
+        """Raise `QueryCancelledError` if the token has been cancelled."""
+        if self.cancelled:
+            raise QueryCancelledError(expression='token',
+                                      message='Query cancelled.')
+
+    def _register(self, callback: Callable[[], None]):
+        """Call `callback` on cancellation until unregistered."""
+        with self._lock:
+            self._callbacks.append(callback)
+
+    def _unregister(self, callback: Callable[[], None]):
+        with self._lock:
+            self._callbacks.remove(callback)
+
+
+def _count_query(name: str, counter: str):
+    """Increment a query counter."""
+    with _query_stats_lock:
+        _query_stats[name][counter] += 1
+
+
+def _interrupt(dbapi_conn):
+    """Ask the driver to abort the statement running on a connection."""
+    for method in ('cancel', 'interrupt'):
+        abort = getattr(dbapi_conn, method, None)
+        if abort is not None:
+            abort()
+            return
+    logger.warning('Driver cannot cancel queries: %s' %
+                   type(dbapi_conn).__name__)
+
+
+@contextlib.contextmanager
+def _query_limits(conn: sa.engine.Connection,
+                  name: str,
+                  timeout: Optional[float] = None,
+                  token: Optional[CancelToken] = None):
+    """
+    Limit the statements executed on a connection inside a transaction.
+
+    PostgreSQL enforces the timeout on the server with a transaction local \
+    `statement_timeout`. Other dialects interrupt the statement through \
+    the driver when the timeout expires. A cancelled token always \
+    interrupts through the driver.
+
+    :param conn: connection with an open transaction
+    :param name: query function name for the query statistics
+    :param timeout: seconds before a statement is aborted (default: no limit)
+    :param token: token cancelling the statements
+    """
+    _count_query(name, 'calls')
+    if timeout is None and token is None:
+        yield
+        return
+    if token is not None and token.cancelled:
+        _count_query(name, 'cancelled')
+        token.check()
+    dbapi_conn = conn.connection
+    lock = threading.Lock()
+    active = True
+
+    def abort():
+        with lock:
+            if active:
+                _interrupt(dbapi_conn)
+
+    timer = None
+    if token is not None:
+        token._register(abort)
+    start = time.monotonic()
+    try:
+        if timeout is not None and conn.dialect.name == 'postgresql':
+            conn.execute(sa.select(
+                sa.func.set_config('statement_timeout',
+                                   str(max(1, int(timeout * 1000))), True)))
+        elif timeout is not None:
+            timer = threading.Timer(timeout, abort)
+            timer.daemon = True
+            timer.start()
+        yield
+    except sa.exc.DBAPIError as e:
+        elapsed = time.monotonic() - start
+        if token is not None and token.cancelled:
+            _count_query(name, 'cancelled')
+            logger.warning('%s cancelled after %.3f s' % (name, elapsed))
+            raise QueryCancelledError(expression=name,
+                                      message='Query cancelled.') from e
+        if timeout is not None and (
+                elapsed >= timeout or
+                getattr(e.orig, 'pgcode', None) == PG_QUERY_CANCELED):
+            _count_query(name, 'timeouts')
+            logger.warning('%s timed out after %.3f s' % (name, elapsed))
+            raise QueryTimeoutError(
+                expression=name,
+                message=f'Query exceeded timeout of {timeout} s.') from e
+        raise
+    finally:
+        with lock:
+            active = False
+        if timer is not None:
+            timer.cancel()
+        if token is not None:
+            token._unregister(abort)
+
+
+def query_stats() -> pd.DataFrame:
+    """
+    Timeouts, cancellations and coalesced calls of the query functions.
+
+    Coalesced calls shared the result of an identical call in flight, so \
+    they are not included in `calls`.
+
+    :return: calls, timeouts, cancellations, coalesced calls and timeout \
+        rate by function
+    """
+    with _query_stats_lock:
+        stats = {name: dict(v) for name, v in _query_stats.items()}
+    df = pd.DataFrame.from_dict(
+        stats,
+        orient='index',
+        columns=['calls', 'timeouts', 'cancelled', 'coalesced'])
+    df['timeout_rate'] = (df['timeouts'] /
+                          df['calls'].where(df['calls'] > 0)).fillna(0)
+    return df
+
+
+def reset_query_stats():
+    """Reset the query statistics."""
+    with _query_stats_lock:
+        _query_stats.clear()
+
+
+class _Call:
+    """Call in flight and the number of callers waiting for it."""
+
+    def __init__(self):
+        self.future = cf.Future()
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Share one execution among concurrent identical calls.
+
+    The first caller of a key runs the function. Callers arriving with the \
+    same key while it runs wait for it and receive the same result or \
+    exception. Threaded and asyncio callers share the calls in flight, and \
+    asyncio callers wait without holding a thread.
+
+    :Attributes:
+
+    - **share**: *Callable* applied to the result handed to each caller \
+        when a call was shared (e.g. to copy mutable results)
+
+    Example::
+        flight = SingleFlight()
+        result, coalesced = flight.do(key, load, path)
+        result, coalesced = await flight.do_async(key, load, path)
+    """
+
+    def __init__(self, share: Optional[Callable[[Any], Any]] = None):
+        self.share = share
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return (f'<{type(self).__name__}('
+                f'in_flight={len(self._calls)!r}'
+                f')>')
+
+    def _join(self, key: Hashable) -> Tuple[_Call, bool]:
+        """Return the call in flight for `key` and True if it is new."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                return call, False
+            call = self._calls[key] = _Call()
+            return call, True
+
+    def _shared(self, result: Any) -> Any:
+        return result if self.share is None else self.share(result)
+
+    def _run(self, key: Hashable, call: _Call, func: Callable, args: tuple,
+             kwargs: dict) -> Any:
+        """Run the call and hand its outcome to the waiting callers."""
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            with self._lock:
+                del self._calls[key]
+            call.future.set_exception(e)
+            raise
+        with self._lock:
+            del self._calls[key]
+        call.future.set_result(result)
+        return self._shared(result) if call.waiters else result
+
+    def do(self, key: Hashable, func: Callable, *args,
+           **kwargs) -> Tuple[Any, bool]:
+        """
+        Call `func` unless an identical call is in flight.
+
+        :param key: hashable identity of the call
+        :param func: function to call
+        :param args: positional arguments of `func`
+        :param kwargs: keyword arguments of `func`
+        :return: result and True if it came from another caller's call
+        """
+        call, leader = self._join(key)
+        if leader:
+            return self._run(key, call, func, args, kwargs), False
+        return self._shared(call.future.result()), True
+
+    async def do_async(self, key: Hashable, func: Callable, *args,
+                       **kwargs) -> Tuple[Any, bool]:
+        """
+        Call `func` in the default executor unless an identical call is in \
+        flight.
+
+        :param key: hashable identity of the call
+        :param func: blocking function to call
+        :param args: positional arguments of `func`
+        :param kwargs: keyword arguments of `func`
+        :return: result and True if it came from another caller's call
+        """
+        call, leader = self._join(key)
+        if leader:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(
+                None,
+                functools.partial(self._run, key, call, func, args, kwargs))
+            return result, False
+        return self._shared(await asyncio.wrap_future(call.future)), True
+
+
+in_flight = SingleFlight(share=lambda df: df.copy())
+
+
+def _coalesce(name: str, key: Optional[Hashable], func: Callable, *args,
+              **kwargs) -> Any:
+    """Share `func` with identical calls in flight (None key disables)."""
+    if key is None:
+        return func(*args, **kwargs)
+    result, coalesced = in_flight.do(key, func, *args, **kwargs)
+    if coalesced:
+        _count_query(name, 'coalesced')
+    return result
+
+
+async def _coalesce_async(name: str, key: Optional[Hashable],
+                          func: Callable, *args, **kwargs) -> Any:
+    """Asynchronous `_coalesce` running `func` in the default executor."""
+    if key is None:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, functools.partial(func, *args, **kwargs))
+    result, coalesced = await in_flight.do_async(key, func, *args, **kwargs)
+    if coalesced:
+        _count_query(name, 'coalesced')
+    return result
+
+
+class SlowQueryLog:
+    """
+    Bounded log of slow queries and their plans.
+
+    Queries are timed by the caller and only those over the threshold reach \
+    `record`, so fast queries cost nothing beyond reading the clock. A \
+    sample of the slow queries is explained again on the same connection \
+    (`EXPLAIN (ANALYZE off, FORMAT JSON)` on PostgreSQL, `EXPLAIN QUERY \
+    PLAN` on SQLite) and the plan is logged and kept in a ring buffer.
+
+    :Attributes:
+
+    - **threshold**: *float* seconds a query must exceed to be recorded \
+        (None disables the log)
+    - **sample_rate**: *float* fraction of slow queries that are explained
+    - **size**: *int* number of entries kept
+    """
+
+    def __init__(self,
+                 threshold: Optional[float] = SLOW_QUERY_SECONDS,
+                 sample_rate: float = SLOW_QUERY_SAMPLE_RATE,
+                 size: int = 100):
+        self.threshold = threshold
+        self.sample_rate = sample_rate
+        self._entries = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return (f'<{type(self).__name__}('
+                f'threshold={self.threshold!r}, '
+                f'sample_rate={self.sample_rate!r}, '
+                f'size={self.size!r}'
+                f')>')
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        return self._entries.maxlen
+
+    @staticmethod
+    def fingerprint(sql: str) -> str:
+        """
+        Identify a statement independently of its literal values.
+
+        :param sql: SQL statement
+        :return: short hash of the normalized statement
+        """
+        normalized = ' '.join(LITERAL_REGEX.sub('?', sql).split()).lower()
+        return hashlib.sha1(normalized.encode()).hexdigest()[:16]
+
+    @staticmethod
+    def _explain(conn: sa.engine.Connection, compiled) -> Any:
+        """
+        Plan of a compiled statement without executing it.
+
+        Called inside a savepoint, so a failing `EXPLAIN` does not abort \
+        the transaction of the caller.
+        """
+        if compiled.positional:
+            params = tuple(compiled.params[k] for k in compiled.positiontup)
+        else:
+            params = compiled.params
+        if conn.dialect.name == 'postgresql':
+            return conn.exec_driver_sql(
+                f'EXPLAIN (ANALYZE off, FORMAT JSON) {compiled}',
+                params).scalar()
+        if conn.dialect.name == 'sqlite':
+            rows = conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {compiled}',
+                                        params)
+            return [dict(row._mapping) for row in rows]
+        return None
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """
+        Recorded slow queries.
+
+        :return: entries from oldest to newest
+        """
+        with self._lock:
+            return list(self._entries)
+
+    def is_slow(self, elapsed: float) -> bool:
+        """True if a query taking `elapsed` seconds should be recorded."""
+        return self.threshold is not None and elapsed >= self.threshold
+
+    def record(self, conn: sa.engine.Connection, name: str, statement,
+               elapsed: float, rows: int):
+        """
+        Record a slow query and explain a sample of them.
+
+        Explain failures are logged and never raised.
+
+        :param conn: connection the query ran on
+        :param name: query function name
+        :param statement: SQLAlchemy statement or SQL string
+        :param elapsed: seconds the query took
+        :param rows: number of rows returned
+        """
+        if isinstance(statement, str):
+            statement = sa.text(statement)
+        # IN lists are rendered as one parameter per value to be explained,
+        # but fingerprinted as a single parameter whatever their length
+        fingerprint = self.fingerprint(
+            str(statement.compile(dialect=conn.dialect)))
+        compiled = statement.compile(
+            dialect=conn.dialect, compile_kwargs={'render_postcompile': True})
+        sql = str(compiled)
+        plan = None
+        explain_elapsed = None
+        if random.random() < self.sample_rate:
+            start = time.perf_counter()
+            try:
+                with conn.begin_nested():
+                    plan = self._explain(conn, compiled)
+            except sa.exc.SQLAlchemyError as e:
+                logger.warning('Unable to explain slow query %s: %r' %
+                               (fingerprint, e))
+            explain_elapsed = time.perf_counter() - start
+        entry = {
+            'time': datetime.datetime.now(),
+            'function': name,
+            'fingerprint': fingerprint,
+            'statement': sql,
+            'elapsed': elapsed,
+            'rows': rows,
+            'explain_elapsed': explain_elapsed,
+            'plan': plan,
+        }
+        with self._lock:
+            self._entries.append(entry)
+        logger.warning('Slow query %s in %s took %.3f s (%d rows): %s\n'
+                       'Plan: %s' %
+                       (fingerprint, name, elapsed, rows, sql, plan))
+
+
+slow_queries = SlowQueryLog()
+
+
+def _read_statement(conn: sa.engine.Connection, name: str,
+                    statement) -> pd.DataFrame:
+    """Read a statement into a data frame, recording it if slow."""
+    start = time.perf_counter()
+    df = pd.read_sql(statement, con=conn)
+    elapsed = time.perf_counter() - start
+    if slow_queries.is_slow(elapsed):
+        slow_queries.record(conn, name, statement, elapsed, len(df))
+    return df
+
+
+def _arrow_schema(df: pd.DataFrame,
+                  columns: Optional[List[sa.Column]] = None):
+    """
+    Arrow schema of the chunks of a table.
+
+    Types inferred from the first chunk alone break on later chunks when a \
+    column is all null (typed `null`) or gains nulls (integers read as \
+    floats), so the reflected column types take precedence.
+
+    :param df: first chunk
+    :param columns: reflected table columns
+    :return: Arrow schema
+    """
+    import pyarrow as pa
+
+    arrow_types = {
+        bool: pa.bool_(),
+        bytes: pa.binary(),
+        datetime.datetime: pa.timestamp('ns'),
+        decimal.Decimal: pa.float64(),
+        float: pa.float64(),
+        int: pa.int64(),
+        str: pa.string(),
+    }
+    reflected = {}
+    for column in columns or ():
+        try:
+            python_type = column.type.python_type
+        except NotImplementedError:
+            continue
+        if not getattr(column.type, 'timezone', False):
+            reflected[column.name] = arrow_types.get(python_type)
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    return pa.schema([
+        field.with_type(reflected[field.name])
+        if reflected.get(field.name) is not None else field
+        for field in schema
+    ])
+
+
+class _ChunkWriter:
+    """
+    Incrementally write data frame chunks to a file.
+
+    :Attributes:
+
+    - **columns**: *list* reflected table columns used to type the Arrow \
+        schema (None to infer every type from the first chunk)
+    - **compression**: *str* compression codec (None for the format default)
+    - **file_format**: *str* output format (`csv`, `feather` or `parquet`)
+    - **file_path**: *Path* output file path
+    - **rows**: *int* number of rows written
+    """
+
+    def __init__(self,
+                 file_path: Union[Path, str],
+                 file_format: str,
+                 compression: Optional[str] = None,
+                 columns: Optional[Iterable[sa.Column]] = None):
+        if file_format not in EXPORT_FORMATS:
+            raise InputError(
+                expression='file_format',
+                message=f'File format must be one of: {EXPORT_FORMATS}')
+        if file_format == 'csv' and compression not in CSV_COMPRESSION:
+            raise InputError(
+                expression='compression',
+                message='CSV files only support `gzip` compression.')
+        self.columns = None if columns is None else list(columns)
+        self.compression = compression
+        self.file_format = file_format
+        self.file_path = Path(file_path)
+        self.rows = 0
+        self._schema = None
+        self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _open(self, df: pd.DataFrame):
+        """Open the output file with a schema covering every chunk."""
+        if self.file_format == 'csv':
+            self._writer = (gzip.open(self.file_path, 'wt', newline='')
+                            if self.compression == 'gzip' else open(
+                                self.file_path, 'w', newline=''))
+            return
+
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._schema = _arrow_schema(df, self.columns)
+        if self.file_format == 'parquet':
+            self._writer = pq.ParquetWriter(
+                self.file_path,
+                self._schema,
+                compression=self.compression or 'snappy')
+        else:
+            options = pa.ipc.IpcWriteOptions(
+                compression=self.compression or 'lz4')
+            self._writer = pa.ipc.new_file(str(self.file_path),
+                                           self._schema,
+                                           options=options)
+
+    def close(self):
+        """Finalize and close the output file."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def write(self, df: pd.DataFrame):
+        """
+        Append a chunk to the output file.
+
+        :param df: chunk of rows to write (Parquet row group, Feather record \
+            batch or block of CSV lines)
+        """
+        first = self._writer is None
+        if first:
+            self._open(df)
+        if self.file_format == 'csv':
+            df.to_csv(self._writer, header=first, index=False)
+        else:
+            import pyarrow as pa
+
+            table = pa.Table.from_pandas(df,
+                                         schema=self._schema,
+                                         preserve_index=False)
+            self._writer.write_table(table)
+        self.rows += len(df)
+
+
+def export_table(
+    host: str,
+    database: str,
+    schema: str,
+    table_name: str,
+    file_path: Union[Path, str],
+    file_format: str = 'parquet',
+    chunk_size: int = 100_000,
+    compression: Optional[str] = None,
+    dialect: str = 'postgresql',
+    progress: Optional[Progress] = None,
+) -> int:
+    """
+    Stream a database table to a file with constant memory.
+
+    Chunks are fetched from the database on the calling thread while a \
+    worker thread encodes, compresses and writes the previous chunk. A \
+    bounded queue keeps at most a few chunks in memory regardless of the \
+    table size.
+
+    :param host: name of database host
+    :param database: name of database
+    :param schema: name of table schema
+    :param table_name: name of table
+    :param file_path: output file path
+    :param file_format: `csv`, `feather` or `parquet`
+    :param chunk_size: number of rows fetched and written per chunk
+    :param compression: compression codec (default: `snappy` for Parquet, \
+        `lz4` for Feather and none for CSV; CSV only supports `gzip`)
+    :param dialect: SQLAlchemy dialect
+    :param progress: reporter updated with the number of rows written
+    :return: number of rows written
+    """
+    chunks = queue.Queue(maxsize=2)
+    errors = []
+
+    def write_chunks(writer):
+        while True:
+            df = chunks.get()
+            if df is None:
+                return
+            if errors:
+                continue
+            try:
+                writer.write(df)
+            except Exception as e:
+                errors.append(e)
+            else:
+                if progress is not None:
+                    progress.update(len(df))
+
+    writer = _ChunkWriter(file_path, file_format, compression)
+    with Connect(host=host, database=database, dialect=dialect) as c:
+        writer.columns = list(
+            sa.Table(
+                table_name,
+                c.meta,
+                autoload=True,
+                autoload_with=c.engine,
+                schema=schema,
+            ).columns)
+    with writer:
+        worker = threading.Thread(target=write_chunks,
+                                  args=(writer, ),
+                                  daemon=True)
+        worker.start()
+        try:
+            for df in sql_chunks(host=host,
+                                 database=database,
+                                 schema=schema,
+                                 table_name=table_name,
+                                 chunk_size=chunk_size,
+                                 dialect=dialect):
+                if errors:
+                    break
+                chunks.put(df)
+        finally:
+            chunks.put(None)
+            worker.join()
+    if errors:
+        raise errors[0]
+    logger.info('Exported %d rows from: %s/%s' %
+                (writer.rows, database, table_name))
+    return writer.rows
+
+
+def sql_aggregate(
+    host: str,
+    database: str,
+    schema: str,
+    table_name: str,
+    aggs: Mapping[str, Union[str, Iterable[str]]],
+    group_by: Optional[Union[str, Iterable[str]]] = None,
+    where: Optional[Union[Callable, Mapping[str, Any]]] = None,
+    dialect: str = 'postgresql',
+    connection: Optional[Connect] = None,
+    timeout: Optional[float] = None,
+    token: Optional[CancelToken] = None,
+) -> pd.DataFrame:
+    """
+    Aggregate a database table on the server.
+
+    The equivalent of `sql_table(...).groupby(group_by).agg(aggs)` compiled \
+    to a single `GROUP BY` query, so only one row per group is transferred.
+
+    :param host: name of database host
+    :param database: name of database
+    :param schema: name of table schema
+    :param table_name: name of table
+    :param aggs: aggregate function name or names by column (see \
+        `AGGREGATES`)
+    :param group_by: column names to group by (default: aggregate the \
+        whole table into one row)
+    :param where: filter as values by column name (a list or tuple matches \
+        any of its values) or a callable taking the table and returning a \
+        SQLAlchemy expression
+    :param dialect: SQLAlchemy dialect
+    :param connection: open connection to reuse instead of connecting for \
+        this call (its engine's connection pool is shared)
+    :param timeout: seconds before the query is aborted with \
+        `QueryTimeoutError` (default: no limit)
+    :param token: token cancelling the query with `QueryCancelledError`
+    :return: data frame indexed by the group columns with one column per \
+        aggregate, named after the column for a single function and \
+        `<column>_<function>` for a list of functions
+
+    Example::
+        df = sql_aggregate(host, database, 'sales', 'orders',
+                           aggs={'amount': ['sum', 'mean'], 'id': 'count'},
+                           group_by='region',
+                           where={'year': (2022, 2023)})
+    """
+    group_by = ([group_by]
+                if isinstance(group_by, str) else list(group_by or ()))
+    with _connect(host, database, dialect, connection) as c:
+        table = sa.Table(
+            table_name,
+            c.meta,
+            autoload=True,
+            autoload_with=c.engine,
+            schema=schema,
+        )
+
+        def column(name: str) -> sa.Column:
+            if name not in table.c:
+                raise InputError(
+                    expression=name,
+                    message=f'Column not found in table {table_name}.')
+            return table.c[name]
+
+        selected = [column(x) for x in group_by]
+        for name, funcs in aggs.items():
+            single = isinstance(funcs, str)
+            for func in [funcs] if single else funcs:
+                if func not in AGGREGATES:
+                    raise InputError(
+                        expression=func,
+                        message=f'Aggregate must be one of: '
+                        f'{", ".join(AGGREGATES)}.')
+                selected.append(AGGREGATES[func](column(name)).label(
+                    name if single else f'{name}_{func}'))
+
+        statement = sa.select(*selected)
+        if callable(where):
+            statement = statement.where(where(table))
+        elif where:
+            statement = statement.where(*[
+                column(k).in_(v) if isinstance(v, (list, tuple)) else
+                column(k) == v for k, v in where.items()
+            ])
+        if group_by:
+            statement = statement.group_by(*selected[:len(group_by)]) \
+                .order_by(*selected[:len(group_by)])
+
+        with c.engine.begin() as conn, \
+                _query_limits(conn, 'sql_aggregate', timeout, token):
+            df = _read_statement(conn, 'sql_aggregate', statement)
+    logger.info('Aggregated %d groups from: %s/%s' %
+                (len(df), database, table_name))
+    return df.set_index(group_by) if group_by else df
+
+
+def sql_chunks(
+    host: str,
+    database: str,
+    schema: str,
+    table_name: str,
+    columns: Optional[Union[str, Iterable[str]]] = None,
+    chunk_size: int = 100_000,
+    dialect: str = 'postgresql',
+    token: Optional[CancelToken] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream data from a database table in chunks.
+
+    A server side cursor is used, so only one chunk is held in memory at a \
+    time.
+
+    :param host: name of database host
+    :param database: name of database
+    :param schema: name of table schema
+    :param table_name: name of table
+    :param columns: column names to return (default: returns all columns)
+    :param chunk_size: number of rows per chunk
+    :param dialect: SQLAlchemy dialect
+    :param token: token stopping the read before the next chunk
+    :return: iterator of data frames with up to `chunk_size` rows
+    """
+    columns = [columns] if isinstance(columns, str) else columns
+    with Connect(host=host, database=database, dialect=dialect) as c:
+        conn = c.conn.execution_options(stream_results=True)
+        with _query_limits(conn, 'sql_chunks', token=token):
+            for df in pd.read_sql_table(
+                    table_name=table_name,
+                    con=conn,
+                    schema=schema,
+                    columns=columns,
+                    chunksize=chunk_size,
+            ):
+                if token is not None and token.cancelled:
+                    _count_query('sql_chunks', 'cancelled')
+                    token.check()
+                yield df
+    logger.info('Streamed data from: %s/%s' % (database, table_name))
+
+
 def sql_data(
     host: str,
     database: str,
     schema: str,
     table_name: str,
     query: Callable,
+    dialect: str = 'postgresql',
+    connection: Optional[Connect] = None,
+    timeout: Optional[float] = None,
+    token: Optional[CancelToken] = None,
 ) -> pd.DataFrame:
     """
     Retrieve data from a database table.
 
+    Concurrent calls with the same arguments and `query` function share \
+    one database round trip (see `in_flight`). Queries slower than \
+    `slow_queries.threshold` are recorded in `slow_queries` with a sample \
+    of their plans.
+
     :param host: name of database host
     :param database: name of database
     :param schema: name of table schema
     :param table_name: name of table
     :param query: callable that returns an ORM SQLAlchemy select statement
+    :param dialect: SQLAlchemy dialect
+    :param connection: open connection to reuse instead of connecting for \
+        this call (its engine's connection pool is shared)
+    :param timeout: seconds before the query is aborted with \
+        `QueryTimeoutError` (default: no limit)
+    :param token: token cancelling the query with `QueryCancelledError` \
+        (calls with a token are never shared)
     :return: data frame containing data from query
 
     Example `query`::
@@ -141,7 +1067,114 @@ def sql_data(
             cols = ('col1', 'col2')
             return session.query(*[table.c[x] for x in cols]).statement
     """
-    with Connect(host=host, database=database) as c:
+    key = _data_key(host, database, schema, table_name, query, dialect,
+                    connection, timeout, token)
+    return _coalesce('sql_data', key, _sql_data, host, database, schema,
+                     table_name, query, dialect, connection, timeout, token)
+
+
+async def sql_data_async(
+    host: str,
+    database: str,
+    schema: str,
+    table_name: str,
+    query: Callable,
+    dialect: str = 'postgresql',
+    connection: Optional[Connect] = None,
+    timeout: Optional[float] = None,
+    token: Optional[CancelToken] = None,
+) -> pd.DataFrame:
+    """
+    Retrieve data from a database table without blocking the event loop.
+
+    Runs `sql_data` in the default executor. Concurrent calls, threaded \
+    or asyncio, with the same arguments and `query` function share one \
+    database round trip and asyncio callers wait for it without holding a \
+    thread.
+
+    :param host: name of database host
+    :param database: name of database
+    :param schema: name of table schema
+    :param table_name: name of table
+    :param query: callable that returns an ORM SQLAlchemy select statement
+    :param dialect: SQLAlchemy dialect
+    :param connection: open connection to reuse instead of connecting for \
+        this call (its engine's connection pool is shared)
+    :param timeout: seconds before the query is aborted with \
+        `QueryTimeoutError` (default: no limit)
+    :param token: token cancelling the query with `QueryCancelledError` \
+        (calls with a token are never shared)
+    :return: data frame containing data from query
+    """
+    key = _data_key(host, database, schema, table_name, query, dialect,
+                    connection, timeout, token)
+    return await _coalesce_async('sql_data', key, _sql_data, host, database,
+                                 schema, table_name, query, dialect,
+                                 connection, timeout, token)
+
+
+def sql_count(
+    host: str,
+    database: str,
+    schema: str,
+    table_name: str,
+    dialect: str = 'postgresql',
+    connection: Optional[Connect] = None,
+) -> int:
+    """
+    Count the rows of a database table.
+
+    :param host: name of database host
+    :param database: name of database
+    :param schema: name of table schema
+    :param table_name: name of table
+    :param dialect: SQLAlchemy dialect
+    :param connection: open connection to reuse instead of connecting for \
+        this call (its engine's connection pool is shared)
+    :return: number of rows
+    """
+    with _connect(host, database, dialect, connection) as c:
+        table = sa.table(table_name, schema=schema)
+        with c.engine.connect() as conn:
+            return conn.execute(
+                sa.select(sa.func.count()).select_from(table)).scalar()
+
+
+def sql_page(
+    host: str,
+    database: str,
+    schema: str,
+    table_name: str,
+    key: str,
+    after: Optional[Any] = None,
+    limit: int = 1000,
+    columns: Optional[Union[str, Iterable[str]]] = None,
+    dialect: str = 'postgresql',
+    connection: Optional[Connect] = None,
+) -> pd.DataFrame:
+    """
+    Retrieve one page of a database table with keyset pagination.
+
+    Rows are ordered by `key` and the page starts after the last key of \
+    the previous page, so with an index on `key` every page costs the same \
+    however deep it is, unlike `OFFSET` which scans all skipped rows.
+
+    :param host: name of database host
+    :param database: name of database
+    :param schema: name of table schema
+    :param table_name: name of table
+    :param key: unique column ordering the rows (usually the primary key)
+    :param after: last key of the previous page (default: first page)
+    :param limit: maximum number of rows in the page
+    :param columns: column names to return (default: returns all columns; \
+        `key` is always returned)
+    :param dialect: SQLAlchemy dialect
+    :param connection: open connection to reuse instead of connecting for \
+        this call (its engine's connection pool is shared)
+    :return: data frame containing up to `limit` rows
+    """
+    columns = [columns] if isinstance(columns, str) else columns
+    with _connect(host, database, dialect, connection) as c:
         table = sa.Table(
             table_name,
             c.meta,
@@ -149,14 +1182,96 @@ def sql_data(
             autoload_with=c.engine,
             schema=schema,
         )
-        df = pd.read_sql(
-            query(c.session, table),
-            con=c.engine,
+        selected = ([table.c[x] for x in dict.fromkeys([key, *columns])]
+                    if columns else [table])
+        query = sa.select(*selected).order_by(table.c[key]).limit(limit)
+        if after is not None:
+            query = query.where(table.c[key] > after)
+        df = pd.read_sql(query, con=c.engine)
+    logger.debug('Retrieved page after %s=%r from: %s/%s' %
+                 (key, after, database, table_name))
+    return df
+
+
+def _engine_key(connection: Optional[Connect]) -> Optional[int]:
+    """
+    Identity of the engine of a shared connection.
+
+    Calls on different engines must never share a result, even when their \
+    host and database arguments match. The engine is alive while the call \
+    is in flight, so its `id` cannot be reused by another engine.
+    """
+    return None if connection is None else id(connection.engine)
+
+
+def _data_key(host: str, database: str, schema: str, table_name: str,
+              query: Callable, dialect: str, connection: Optional[Connect],
+              timeout: Optional[float],
+              token: Optional[CancelToken]) -> Optional[tuple]:
+    """Identity of a `sql_data` call (None if it must not be shared)."""
+    if token is not None:
+        return None
+    return ('sql_data', host, database, schema, table_name, query, dialect,
+            _engine_key(connection), timeout)
+
+
+def _sql_data(host: str, database: str, schema: str, table_name: str,
+              query: Callable, dialect: str, connection: Optional[Connect],
+              timeout: Optional[float],
+              token: Optional[CancelToken]) -> pd.DataFrame:
+    """Read a query for `sql_data` and `sql_data_async`."""
+    with _connect(host, database, dialect, connection) as c:
+        table = sa.Table(
+            table_name,
+            c.meta,
+            autoload=True,
+            autoload_with=c.engine,
+            schema=schema,
         )
+        statement = query(c.session, table)
+        with c.engine.begin() as conn, \
+                _query_limits(conn, 'sql_data', timeout, token):
+            df = _read_statement(conn, 'sql_data', statement)
     logger.info('Executed: %s' % query.__name__)
     return df
 
 
+def _table_key(host: str, database: str, schema: str, table_name: str,
+               columns: Optional[Union[str, Iterable[str]]],
+               date_columns: Optional[Union[str, Iterable[str]]],
+               dialect: str, connection: Optional[Connect],
+               timeout: Optional[float],
+               token: Optional[CancelToken]) -> Optional[tuple]:
+    """Identity of a `sql_table` call (None if it must not be shared)."""
+    if token is not None:
+        return None
+    columns, date_columns = (
+        (x, ) if isinstance(x, str) else tuple(x or ())
+        for x in (columns, date_columns))
+    return ('sql_table', host, database, schema, table_name, columns,
+            date_columns, dialect, _engine_key(connection), timeout)
+
+
+def _sql_table(host: str, database: str, schema: str, table_name: str,
+               columns: Optional[List[str]],
+               date_columns: Optional[List[str]], dialect: str,
+               connection: Optional[Connect], timeout: Optional[float],
+               token: Optional[CancelToken]) -> pd.DataFrame:
+    """Read a table for `sql_table` and `sql_table_async`."""
+    with _connect(host, database, dialect, connection) as c:
+        with c.engine.begin() as conn, \
+                _query_limits(conn, 'sql_table', timeout, token):
+            df = pd.read_sql_table(
+                table_name=table_name,
+                con=conn,
+                schema=schema,
+                columns=columns,
+                parse_dates=date_columns,
+            )
+    logger.info('Retrieved data from: %s/%s' % (database, table_name))
+    return df
+
+
 def sql_table(
     host: str,
     database: str,
@@ -164,31 +1279,85 @@ def sql_table(
     table_name: str,
     columns: Optional[Union[str, Iterable[str]]] = None,
     date_columns: Optional[Union[str, Iterable[str]]] = None,
+    dialect: str = 'postgresql',
+    connection: Optional[Connect] = None,
+    timeout: Optional[float] = None,
+    token: Optional[CancelToken] = None,
 ) -> pd.DataFrame:
     """
     Retrieve data from a database table.
 
+    Concurrent calls with the same arguments share one database round \
+    trip (see `in_flight`).
+
     :param host: name of database host
     :param database: name of database
     :param schema: name of table schema
     :param table_name: name of table
     :param columns: column names to return (default: returns all columns)
     :param date_columns: column names to be formatted as dates
+    :param dialect: SQLAlchemy dialect
+    :param connection: open connection to reuse instead of connecting for \
+        this call (its engine's connection pool is shared)
+    :param timeout: seconds before the query is aborted with \
+        `QueryTimeoutError` (default: no limit)
+    :param token: token cancelling the query with `QueryCancelledError` \
+        (calls with a token are never shared)
     :return: data frame containing data from table
     """
     columns = [columns] if isinstance(columns, str) else columns
     date_columns = ([date_columns]
                     if isinstance(date_columns, str) else date_columns)
-    with Connect(host=host, database=database) as c:
-        df = pd.read_sql_table(
-            table_name=table_name,
-            con=c.engine,
-            schema=schema,
-            columns=columns,
-            parse_dates=date_columns,
-        )
-    logger.info('Retrieved data from: %s/%s' % (database, table_name))
-    return df
+    key = _table_key(host, database, schema, table_name, columns,
+                     date_columns, dialect, connection, timeout, token)
+    return _coalesce('sql_table', key, _sql_table, host, database, schema,
+                     table_name, columns, date_columns, dialect, connection,
+                     timeout, token)
+
+
+async def sql_table_async(
+    host: str,
+    database: str,
+    schema: str,
+    table_name: str,
+    columns: Optional[Union[str, Iterable[str]]] = None,
+    date_columns: Optional[Union[str, Iterable[str]]] = None,
+    dialect: str = 'postgresql',
+    connection: Optional[Connect] = None,
+    timeout: Optional[float] = None,
+    token: Optional[CancelToken] = None,
+) -> pd.DataFrame:
+    """
+    Retrieve data from a database table without blocking the event loop.
+
+    Runs `sql_table` in the default executor. Concurrent calls, threaded \
+    or asyncio, with the same arguments share one database round trip and \
+    asyncio callers wait for it without holding a thread.
+
+    :param host: name of database host
+    :param database: name of database
+    :param schema: name of table schema
+    :param table_name: name of table
+    :param columns: column names to return (default: returns all columns)
+    :param date_columns: column names to be formatted as dates
+    :param dialect: SQLAlchemy dialect
+    :param connection: open connection to reuse instead of connecting for \
+        this call (its engine's connection pool is shared)
+    :param timeout: seconds before the query is aborted with \
+        `QueryTimeoutError` (default: no limit)
+    :param token: token cancelling the query with `QueryCancelledError` \
+        (calls with a token are never shared)
+    :return: data frame containing data from table
+    """
+    columns = [columns] if isinstance(columns, str) else columns
+    date_columns = ([date_columns]
+                    if isinstance(date_columns, str) else date_columns)
+    key = _table_key(host, database, schema, table_name, columns,
+                     date_columns, dialect, connection, timeout, token)
+    return await _coalesce_async('sql_table', key, _sql_table, host,
+                                 database, schema, table_name, columns,
+                                 date_columns, dialect, connection, timeout,
+                                 token)
 
 
 if __name__ == '__main__':
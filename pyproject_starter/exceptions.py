@@ -26,3 +26,11 @@ class Error(Exception):
 
 class InputError(Error):
     """Exception raised for errors in the input."""
+
+
+class QueryCancelledError(Error):
+    """Exception raised when a database query is cancelled."""
+
+
+class QueryTimeoutError(QueryCancelledError):
+    """Exception raised when a database query exceeds its time limit."""
@@ -0,0 +1,324 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+""" Parallel Execution Module
+
+"""
+from collections import deque
+import concurrent.futures as cf
+import contextlib
+import itertools
+import logging
+import math
+from multiprocessing import shared_memory
+import os
+import sys
+import threading
+from typing import (Any, Callable, Deque, Dict, Iterable, Iterator, List,
+                    NamedTuple, Tuple, Union)
+
+import numpy as np
+
+from pyproject_starter.exceptions import InputError
+
+logger = logging.getLogger('package')
+
+BACKENDS = ('process', 'ray', 'thread')
+BATCHES_PER_WORKER = 4
+DEFAULT_BATCH_SIZE = 64
+IN_FLIGHT_PER_WORKER = 2
+MAX_BATCH_SIZE = 10_000
+SHARED_MEMORY_THRESHOLD = 2**20
+
+_attached: Dict[str, shared_memory.SharedMemory] = {}
+_ray_run_batch = None
+
+
+class SharedArrayDescriptor(NamedTuple):
+    """Lightweight, picklable reference to an array in shared memory."""
+    name: str
+    shape: Tuple[int, ...]
+    dtype: str
+    readonly: bool
+
+
+class SharedArray:
+    """
+    NumPy array published once in shared memory.
+
+    Workers receive the small `descriptor` instead of a pickled copy of the \
+    array and attach to the shared block zero-copy with `attach`. The block \
+    is reference counted: the creator holds the first reference, each \
+    `acquire` adds one and each `release` removes one. The shared memory is \
+    unlinked when the count reaches zero.
+
+    :Attributes:
+
+    - **array**: *ndarray* owner view of the shared array
+    - **descriptor**: *SharedArrayDescriptor* reference passed to workers
+    - **refs**: *int* number of outstanding references
+
+    Example::
+        with SharedArray(arr) as shared:
+            executor.submit(func, shared.descriptor)
+
+        def func(descriptor):
+            arr = SharedArray.attach(descriptor)
+    """
+
+    def __init__(self, arr: np.ndarray, readonly: bool = True):
+        arr = np.asarray(arr)
+        if arr.dtype.hasobject:
+            raise InputError(
+                expression='arr.dtype',
+                message='Arrays of Python objects cannot be shared.')
+        self._lock = threading.Lock()
+        self._shm = shared_memory.SharedMemory(create=True,
+                                               size=max(arr.nbytes, 1))
+        self.array = np.ndarray(arr.shape,
+                                dtype=arr.dtype,
+                                buffer=self._shm.buf)
+        self.array[...] = arr
+        self.descriptor = SharedArrayDescriptor(self._shm.name, arr.shape,
+                                                arr.dtype.str, readonly)
+        self.refs = 1
+
+    def __repr__(self) -> str:
+        return (f'<{type(self).__name__}('
+                f'name={self.descriptor.name!r}, '
+                f'shape={self.descriptor.shape!r}, '
+                f'dtype={self.descriptor.dtype!r}'
+                f')>')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+    @staticmethod
+    def attach(descriptor: SharedArrayDescriptor) -> np.ndarray:
+        """
+        Attach to a shared array without copying.
+
+        Attachments are cached per process, so repeated tasks in the same \
+        worker reuse the existing mapping.
+
+        :param descriptor: reference produced by the owning `SharedArray`
+        :return: array backed by the shared memory block
+        """
+        shm = _attached.get(descriptor.name)
+        if shm is None:
+            shm = shared_memory.SharedMemory(name=descriptor.name)
+            _attached[descriptor.name] = shm
+        arr = np.ndarray(descriptor.shape,
+                         dtype=np.dtype(descriptor.dtype),
+                         buffer=shm.buf)
+        arr.flags.writeable = not descriptor.readonly
+        return arr
+
+    @staticmethod
+    def detach(descriptor: SharedArrayDescriptor):
+        """
+        Close the cached attachment of this process.
+
+        :param descriptor: reference produced by the owning `SharedArray`
+        """
+        shm = _attached.pop(descriptor.name, None)
+        if shm is not None:
+            shm.close()
+
+    def acquire(self) -> SharedArrayDescriptor:
+        """
+        Add a reference to the shared array.
+
+        :return: reference to pass to workers
+        """
+        with self._lock:
+            if self.refs == 0:
+                raise InputError(
+                    expression='refs',
+                    message='Shared array has already been released.')
+            self.refs += 1
+        return self.descriptor
+
+    def release(self):
+        """
+        Remove a reference and unlink the shared memory at zero.
+
+        Arrays returned by `attach` in this process must be dropped before \
+        the last reference is released. Otherwise closing the mapping \
+        raises `BufferError`, after the shared memory is unlinked so the \
+        block is still freed once those arrays are gone.
+        """
+        with self._lock:
+            if self.refs == 0:
+                return
+            self.refs -= 1
+            if self.refs:
+                return
+        self.array = None
+        try:
+            try:
+                self.detach(self.descriptor)
+            finally:
+                self._shm.close()
+        finally:
+            self._shm.unlink()
+
+
+def _auto_batch_size(iterable: Iterable[Any], workers: int) -> int:
+    """
+    Choose a batch size giving each worker several batches.
+
+    :param iterable: items to be processed
+    :param workers: number of parallel workers
+    :return: number of items per batch
+    """
+    try:
+        n = len(iterable)
+    except TypeError:
+        return DEFAULT_BATCH_SIZE
+    batches = workers * BATCHES_PER_WORKER
+    return max(1, min(MAX_BATCH_SIZE, math.ceil(n / batches)))
+
+
+def _batches(iterable: Iterable[Any], batch_size: int) -> Iterator[List[Any]]:
+    """
+    Group items into lists of `batch_size`.
+
+    :param iterable: items to be grouped
+    :param batch_size: number of items per batch
+    """
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def _run_batch(func: Callable, batch: List[Any], kwargs: dict) -> List[Any]:
+    """Apply `func` to every item of a batch."""
+    kwargs = {
+        k: (SharedArray.attach(v) if isinstance(v, SharedArrayDescriptor) else
+            v)
+        for k, v in kwargs.items()
+    }
+    return [func(item, **kwargs) for item in batch]
+
+
+def _executor_map(backend: str, func: Callable, batches: Iterator[List[Any]],
+                  kwargs: dict, ordered: bool,
+                  workers: int) -> Iterator[Any]:
+    """Run batches on a `concurrent.futures` executor."""
+    executor_cls = (cf.ProcessPoolExecutor
+                    if backend == 'process' else cf.ThreadPoolExecutor)
+    max_in_flight = workers * IN_FLIGHT_PER_WORKER
+    with contextlib.ExitStack() as stack:
+        if backend == 'process':
+            kwargs = {
+                k: (stack.enter_context(SharedArray(v)).descriptor
+                    if isinstance(v, np.ndarray) and not v.dtype.hasobject
+                    and v.nbytes >= SHARED_MEMORY_THRESHOLD else v)
+                for k, v in kwargs.items()
+            }
+        executor = stack.enter_context(executor_cls(max_workers=workers))
+
+        def submit(batch):
+            return executor.submit(_run_batch, func, batch, kwargs)
+
+        pending = deque(map(submit, itertools.islice(batches, max_in_flight)))
+        while pending:
+            if ordered:
+                done = [pending.popleft()]
+            else:
+                finished, _ = cf.wait(pending,
+                                      return_when=cf.FIRST_COMPLETED)
+                done = [f for f in pending if f in finished]
+                pending = deque(f for f in pending if f not in finished)
+            for future in done:
+                yield from future.result()
+                pending.extend(map(submit, itertools.islice(batches, 1)))
+
+
+def _ray_map(func: Callable, batches: Iterator[List[Any]], kwargs: dict,
+             ordered: bool, workers: int) -> Iterator[Any]:
+    """Run batches as Ray tasks sharing one object store copy of `kwargs`."""
+    import ray
+
+    global _ray_run_batch
+    if _ray_run_batch is None:
+        _ray_run_batch = ray.remote(_run_batch)
+    func_ref = ray.put(func)
+    kwargs_ref = ray.put(kwargs)
+    max_in_flight = workers * IN_FLIGHT_PER_WORKER
+
+    def submit(batch):
+        return _ray_run_batch.remote(func_ref, batch, kwargs_ref)
+
+    pending: Deque = deque(
+        map(submit, itertools.islice(batches, max_in_flight)))
+    while pending:
+        if ordered:
+            ref = pending.popleft()
+        else:
+            (ref, ), _ = ray.wait(list(pending), num_returns=1)
+            pending.remove(ref)
+        yield from ray.get(ref)
+        pending.extend(map(submit, itertools.islice(batches, 1)))
+
+
+def parallel_map(func: Callable,
+                 iterable: Iterable[Any],
+                 backend: str = 'ray',
+                 batch_size: Union[int, str] = 'auto',
+                 ordered: bool = True,
+                 max_workers: Union[None, int] = None,
+                 **kwargs) -> Iterator[Any]:
+    """
+    Apply a function to every item of an iterable in parallel.
+
+    Items are grouped into batches so each task amortizes scheduling and \
+    serialization overhead over many items. Only a bounded number of batches \
+    is in flight at once, so results stream back without materializing the \
+    whole input.
+
+    :param func: function applied to each item (must be picklable for the \
+        `process` and `ray` backends)
+    :param iterable: items to be processed
+    :param backend: `ray`, `process` or `thread` (if `ray` is requested but \
+        Ray is not initialized the `process` backend is used)
+    :param batch_size: number of items per task or `auto` to give each \
+        worker several batches
+    :param ordered: if True yield results in input order else as completed
+    :param max_workers: number of workers (default: available CPUs)
+    :param kwargs: keyword arguments passed to every call of `func`; with \
+        the `ray` backend they are placed in the object store once, so large \
+        NumPy arrays are shared zero-copy instead of sent with each task
+    :return: iterator of results
+    """
+    if backend not in BACKENDS:
+        raise InputError(expression='backend',
+                         message=f'Backend must be one of: {BACKENDS}')
+    ray = sys.modules.get('ray')
+    if backend == 'ray' and (ray is None or not ray.is_initialized()):
+        logger.info('Ray is not initialized, using the process backend.')
+        backend = 'process'
+
+    if max_workers is None:
+        max_workers = (int(ray.cluster_resources().get('CPU', 1))
+                       if backend == 'ray' else os.cpu_count() or 1)
+    if batch_size == 'auto':
+        batch_size = _auto_batch_size(iterable, max_workers)
+    elif not isinstance(batch_size, int) or batch_size < 1:
+        raise InputError(expression='batch_size',
+                         message='Batch size must be `auto` or at least 1.')
+    batches = _batches(iterable, batch_size)
+
+    if backend == 'ray':
+        return _ray_map(func, batches, kwargs, ordered, max_workers)
+    return _executor_map(backend, func, batches, kwargs, ordered, max_workers)
+
+
+if __name__ == '__main__':
+    pass
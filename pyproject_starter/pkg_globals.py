@@ -3,14 +3,19 @@
 """ Global Variable Module
 
 """
+import functools
+import os
 from pathlib import Path
 
 PACKAGE_ROOT = Path(__file__).parents[1]
-with open((PACKAGE_ROOT / 'docker' / 'pytorch.Dockerfile'), 'r') as f:
-    line = f.readline()
-NVIDIA_NGC_BASE_IMAGE = line \
-    .strip('FROM ') \
-    .rstrip('\n')
+
+CACHE_DIR = PACKAGE_ROOT / 'cache'
+
+# Point at the PgBouncer service to use connection pooling
+DB_HOST = os.getenv('DB_HOST', 'junk_postgres')
+DB_PORT = int(os.getenv('DB_PORT', '5432'))
+
+DOCKER_SECRETS_DIR = Path('/run/secrets')
 
 FONT_SIZE = {
     'axis': 18,
@@ -39,9 +44,31 @@ PLOTLY_FONTS = {
     },
 }
 
+# Queries slower than this are logged with their plan (a sample of them)
+SLOW_QUERY_SAMPLE_RATE = float(os.getenv('SLOW_QUERY_SAMPLE_RATE', '1.0'))
+SLOW_QUERY_SECONDS = float(os.getenv('SLOW_QUERY_SECONDS', '1.0'))
+
 TENSORBOARD_DIR = PACKAGE_ROOT / 'ai_logs'
 
 TIME_FORMAT = '%Y_%m_%d_%H_%M_%S'
 
+
+@functools.lru_cache(maxsize=None)
+def _nvidia_ngc_base_image() -> str:
+    """Read the base image from the first line of the PyTorch Dockerfile."""
+    with open((PACKAGE_ROOT / 'docker' / 'pytorch.Dockerfile'), 'r') as f:
+        line = f.readline()
+    return line \
+        .strip('FROM ') \
+        .rstrip('\n')
+
+
+def __getattr__(name: str):
+    """Compute `NVIDIA_NGC_BASE_IMAGE` on first access."""
+    if name == 'NVIDIA_NGC_BASE_IMAGE':
+        return _nvidia_ngc_base_image()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
 if __name__ == '__main__':
     pass
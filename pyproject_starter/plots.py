@@ -0,0 +1,221 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+""" Plotting Module
+
+Plot large series by only rendering about as many points as there are
+pixels. Series are reduced with Largest Triangle Three Buckets (LTTB), which
+preserves the visual shape, or with the minimum and maximum of each bucket,
+which preserves every peak and trough.
+"""
+from pathlib import Path
+from typing import Any, Optional, Tuple, Union
+
+from matplotlib.axes import Axes
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import matplotlib.pyplot as plt
+import numpy as np
+import plotly.graph_objects as go
+
+from pyproject_starter.exceptions import InputError
+from pyproject_starter.pkg_globals import PLOTLY_FONTS
+from pyproject_starter.utils import matplotlib_defaults
+
+METHODS = ('lttb', 'minmax')
+
+
+def _as_numeric(arr: np.ndarray) -> np.ndarray:
+    """View datetime values as integers for geometry without copying."""
+    if np.issubdtype(arr.dtype, np.datetime64):
+        return arr.view('i8')
+    return arr
+
+
+def _pixel_width(ax: Axes) -> int:
+    """Width of the axes in display pixels."""
+    return max(int(ax.get_window_extent().width), 1)
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Select points with the Largest Triangle Three Buckets algorithm.
+
+    The first and last points are always kept. The remaining points are split
+    into `n_out - 2` buckets and from each bucket the point forming the
+    largest triangle with the previously selected point and the mean of the
+    next bucket is kept. Work inside each bucket is vectorized, so the Python
+    loop runs once per output point rather than once per input point.
+
+    :param x: x values (numeric or datetime)
+    :param y: y values
+    :param n_out: number of points to keep (minimum of 3)
+    :return: sorted indices of the selected points
+    """
+    n = y.size
+    if n_out < 3:
+        raise InputError(expression='n_out < 3',
+                         message='LTTB requires at least 3 output points.')
+    if n_out >= n:
+        return np.arange(n)
+    xf = _as_numeric(np.asarray(x))
+    yf = _as_numeric(np.asarray(y))
+
+    edges = np.r_[np.linspace(1, n - 1, n_out - 1).astype(np.intp), n]
+
+    selected = np.empty(n_out, dtype=np.intp)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi, next_hi = edges[i:i + 3]
+        avg_x = xf[hi:next_hi].mean()
+        avg_y = yf[hi:next_hi].mean()
+        ax, ay = float(xf[a]), float(yf[a])
+        area = np.abs((ax - avg_x) * (yf[lo:hi] - ay) -
+                      (ax - xf[lo:hi]) * (avg_y - ay))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Select the minimum and maximum point of each bucket.
+
+    :param y: y values
+    :param n_out: number of points to keep (two per bucket)
+    :return: sorted indices of the selected points
+    """
+    y = np.asarray(y)
+    n = y.size
+    n_buckets = max(n_out // 2, 1)
+    if 2 * n_buckets >= n:
+        return np.arange(n)
+    size = -(-n // n_buckets)
+    full = n // size
+    blocks = y[:full * size].reshape(full, size)
+    offsets = np.arange(full) * size
+    idx = [
+        blocks.argmin(axis=1) + offsets,
+        blocks.argmax(axis=1) + offsets,
+    ]
+    if full * size < n:
+        tail = y[full * size:]
+        idx.append(full * size + np.array([tail.argmin(), tail.argmax()]))
+    return np.unique(np.concatenate(idx))
+
+
+def downsample(x: Optional[np.ndarray],
+               y: np.ndarray,
+               n_out: int,
+               method: str = 'lttb') -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reduce a series to about `n_out` points.
+
+    :param x: x values (if None the position of each y value is used)
+    :param y: y values
+    :param n_out: target number of points
+    :param method: `lttb` or `minmax`
+    :return: downsampled x and y values
+    """
+    if method not in METHODS:
+        raise InputError(expression='method',
+                         message=f'Method must be one of: {METHODS}')
+    y = np.asarray(y)
+    x = np.arange(y.size) if x is None else np.asarray(x)
+    idx = lttb(x, y, n_out) if method == 'lttb' else minmax(y, n_out)
+    return x[idx], y[idx]
+
+
+def plot_series(x: Optional[np.ndarray],
+                y: np.ndarray,
+                ax: Optional[Axes] = None,
+                method: str = 'minmax',
+                n_out: Optional[int] = None,
+                **kwargs: Any) -> Axes:
+    """
+    Plot a large series with matplotlib after downsampling.
+
+    :param x: x values (if None the position of each y value is used)
+    :param y: y values
+    :param ax: axes to draw on (default: current pyplot axes)
+    :param method: `lttb` or `minmax`
+    :param n_out: target number of points (default: two per horizontal \
+        pixel of the axes)
+    :param kwargs: keyword arguments passed to `Axes.plot`
+    :return: axes containing the plotted series
+    """
+    matplotlib_defaults()
+    ax = plt.gca() if ax is None else ax
+    n_out = 2 * _pixel_width(ax) if n_out is None else n_out
+    ax.plot(*downsample(x, y, n_out, method), **kwargs)
+    return ax
+
+
+def plotly_series(x: Optional[np.ndarray],
+                  y: np.ndarray,
+                  method: str = 'minmax',
+                  n_out: int = 4000,
+                  title: Optional[str] = None,
+                  **kwargs: Any) -> go.Figure:
+    """
+    Plot a large series with plotly after downsampling.
+
+    :param x: x values (if None the position of each y value is used)
+    :param y: y values
+    :param method: `lttb` or `minmax`
+    :param n_out: target number of points sent to the browser
+    :param title: figure title
+    :param kwargs: keyword arguments passed to `plotly.graph_objects.Scattergl`
+    :return: plotly figure using the package font defaults
+    """
+    x, y = downsample(x, y, n_out, method)
+    fig = go.Figure(go.Scattergl(x=x, y=y, mode='lines', **kwargs))
+    fig.update_layout(
+        font=PLOTLY_FONTS['legend_font'],
+        legend_font=PLOTLY_FONTS['legend_font'],
+        title=title,
+        title_font=PLOTLY_FONTS['title_font'],
+    )
+    fig.update_xaxes(title_font=PLOTLY_FONTS['axis_font'])
+    fig.update_yaxes(title_font=PLOTLY_FONTS['axis_font'])
+    return fig
+
+
+def save_series(file_path: Union[Path, str],
+                x: Optional[np.ndarray],
+                y: np.ndarray,
+                method: str = 'minmax',
+                figsize: Tuple[float, float] = (10, 4),
+                dpi: int = 100,
+                title: Optional[str] = None,
+                **kwargs: Any) -> Path:
+    """
+    Render a large series straight to an image file.
+
+    Headless fast path for batch image generation: the figure is drawn with
+    the Agg canvas directly, bypassing pyplot and its global figure manager,
+    so it is safe to call from worker threads and leaves no figures open.
+
+    :param file_path: path of the image to write
+    :param x: x values (if None the position of each y value is used)
+    :param y: y values
+    :param method: `lttb` or `minmax`
+    :param figsize: figure size in inches
+    :param dpi: resolution in dots per inch
+    :param title: axes title
+    :param kwargs: keyword arguments passed to `Axes.plot`
+    :return: path of the written image
+    """
+    matplotlib_defaults()
+    fig = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.plot(*downsample(x, y, 2 * _pixel_width(ax), method), **kwargs)
+    if title:
+        ax.set_title(title)
+    fig.savefig(file_path)
+    return Path(file_path)
+
+
+if __name__ == '__main__':
+    pass
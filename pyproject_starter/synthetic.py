@@ -0,0 +1,244 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+""" Synthetic Data Module
+
+Generate realistic `user` and `user_pref` tables for load testing. Values
+are drawn from fixed vocabularies with NumPy, so millions of rows take
+seconds and the same seed always produces the same rows.
+"""
+import csv
+import io
+import logging
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import sqlalchemy as sa
+
+from pyproject_starter import db
+from pyproject_starter.exceptions import InputError
+from pyproject_starter.utils import Progress
+
+logger = logging.getLogger('package')
+
+CHUNK_SIZE = 500_000
+DOMAINS = ('example.com', 'example.net', 'example.org', 'mail.test')
+NAMES = (
+    'alex', 'ana', 'ben', 'chen', 'dana', 'eli', 'emma', 'farah', 'gus',
+    'hana', 'ivan', 'jade', 'kai', 'lena', 'liam', 'maya', 'minh', 'nia',
+    'noah', 'omar', 'pia', 'quinn', 'ravi', 'rosa', 'sam', 'tara', 'uma',
+    'vik', 'wen', 'xena', 'yuki', 'zoe'
+)
+PASSWORD_CHARS = np.frombuffer(
+    b'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789',
+    dtype=np.uint8)
+PASSWORD_LENGTH = 12
+PREFERENCES = {
+    'currency': ('EUR', 'GBP', 'JPY', 'USD'),
+    'font_size': ('large', 'medium', 'small', 'x-large'),
+    'language': ('de', 'en', 'es', 'vi'),
+    'newsletter': ('daily', 'monthly', 'never', 'weekly'),
+    'notifications': ('all', 'mentions', 'none', 'summary'),
+    'theme': ('dark', 'high_contrast', 'light', 'system'),
+    'timezone': ('America/New_York', 'Asia/Ho_Chi_Minh', 'Europe/London',
+                 'UTC'),
+    'units': ('imperial', 'metric', 'nautical', 'si'),
+}
+PREF_NAMES = np.array(list(PREFERENCES))
+PREF_VALUES = np.array(list(PREFERENCES.values()))
+SIZES = {
+    'small': (1_000, 3),
+    'medium': (100_000, 5),
+    'large': (1_000_000, 8),
+}
+
+
+def _rng(seed: int, chunk: int, stream: int) -> np.random.Generator:
+    """Independent generator for one stream of one chunk."""
+    return np.random.default_rng([seed, chunk, stream])
+
+
+def _check_prefs_per_user(prefs_per_user: int):
+    """Raise `InputError` unless every user can get distinct preferences."""
+    if not 0 <= prefs_per_user <= PREF_NAMES.size:
+        raise InputError(
+            expression='prefs_per_user',
+            message=f'Preferences per user must be between 0 and '
+            f'{PREF_NAMES.size}.')
+
+
+def users(user_ids: np.ndarray, seed: int = 0, chunk: int = 0) \
+        -> pd.DataFrame:
+    """
+    Generate users.
+
+    :param user_ids: user IDs to generate
+    :param seed: random seed
+    :param chunk: chunk number (selects an independent random stream)
+    :return: `user` table rows keyed by column name
+    """
+    rng = _rng(seed, chunk, 0)
+    n = user_ids.size
+    names = np.array(NAMES, dtype=object)[rng.integers(0, len(NAMES), n)]
+    domains = np.array(DOMAINS, dtype=object)[rng.integers(
+        0, len(DOMAINS), n)]
+    user_name = [a + b for a, b in zip(names, user_ids.astype(str).tolist())]
+    email = [f'{a}@{b}' for a, b in zip(user_name, domains)]
+    password = PASSWORD_CHARS[rng.integers(0, PASSWORD_CHARS.size,
+                                           (n, PASSWORD_LENGTH))]
+    return pd.DataFrame({
+        'user_id': user_ids,
+        'User_name': user_name,
+        'email_address': email,
+        'password': [
+            b.decode() for b in password.view(f'S{PASSWORD_LENGTH}').ravel()
+        ],
+    })
+
+
+def prefs(user_ids: np.ndarray,
+          prefs_per_user: int,
+          seed: int = 0,
+          chunk: int = 0) -> pd.DataFrame:
+    """
+    Generate user preferences.
+
+    Each user gets `prefs_per_user` distinct preference names.
+
+    :param user_ids: user IDs to generate preferences for
+    :param prefs_per_user: number of preferences per user
+    :param seed: random seed
+    :param chunk: chunk number (selects an independent random stream)
+    :return: `user_pref` table rows keyed by column name (names and values \
+        are categorical, so they cost one byte per row)
+    """
+    _check_prefs_per_user(prefs_per_user)
+    rng = _rng(seed, chunk, 1)
+    n = user_ids.size
+    offsets = rng.integers(0, PREF_NAMES.size, n)[:, None]
+    name_idx = ((offsets + np.arange(prefs_per_user)) %
+                PREF_NAMES.size).ravel()
+    value_idx = rng.integers(0, PREF_VALUES.shape[1], name_idx.size)
+    first_pref_id = (user_ids[0] - 1) * prefs_per_user + 1 if n else 1
+    return pd.DataFrame({
+        'pref_id': np.arange(first_pref_id, first_pref_id + name_idx.size),
+        'user_id': np.repeat(user_ids, prefs_per_user),
+        'pref_name': pd.Categorical.from_codes(name_idx, PREF_NAMES),
+        'pref_value': pd.Categorical.from_codes(
+            name_idx * PREF_VALUES.shape[1] + value_idx, PREF_VALUES.ravel()),
+    })
+
+
+def generate(n_users: int,
+             prefs_per_user: int = 5,
+             seed: int = 0,
+             chunk_size: int = CHUNK_SIZE) \
+        -> Iterator[Tuple[pd.DataFrame, pd.DataFrame]]:
+    """
+    Generate users and their preferences in chunks.
+
+    Rows depend only on the seed and chunk size, and memory use is bounded \
+    by the chunk size however many users are generated.
+
+    :param n_users: number of users
+    :param prefs_per_user: number of preferences per user
+    :param seed: random seed
+    :param chunk_size: number of users per chunk
+    :return: iterator of `user` and `user_pref` chunks
+    """
+    for chunk, start in enumerate(range(0, n_users, chunk_size)):
+        user_ids = np.arange(start + 1, min(start + chunk_size, n_users) + 1)
+        yield (users(user_ids, seed, chunk),
+               prefs(user_ids, prefs_per_user, seed, chunk))
+
+
+def _copy_rows(conn, table: sa.Table, df: pd.DataFrame):
+    """Bulk insert with PostgreSQL `COPY`."""
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, header=False, quoting=csv.QUOTE_MINIMAL)
+    buffer.seek(0)
+    name = (f'"{table.schema}"."{table.name}"'
+            if table.schema else f'"{table.name}"')
+    columns = ', '.join(f'"{c}"' for c in df.columns)
+    cursor = conn.connection.cursor()
+    cursor.copy_expert(f'COPY {name} ({columns}) FROM STDIN WITH CSV', buffer)
+
+
+def _insert_rows(conn, table: sa.Table, df: pd.DataFrame):
+    """Bulk insert with a single DBAPI `executemany`."""
+    df = df.rename(columns={c.name: c.key for c in table.columns})
+    statement = table.insert().compile(dialect=conn.dialect,
+                                       column_keys=list(df.columns))
+    if statement.positional:
+        rows = df[list(statement.positiontup)].itertuples(index=False,
+                                                          name=None)
+    else:
+        rows = df.to_dict(orient='records')
+    cursor = conn.connection.cursor()
+    cursor.executemany(str(statement), rows)
+
+
+def load(host: Optional[str],
+         database: Optional[str],
+         n_users: int,
+         prefs_per_user: int = 5,
+         seed: int = 0,
+         chunk_size: int = CHUNK_SIZE,
+         schema: Optional[str] = None,
+         dialect: str = 'postgresql',
+         progress: Optional[Progress] = None,
+         replace: bool = False) -> Tuple[int, int]:
+    """
+    Create and fill the `user` and `user_pref` tables.
+
+    Existing tables are only dropped when `replace` is set. PostgreSQL is \
+    loaded with `COPY` and other dialects with `executemany`, inside one \
+    transaction per chunk.
+
+    :param host: name of database host
+    :param database: name of database (file path for SQLite)
+    :param n_users: number of users
+    :param prefs_per_user: number of preferences per user
+    :param seed: random seed
+    :param chunk_size: number of users generated and loaded at a time
+    :param schema: name of table schema
+    :param dialect: SQLAlchemy dialect
+    :param progress: reporter updated with the number of users loaded
+    :param replace: if True existing `user` and `user_pref` tables are \
+        dropped, otherwise `InputError` is raised when either exists
+    :return: number of users and preferences loaded
+    """
+    _check_prefs_per_user(prefs_per_user)
+    with db.Connect(host=host, database=database, dialect=dialect) as c:
+        meta = sa.MetaData(schema=schema)
+        user, pref = db.user_tables(meta)
+        inspector = sa.inspect(c.engine)
+        existing = [
+            t.name for t in (user, pref)
+            if inspector.has_table(t.name, schema=schema)
+        ]
+        if existing and not replace:
+            raise InputError(
+                expression='replace',
+                message=f'Tables already exist: {", ".join(existing)}. '
+                'Set replace to drop them.')
+        meta.drop_all(c.engine)
+        meta.create_all(c.engine)
+        write = (_copy_rows
+                 if c.engine.dialect.name == 'postgresql' else _insert_rows)
+        n_prefs = 0
+        for user_df, pref_df in generate(n_users, prefs_per_user, seed,
+                                         chunk_size):
+            with c.engine.begin() as conn:
+                write(conn, user, user_df)
+                write(conn, pref, pref_df)
+            n_prefs += len(pref_df)
+            if progress is not None:
+                progress.update(len(user_df))
+    logger.info('Loaded %d users and %d preferences into: %s' %
+                (n_users, n_prefs, database))
+    return n_users, n_prefs
+
+
+if __name__ == '__main__':
+    pass
@@ -4,12 +4,16 @@
 
 """
 import datetime
+import importlib.util
 import time
 
 import numpy as np
+import pandas as pd
 import pytest
+import sqlalchemy as sa
 
-from ..pkg_globals import TIME_FORMAT
+from .. import synthetic
+from ..pkg_globals import PACKAGE_ROOT, TIME_FORMAT
 
 TEST_ARRAY = np.linspace(0, 255, 9, dtype=np.uint8).reshape(3, 3)
 TEST_LABEL = 'test_string'
@@ -37,3 +41,67 @@ def patch_strftime(monkeypatch):
         return fmt.rstrip(TIME_FORMAT) + TEST_STRFTIME
 
     monkeypatch.setattr(time, 'strftime', custom_strftime)
+
+
+@pytest.fixture
+def sqlite_database(tmp_path):
+    database = str(tmp_path / 'test.db')
+    df = pd.DataFrame({
+        'id': range(10),
+        'category': [n % 3 for n in range(10)],
+        'value': [n / 10 for n in range(10)],
+    })
+    engine = sa.create_engine(f'sqlite:///{database}')
+    df.to_sql('data', engine, index=False)
+    engine.dispose()
+    return database
+
+
+def load_script(name):
+    spec = importlib.util.spec_from_file_location(
+        name, PACKAGE_ROOT / 'scripts' / f'{name}.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def compress_static():
+    return load_script('compress_static')
+
+
+@pytest.fixture
+def update_nvidia_tags():
+    return load_script('update_nvidia_tags')
+
+
+@pytest.fixture
+def docker_config(monkeypatch):
+    monkeypatch.setenv('PROJECT_NAME', 'pyproject_starter')
+    return load_script('docker_config')
+
+
+def synthetic_database(tmp_path_factory, size):
+    n_users, prefs_per_user = synthetic.SIZES[size]
+    database = str(tmp_path_factory.mktemp('synthetic') / f'{size}.db')
+    synthetic.load(host=None,
+                   database=database,
+                   n_users=n_users,
+                   prefs_per_user=prefs_per_user,
+                   dialect='sqlite')
+    return database
+
+
+@pytest.fixture(scope='session')
+def users_small(tmp_path_factory):
+    return synthetic_database(tmp_path_factory, 'small')
+
+
+@pytest.fixture(scope='session')
+def users_medium(tmp_path_factory):
+    return synthetic_database(tmp_path_factory, 'medium')
+
+
+@pytest.fixture(scope='session')
+def users_large(tmp_path_factory):
+    return synthetic_database(tmp_path_factory, 'large')
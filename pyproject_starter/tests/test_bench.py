@@ -0,0 +1,87 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+""" Benchmark Unit Tests
+
+"""
+import logging
+
+import pytest
+
+from .. import bench
+
+
+# Test select()
+select = {
+    'all': (None, len(bench.BENCHMARKS)),
+    'pattern': ('rle*', len(bench.RLE_SIZES)),
+    'exact': ('nested_get', 1),
+}
+
+
+@pytest.mark.parametrize('pattern, expected',
+                         list(select.values()),
+                         ids=list(select.keys()))
+def test_select(pattern, expected):
+    assert len(bench.select(pattern)) == expected
+
+
+# Test register() and run()
+def test_run():
+    calls = []
+
+    @bench.register('test_benchmark')
+    def foo():
+        calls.append(1)
+
+    result = bench.run(bench.BENCHMARKS.pop('test_benchmark'),
+                       repeats=5,
+                       warmup=2)
+    assert len(calls) == 8
+    assert result['name'] == 'test_benchmark'
+    assert 0 <= result['median'] <= result['p95']
+    assert result['peak_memory'] >= 0
+
+
+def test_run_sqlite():
+    result = bench.run(bench.BENCHMARKS['sql_data'], repeats=2, warmup=0)
+    assert result['median'] > 0
+
+
+# Test compare()
+compare = {
+    'regression': (1.5, 1),
+    'within threshold': (1.05, 0),
+    'faster': (0.5, 0),
+}
+
+
+@pytest.mark.parametrize('median, regressions',
+                         list(compare.values()),
+                         ids=list(compare.keys()))
+def test_compare(median, regressions):
+    baseline = [{'name': 'a', 'median': 1.0}, {'name': 'b', 'median': 1.0}]
+    results = [{'name': 'a', 'median': median}, {'name': 'c', 'median': 9}]
+    assert len(bench.compare(results, baseline, threshold=0.1)) == regressions
+
+
+def test_compare_zero_baseline():
+    baseline = [{'name': 'a', 'median': 0.0}]
+    results = [{'name': 'a', 'median': 1.0}]
+    assert bench.compare(results, baseline) == []
+
+
+# Test save_results() and load_results()
+def test_save_load_results(tmp_path):
+    results = [{'name': 'a', 'median': 1.0}]
+    bench.save_results(results, tmp_path / 'results.json')
+    assert bench.load_results(tmp_path / 'results.json') == results
+
+
+def test_run_logging():
+    result = bench.run(bench.BENCHMARKS['logging[rate limited]'],
+                       repeats=2,
+                       warmup=0)
+    assert result['median'] > 0
+    package_logger = logging.getLogger('package')
+    assert not package_logger.filters
+    assert not package_logger.handlers
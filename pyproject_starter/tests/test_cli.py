@@ -3,12 +3,90 @@
 """ Command Line Interface Unit Tests
 
 """
+import json
+
 from click.testing import CliRunner
+import pandas as pd
+import pytest
 
 from .. import cli
+from .. import exceptions
+
+
+def test_bench_list():
+    runner = CliRunner()
+    result = runner.invoke(cli.bench, ['list', '-k', 'rle*'])
+    assert result.exit_code == 0
+    assert 'rle[1000]' in result.output
+
+
+def test_bench_run(tmp_path):
+    runner = CliRunner()
+    output = tmp_path / 'results.json'
+    args = ['run', '-k', 'progress_str', '--repeats', '3', '-o', output]
+    result = runner.invoke(cli.bench, args)
+    assert result.exit_code == 0
+    assert json.loads(output.read_text())['results'][0]['name'] == (
+        'progress_str')
+
+
+def test_bench_run_regression(tmp_path):
+    baseline = tmp_path / 'baseline.json'
+    baseline.write_text(
+        json.dumps({'results': [{
+            'name': 'progress_str',
+            'median': 1e-9
+        }]}))
+    runner = CliRunner()
+    args = ['run', '-k', 'progress_str', '--repeats', '3', '-b', baseline]
+    result = runner.invoke(cli.bench, args)
+    assert result.exit_code == 1
+    assert 'Regression: progress_str' in result.output
 
 
 def test_count():
     runner = CliRunner()
     result = runner.invoke(cli.count, ['1'])
     assert result.exit_code == 0
+
+
+# Test export()
+export = {
+    'csv': ('csv', pd.read_csv),
+    'feather': ('feather', pd.read_feather),
+    'parquet': ('parquet', pd.read_parquet),
+}
+
+
+@pytest.mark.parametrize('file_format, read',
+                         list(export.values()),
+                         ids=list(export.keys()))
+def test_export(sqlite_database, tmp_path, file_format, read):
+    file_path = tmp_path / f'data.{file_format}'
+    args = [
+        'export', '--database', sqlite_database, '--table', 'data',
+        '--format', file_format, '--out', file_path, '--chunk-size', '3',
+        '--dialect', 'sqlite'
+    ]
+    runner = CliRunner()
+    result = runner.invoke(cli.main, args)
+    assert result.exit_code == 0
+    assert 'Exported 10 rows' in result.output
+    df = read(file_path)
+    assert df['id'].tolist() == list(range(10))
+
+
+def test_generate(tmp_path):
+    database = str(tmp_path / 'users.db')
+    args = [
+        'generate', '--database', database, '--users', '25', '--prefs', '3',
+        '--chunk-size', '10', '--dialect', 'sqlite'
+    ]
+    runner = CliRunner()
+    result = runner.invoke(cli.main, args)
+    assert result.exit_code == 0
+    assert 'Loaded 25 users and 75 preferences' in result.output
+    result = runner.invoke(cli.main, args)
+    assert isinstance(result.exception, exceptions.InputError)
+    result = runner.invoke(cli.main, [*args, '--replace'])
+    assert result.exit_code == 0
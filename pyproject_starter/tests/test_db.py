@@ -3,9 +3,18 @@
 """ Database Unit Tests
 
 """
+import asyncio
+import concurrent.futures as cf
+import contextlib
+import threading
+import time
+
+import pandas as pd
 import pytest
+import sqlalchemy as sa
 
 from .. import db
+from .. import exceptions
 
 # DATABASE = 'pyproject_starter'
 # HOST = 'pyproject_starter_postgres'
@@ -42,3 +51,602 @@ from .. import db
 #                       schema='schema_name',
 #                       table_name=TABLE_NAME)
 #     assert 'column_name' in df.columns
+
+
+# Test Connect() with SQLite
+def test_connect_sqlite(sqlite_database):
+    with db.Connect(database=sqlite_database, dialect='sqlite') as c:
+        assert c.tables == ['data']
+        assert repr(c) == (f"<Connect(host='junk_postgres', "
+                           f"database='{sqlite_database}')>")
+
+
+# Test sql_data() with SQLite
+def test_sql_data_sqlite(sqlite_database):
+
+    def category_query(session, table):
+        return sa.select(table.c['id']).where(table.c['category'] == 0)
+
+    df = db.sql_data(host=None,
+                     database=sqlite_database,
+                     schema=None,
+                     table_name='data',
+                     query=category_query,
+                     dialect='sqlite')
+    assert df['id'].tolist() == [0, 3, 6, 9]
+
+
+# Test sql_table() with SQLite
+def test_sql_table_sqlite(sqlite_database):
+    df = db.sql_table(host=None,
+                      database=sqlite_database,
+                      schema=None,
+                      table_name='data',
+                      columns='value',
+                      dialect='sqlite')
+    assert df.columns.tolist() == ['value']
+    assert len(df) == 10
+
+
+# Test sql_chunks()
+def test_sql_chunks(sqlite_database):
+    chunks = list(
+        db.sql_chunks(host=None,
+                      database=sqlite_database,
+                      schema=None,
+                      table_name='data',
+                      chunk_size=4,
+                      dialect='sqlite'))
+    assert [len(df) for df in chunks] == [4, 4, 2]
+
+
+# Test export_table()
+def test_export_table_gzip_csv(sqlite_database, tmp_path):
+    file_path = tmp_path / 'data.csv.gz'
+    rows = db.export_table(host=None,
+                           database=sqlite_database,
+                           schema=None,
+                           table_name='data',
+                           file_path=file_path,
+                           file_format='csv',
+                           chunk_size=3,
+                           compression='gzip',
+                           dialect='sqlite')
+    assert rows == 10
+    assert len(pd.read_csv(file_path)) == 10
+
+
+export_table_input_error = {
+    'file format': ('txt', None),
+    'csv compression': ('csv', 'bz2'),
+}
+
+
+@pytest.mark.parametrize('file_format, compression',
+                         list(export_table_input_error.values()),
+                         ids=list(export_table_input_error.keys()))
+def test_export_table_input_error(sqlite_database, tmp_path, file_format,
+                                  compression):
+    with pytest.raises(exceptions.InputError):
+        db.export_table(host=None,
+                        database=sqlite_database,
+                        schema=None,
+                        table_name='data',
+                        file_path=tmp_path / f'data.{file_format}',
+                        file_format=file_format,
+                        compression=compression,
+                        dialect='sqlite')
+
+
+# Test export_table() with nulls appearing after the first chunk
+@pytest.mark.parametrize('file_format, read', [
+    ('feather', pd.read_feather),
+    ('parquet', pd.read_parquet),
+])
+def test_export_table_late_values(tmp_path, file_format, read):
+    database = str(tmp_path / 'nulls.db')
+    engine = sa.create_engine(f'sqlite:///{database}')
+    with engine.begin() as conn:
+        conn.execute(
+            sa.text('CREATE TABLE data '
+                    '(id INTEGER PRIMARY KEY, count INTEGER, note TEXT)'))
+        conn.execute(
+            sa.text('INSERT INTO data VALUES (:id, :count, :note)'),
+            [{'id': n, 'count': n if n < 3 else None,
+              'note': 'late' if n > 3 else None} for n in range(6)])
+    engine.dispose()
+    file_path = tmp_path / f'data.{file_format}'
+    rows = db.export_table(host=None,
+                           database=database,
+                           schema=None,
+                           table_name='data',
+                           file_path=file_path,
+                           file_format=file_format,
+                           chunk_size=2,
+                           dialect='sqlite')
+    assert rows == 6
+    df = read(file_path)
+    assert df['note'].tolist() == [None] * 4 + ['late'] * 2
+    assert df['count'].isna().sum() == 3
+
+
+# Test sql_table() with a shared connection
+def test_sql_table_connection(sqlite_database):
+    with db.Connect(database=sqlite_database, dialect='sqlite') as c:
+        for _ in range(2):
+            df = db.sql_table(host=None,
+                              database=sqlite_database,
+                              schema=None,
+                              table_name='data',
+                              dialect='sqlite',
+                              connection=c)
+            assert len(df) == 10
+        assert not c.conn.closed
+
+
+# Test sql_count()
+def test_sql_count(sqlite_database):
+    assert db.sql_count(host=None,
+                        database=sqlite_database,
+                        schema=None,
+                        table_name='data',
+                        dialect='sqlite') == 10
+
+
+# Test sql_page()
+sql_page = {
+    'first page': (None, None, [0, 1, 2, 3], ['id', 'category', 'value']),
+    'columns': (3, 'value', [4, 5, 6, 7], ['id', 'value']),
+    'last page': (7, None, [8, 9], ['id', 'category', 'value']),
+    'past end': (9, None, [], ['id', 'category', 'value']),
+}
+
+
+@pytest.mark.parametrize('after, columns, expected_ids, expected_columns',
+                         list(sql_page.values()),
+                         ids=list(sql_page.keys()))
+def test_sql_page(sqlite_database, after, columns, expected_ids,
+                  expected_columns):
+    df = db.sql_page(host=None,
+                     database=sqlite_database,
+                     schema=None,
+                     table_name='data',
+                     key='id',
+                     after=after,
+                     limit=4,
+                     columns=columns,
+                     dialect='sqlite')
+    assert df['id'].tolist() == expected_ids
+    assert df.columns.tolist() == expected_columns
+
+
+SLOW_QUERY = ('WITH RECURSIVE c(x) AS '
+              '(SELECT 1 UNION ALL SELECT x + 1 FROM c) '
+              'SELECT count(*) AS n FROM (SELECT x FROM c LIMIT 1000000000)')
+
+
+def slow_query(session, table):
+    return sa.text(SLOW_QUERY)
+
+
+# Test sql_data() timeout
+def test_sql_data_timeout(sqlite_database):
+    db.reset_query_stats()
+    with pytest.raises(exceptions.QueryTimeoutError):
+        db.sql_data(host=None,
+                    database=sqlite_database,
+                    schema=None,
+                    table_name='data',
+                    query=slow_query,
+                    dialect='sqlite',
+                    timeout=0.05)
+    df = db.sql_table(host=None,
+                      database=sqlite_database,
+                      schema=None,
+                      table_name='data',
+                      dialect='sqlite',
+                      timeout=10)
+    assert len(df) == 10
+    stats = db.query_stats()
+    assert stats.loc['sql_data', 'timeouts'] == 1
+    assert stats.loc['sql_table', 'timeouts'] == 0
+
+
+# Test CancelToken with sql_data()
+def test_cancel_token(sqlite_database):
+    db.reset_query_stats()
+    token = db.CancelToken()
+    timer = threading.Timer(0.05, token.cancel)
+    timer.start()
+    with pytest.raises(exceptions.QueryCancelledError) as e:
+        db.sql_data(host=None,
+                    database=sqlite_database,
+                    schema=None,
+                    table_name='data',
+                    query=slow_query,
+                    dialect='sqlite',
+                    token=token)
+    timer.join()
+    assert not isinstance(e.value, exceptions.QueryTimeoutError)
+    assert repr(token) == '<CancelToken(cancelled=True)>'
+    with pytest.raises(exceptions.QueryCancelledError):
+        db.sql_table(host=None,
+                     database=sqlite_database,
+                     schema=None,
+                     table_name='data',
+                     dialect='sqlite',
+                     token=token)
+    assert db.query_stats()['cancelled'].sum() == 2
+
+
+# Test CancelToken with sql_chunks()
+def test_cancel_token_chunks(sqlite_database):
+    token = db.CancelToken()
+    chunks = db.sql_chunks(host=None,
+                           database=sqlite_database,
+                           schema=None,
+                           table_name='data',
+                           chunk_size=4,
+                           dialect='sqlite',
+                           token=token)
+    assert len(next(chunks)) == 4
+    token.cancel()
+    with pytest.raises(exceptions.QueryCancelledError):
+        next(chunks)
+
+
+def value_query(session, table):
+    return sa.select(table.c['id']).where(table.c['value'] > 0.5)
+
+
+slow_query_log = {
+    'explained': (0, 1, True),
+    'not sampled': (0, 0, False),
+}
+
+
+# Test SlowQueryLog with sql_data()
+@pytest.mark.parametrize('threshold, sample_rate, explained',
+                         list(slow_query_log.values()),
+                         ids=list(slow_query_log.keys()))
+def test_slow_query_log(sqlite_database, monkeypatch, threshold, sample_rate,
+                        explained):
+    log = db.SlowQueryLog(threshold=threshold, sample_rate=sample_rate)
+    monkeypatch.setattr(db, 'slow_queries', log)
+    db.sql_data(host=None,
+                database=sqlite_database,
+                schema=None,
+                table_name='data',
+                query=value_query,
+                dialect='sqlite')
+    entry, = log.entries()
+    assert entry['function'] == 'sql_data'
+    assert entry['rows'] == 4
+    assert 'WHERE data.value > ?' in entry['statement']
+    assert (entry['plan'] is not None) is explained
+    if explained:
+        assert 'SCAN data' in entry['plan'][0]['detail']
+
+
+def in_query(session, table):
+    return sa.select(table.c['id']).where(table.c['category'].in_([0, 2]))
+
+
+def test_slow_query_log_in(sqlite_database, monkeypatch):
+    log = db.SlowQueryLog(threshold=0, sample_rate=1)
+    monkeypatch.setattr(db, 'slow_queries', log)
+    kwargs = {
+        'host': None,
+        'database': sqlite_database,
+        'schema': None,
+        'table_name': 'data',
+        'dialect': 'sqlite',
+    }
+    df = db.sql_data(query=in_query, **kwargs)
+    entry, = log.entries()
+    assert entry['rows'] == len(df) == 7
+    assert 'IN (?, ?)' in entry['statement']
+    assert 'SCAN data' in entry['plan'][0]['detail']
+
+    def in_query_3(session, table):
+        return sa.select(table.c['id']) \
+            .where(table.c['category'].in_([0, 1, 2]))
+
+    db.sql_data(query=in_query_3, **kwargs)
+    assert log.entries()[1]['fingerprint'] == entry['fingerprint']
+
+
+# Test SlowQueryLog disabled and bounded
+def test_slow_query_log_bounded(sqlite_database, monkeypatch):
+    log = db.SlowQueryLog(threshold=None, size=2)
+    monkeypatch.setattr(db, 'slow_queries', log)
+    kwargs = {
+        'host': None,
+        'database': sqlite_database,
+        'schema': None,
+        'table_name': 'data',
+        'query': value_query,
+        'dialect': 'sqlite',
+    }
+    db.sql_data(**kwargs)
+    assert len(log) == 0
+    log.threshold = 0
+    for _ in range(3):
+        db.sql_data(**kwargs)
+    assert len(log) == 2
+    assert repr(log) == ('<SlowQueryLog(threshold=0, sample_rate=1.0, '
+                         'size=2)>')
+    log.clear()
+    assert log.entries() == []
+
+
+# Test SlowQueryLog.fingerprint()
+def test_slow_query_fingerprint():
+    fingerprint = db.SlowQueryLog.fingerprint
+    assert (fingerprint("SELECT a FROM t WHERE b = 1 AND c = 'x'") ==
+            fingerprint("select a  FROM t\nWHERE b = 22 AND c = 'it''s'"))
+    assert fingerprint('SELECT a FROM t') != fingerprint('SELECT b FROM t')
+
+
+aggregate = {
+    'grouped': (
+        'category',
+        {'value': 'sum', 'id': ['count', 'max']},
+        None,
+        lambda df: df.groupby('category').agg(
+            value=('value', 'sum'), id_count=('id', 'count'),
+            id_max=('id', 'max')),
+    ),
+    'where values': (
+        None,
+        {'id': 'nunique', 'value': 'mean'},
+        {'category': (0, 1)},
+        lambda df: df[df['category'].isin((0, 1))].agg(
+            {'id': 'nunique', 'value': 'mean'}).to_frame().T,
+    ),
+    'where callable': (
+        ['category'],
+        {'value': 'min'},
+        lambda table: table.c['id'] > 4,
+        lambda df: df[df['id'] > 4].groupby('category').agg(
+            {'value': 'min'}),
+    ),
+}
+
+
+# Test sql_aggregate()
+@pytest.mark.parametrize('group_by, aggs, where, expected',
+                         list(aggregate.values()),
+                         ids=list(aggregate.keys()))
+def test_sql_aggregate(sqlite_database, group_by, aggs, where, expected):
+    df = db.sql_aggregate(host=None,
+                          database=sqlite_database,
+                          schema=None,
+                          table_name='data',
+                          aggs=aggs,
+                          group_by=group_by,
+                          where=where,
+                          dialect='sqlite')
+    data = db.sql_table(host=None,
+                        database=sqlite_database,
+                        schema=None,
+                        table_name='data',
+                        dialect='sqlite')
+    pd.testing.assert_frame_equal(df,
+                                  expected(data),
+                                  check_dtype=False,
+                                  check_index_type=False)
+
+
+# Test sql_aggregate() invalid input
+@pytest.mark.parametrize('aggs', [{'value': 'median'}, {'missing': 'sum'}])
+def test_sql_aggregate_input_error(sqlite_database, aggs):
+    with pytest.raises(exceptions.InputError):
+        db.sql_aggregate(host=None,
+                         database=sqlite_database,
+                         schema=None,
+                         table_name='data',
+                         aggs=aggs,
+                         dialect='sqlite')
+
+
+def wait_for_waiters(flight, key, waiters):
+    deadline = time.monotonic() + 5
+    while flight._calls[key].waiters < waiters:
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+# Test SingleFlight.do()
+def test_single_flight():
+    flight = db.SingleFlight(share=list)
+    release = threading.Event()
+    calls = []
+
+    def load(value):
+        calls.append(value)
+        release.wait(5)
+        return [value]
+
+    with cf.ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(flight.do, 'key', load, 1)]
+        while 'key' not in flight._calls:
+            time.sleep(0.001)
+        futures += [
+            executor.submit(flight.do, 'key', load, 2) for _ in range(3)
+        ]
+        wait_for_waiters(flight, 'key', 3)
+        assert repr(flight) == '<SingleFlight(in_flight=1)>'
+        release.set()
+        results = [f.result() for f in futures]
+    assert calls == [1]
+    assert results == [([1], False)] + [([1], True)] * 3
+    assert len({id(result) for result, _ in results}) == 4
+    assert repr(flight) == '<SingleFlight(in_flight=0)>'
+
+
+# Test SingleFlight.do() shares exceptions
+def test_single_flight_exception():
+    flight = db.SingleFlight()
+    release = threading.Event()
+
+    def fail():
+        release.wait(5)
+        raise ValueError('failed')
+
+    with cf.ThreadPoolExecutor(max_workers=3) as executor:
+        futures = [executor.submit(flight.do, 'key', fail)]
+        while 'key' not in flight._calls:
+            time.sleep(0.001)
+        futures += [executor.submit(flight.do, 'key', fail) for _ in range(2)]
+        wait_for_waiters(flight, 'key', 2)
+        release.set()
+        for future in futures:
+            with pytest.raises(ValueError):
+                future.result()
+
+
+# Test SingleFlight.do_async() with threaded callers
+def test_single_flight_async():
+    flight = db.SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def load():
+        calls.append(None)
+        release.wait(5)
+        return 'result'
+
+    async def main():
+        tasks = [
+            asyncio.ensure_future(flight.do_async('key', load))
+            for _ in range(10)
+        ]
+        await asyncio.sleep(0)
+        loop = asyncio.get_running_loop()
+        thread = loop.run_in_executor(None, flight.do, 'key', load)
+        await loop.run_in_executor(None, wait_for_waiters, flight, 'key', 10)
+        release.set()
+        return await asyncio.gather(*tasks, thread)
+
+    results = asyncio.run(main())
+    assert calls == [None]
+    coalesced = sorted(coalesced for _, coalesced in results)
+    assert coalesced == [False] + [True] * 10
+    assert {result for result, _ in results} == {'result'}
+
+
+# Test sql_table() and sql_table_async() coalescing
+def test_sql_table_coalesced(sqlite_database, monkeypatch):
+    db.reset_query_stats()
+    release = threading.Event()
+    sql_table = db._sql_table
+
+    def blocked(*args):
+        release.wait(5)
+        return sql_table(*args)
+
+    monkeypatch.setattr(db, '_sql_table', blocked)
+    kwargs = {
+        'host': None,
+        'database': sqlite_database,
+        'schema': None,
+        'table_name': 'data',
+        'dialect': 'sqlite',
+    }
+
+    async def main():
+        tasks = [
+            asyncio.ensure_future(db.sql_table_async(**kwargs))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0)
+        key = next(iter(db.in_flight._calls))
+        loop = asyncio.get_running_loop()
+        thread = loop.run_in_executor(None,
+                                      lambda: db.sql_table(**kwargs))
+        await loop.run_in_executor(None, wait_for_waiters, db.in_flight, key,
+                                   3)
+        release.set()
+        return await asyncio.gather(*tasks, thread)
+
+    frames = asyncio.run(main())
+    assert all(len(df) == 10 for df in frames)
+    assert len({id(df) for df in frames}) == 4
+    stats = db.query_stats().loc['sql_table']
+    assert stats['calls'] == 1
+    assert stats['coalesced'] == 3
+
+
+# Test sql_data() and sql_data_async() coalescing
+def test_sql_data_coalesced(sqlite_database, monkeypatch):
+    db.reset_query_stats()
+    release = threading.Event()
+    connect = db._connect
+    connections = []
+
+    @contextlib.contextmanager
+    def blocked(*args):
+        connections.append(None)
+        release.wait(5)
+        with connect(*args) as c:
+            yield c
+
+    monkeypatch.setattr(db, '_connect', blocked)
+    kwargs = {
+        'host': None,
+        'database': sqlite_database,
+        'schema': None,
+        'table_name': 'data',
+        'query': value_query,
+        'dialect': 'sqlite',
+    }
+
+    async def main():
+        tasks = [
+            asyncio.ensure_future(db.sql_data_async(**kwargs))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0)
+        key = next(iter(db.in_flight._calls))
+        loop = asyncio.get_running_loop()
+        thread = loop.run_in_executor(None, lambda: db.sql_data(**kwargs))
+        await loop.run_in_executor(None, wait_for_waiters, db.in_flight, key,
+                                   3)
+        release.set()
+        return await asyncio.gather(*tasks, thread)
+
+    frames = asyncio.run(main())
+    assert all(len(df) == 4 for df in frames)
+    assert connections == [None]
+    stats = db.query_stats().loc['sql_data']
+    assert stats['calls'] == 1
+    assert stats['coalesced'] == 3
+
+
+# Test _table_key()
+def test_table_key_columns():
+    args = (None, 'db', None, 'data')
+    key = db._table_key(*args, 'ab', None, 'sqlite', None, None, None)
+    assert key != db._table_key(*args, ['a', 'b'], None, 'sqlite', None,
+                                None, None)
+    assert key == db._table_key(*args, ['ab'], None, 'sqlite', None, None,
+                                None)
+
+
+# Test _data_key() and _table_key() with shared connections
+def test_call_keys_connection(sqlite_database, tmp_path):
+    with db.Connect(database=sqlite_database, dialect='sqlite') as first, \
+            db.Connect(database=str(tmp_path / 'other.db'),
+                       dialect='sqlite') as second:
+        data_keys = {
+            db._data_key(None, None, None, 'data', value_query, 'sqlite', c,
+                         None, None)
+            for c in (first, second, None)
+        }
+        table_keys = {
+            db._table_key(None, None, None, 'data', None, None, 'sqlite', c,
+                          None, None)
+            for c in (first, second, None)
+        }
+    assert len(data_keys) == len(table_keys) == 3
@@ -0,0 +1,320 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+""" Docker Configuration Unit Tests
+
+"""
+import gzip
+import shutil
+
+import pytest
+import yaml
+
+from .. import exceptions
+from ..pkg_globals import PACKAGE_ROOT
+
+GB = 2**30
+
+
+@pytest.fixture
+def config(docker_config, tmp_path):
+    filepath = tmp_path / 'docker-compose.yaml'
+    shutil.copy(PACKAGE_ROOT / 'docker' / 'docker-compose.yaml', filepath)
+    host = docker_config.HostSpecs(cpus=16, memory=64 * GB)
+    return docker_config.ComposeConfiguration(filepath=filepath, host=host)
+
+
+def parse_conf(text):
+    lines = (line.split(' = ', 1) for line in text.splitlines()
+             if ' = ' in line and not line.startswith('#'))
+    return {k: v for k, v in lines}
+
+
+def parse_bytes(size):
+    return int(size[:-1]) * {'g': GB, 'm': 2**20}[size[-1]]
+
+
+# Test docker_bytes()
+docker_bytes = {
+    'gigabytes': (16 * GB, '16g'),
+    'megabytes': (1.5 * GB, '1536m'),
+    'round down': (2**20 + 1, '1m'),
+}
+
+
+@pytest.mark.parametrize('n_bytes, expected',
+                         list(docker_bytes.values()),
+                         ids=list(docker_bytes.keys()))
+def test_docker_bytes(docker_config, n_bytes, expected):
+    assert docker_config.docker_bytes(n_bytes) == expected
+
+
+# Test detect_host()
+def test_detect_host(docker_config):
+    host = docker_config.detect_host()
+    assert host.cpus >= 1
+    assert host.memory > 0
+
+
+# Test ComposeConfiguration.add_gpu()
+def test_add_gpu(config):
+    config.add_gpu()
+    py_service = config.config['services']['pyproject_starter_python']
+    assert py_service['shm_size'] == '16g'
+    assert py_service['ulimits']['memlock'] == -1
+
+
+def test_add_gpu_memory_limit(docker_config, config, monkeypatch):
+    shares = docker_config.RESOURCE_PROFILES['serve']['python']
+    monkeypatch.setitem(shares, 'shm', 0.5)
+    config.add_resource_profile('serve')
+    config.add_gpu()
+    py_service = config.config['services']['pyproject_starter_python']
+    assert py_service['shm_size'] == py_service['mem_limit'] == '13107m'
+
+
+# Test ComposeConfiguration.add_resource_profile()
+add_resource_profile = {
+    'batch': ('batch', '16', '36044m', '16g'),
+    'dev': ('dev', '12', '26214m', '6553m'),
+    'serve': ('serve', '8', '13107m', '3276m'),
+}
+
+
+@pytest.mark.parametrize('profile, cpus, mem_limit, shm_size',
+                         list(add_resource_profile.values()),
+                         ids=list(add_resource_profile.keys()))
+def test_add_resource_profile(config, profile, cpus, mem_limit, shm_size):
+    config.add_resource_profile(profile)
+    py_service = config.config['services']['pyproject_starter_python']
+    assert py_service['cpus'] == cpus
+    assert py_service['mem_limit'] == mem_limit
+    assert py_service['shm_size'] == shm_size
+    assert py_service['ulimits']['nofile']['soft'] == 65536
+
+
+def test_add_resource_profile_minimum(docker_config):
+    host = docker_config.HostSpecs(cpus=1, memory=GB)
+    config = docker_config.ComposeConfiguration(host=host)
+    config.add_resource_profile('serve')
+    nginx = config.config['services']['pyproject_starter_nginx']
+    assert nginx['cpus'] == '0.25'
+    assert nginx['mem_limit'] == '256m'
+
+
+add_resource_profile_write = {
+    'batch': ('batch', '16g'),
+    'serve': ('serve', '3276m'),
+}
+
+
+@pytest.mark.parametrize('profile, shm_size',
+                         list(add_resource_profile_write.values()),
+                         ids=list(add_resource_profile_write.keys()))
+def test_add_resource_profile_write(config, tmp_path, profile, shm_size):
+    config.add_resource_profile(profile)
+    config.add_gpu()
+    des = tmp_path / 'docker-compose.yaml'
+    config.write(des)
+    text = des.read_text()
+    assert '&id' not in text
+    py_service = yaml.safe_load(text)['services']['pyproject_starter_python']
+    assert py_service['shm_size'] == shm_size
+    assert py_service['build']['shm_size'] == shm_size
+
+
+def test_add_resource_profile_input_error(config):
+    with pytest.raises(exceptions.InputError):
+        config.add_resource_profile('invalid')
+
+
+# Test ComposeConfiguration.postgres_conf()
+postgres_conf = {
+    'batch': ('batch', '50', '3276MB', '8', '4'),
+    'dev': ('dev', '100', '2457MB', '4', '1'),
+    'serve': ('serve', '200', '4915MB', '8', '1'),
+}
+
+
+@pytest.mark.parametrize(
+    'profile, max_connections, shared_buffers, max_parallel_workers, '
+    'per_gather',
+    list(postgres_conf.values()),
+    ids=list(postgres_conf.keys()))
+def test_postgres_conf(config, profile, max_connections, shared_buffers,
+                       max_parallel_workers, per_gather):
+    config.add_resource_profile(profile)
+    conf = parse_conf(config.postgres_conf())
+    assert conf['listen_addresses'] == "'*'"
+    assert conf['max_connections'] == max_connections
+    assert conf['shared_buffers'] == shared_buffers
+    assert conf['max_parallel_workers'] == max_parallel_workers
+    assert conf['max_parallel_workers_per_gather'] == per_gather
+    assert int(conf['work_mem'].rstrip('kB')) >= 4096
+
+
+def test_postgres_conf_pgbouncer(docker_config, config):
+    config.add_service(docker_config.ComposeService.POSTGRES)
+    config.add_service(docker_config.ComposeService.PGBOUNCER)
+    conf = parse_conf(config.postgres_conf())
+    ini = parse_conf(config.pgbouncer_ini())
+    pool_size = int(ini['default_pool_size']) + int(ini['reserve_pool_size'])
+    assert int(conf['max_connections']) >= pool_size
+
+
+# Test ComposeConfiguration.pgbouncer_ini()
+def test_pgbouncer_ini(docker_config, config):
+    config.add_service(docker_config.ComposeService.PGBOUNCER)
+    ini = config.pgbouncer_ini()
+    assert '* = host=pyproject_starter_postgres port=5432' in ini
+    settings = parse_conf(ini)
+    assert settings['pool_mode'] == 'transaction'
+    assert settings['default_pool_size'] == '8'
+    py_service = config.config['services']['pyproject_starter_python']
+    assert 'DB_HOST=pyproject_starter_pgbouncer' in py_service['environment']
+    assert 'DB_PORT=6432' in py_service['environment']
+
+
+def test_pgbouncer_without_postgres(docker_config, config):
+    config.add_service(docker_config.ComposeService.PGBOUNCER)
+    pgbouncer = config.config['services']['pyproject_starter_pgbouncer']
+    assert 'depends_on' not in pgbouncer
+
+
+add_service_pgbouncer = {
+    'pgbouncer first': ('PGBOUNCER', 'POSTGRES', 'STREAMLIT'),
+    'pgbouncer last': ('STREAMLIT', 'POSTGRES', 'PGBOUNCER'),
+    'repeated': ('POSTGRES', 'PGBOUNCER', 'STREAMLIT', 'PGBOUNCER'),
+}
+
+
+@pytest.mark.parametrize('services',
+                         list(add_service_pgbouncer.values()),
+                         ids=list(add_service_pgbouncer.keys()))
+def test_add_service_pgbouncer(docker_config, config, services):
+    for name in services:
+        config.add_service(docker_config.ComposeService[name])
+    services = config.config['services']
+    assert services['pyproject_starter_pgbouncer']['depends_on'] == \
+        ['pyproject_starter_postgres']
+    assert set(services['pyproject_starter_streamlit']['secrets']) == \
+        {'db-database', 'db-password', 'db-username'}
+    assert 'db-password' in config.config['secrets']
+    streamlit = services['pyproject_starter_streamlit']['environment']
+    assert streamlit['DB_HOST'] == 'pyproject_starter_pgbouncer'
+    assert streamlit['DB_PORT'] == '6432'
+    py_service = services['pyproject_starter_python']
+    assert py_service['environment'].count(
+        'DB_HOST=pyproject_starter_pgbouncer') == 1
+    assert py_service['environment'].count('DB_PORT=6432') == 1
+    assert py_service['depends_on'].count('pyproject_starter_pgbouncer') == 1
+
+
+# Test ComposeConfiguration.write()
+def test_write_service_files(docker_config, config, tmp_path):
+    config.add_service(docker_config.ComposeService.POSTGRES)
+    config.add_service(docker_config.ComposeService.PGBOUNCER)
+    des = tmp_path / 'output' / 'docker-compose.yaml'
+    des.parent.mkdir()
+    config.write(des)
+    with open(des, 'r') as f:
+        services = yaml.safe_load(f)['services']
+    postgres = services['pyproject_starter_postgres']
+    assert postgres['command'].endswith(docker_config.POSTGRES_CONF)
+    assert (f'./postgres/postgresql.conf:{docker_config.POSTGRES_CONF}:ro'
+            in postgres['volumes'])
+    assert (des.parent / 'postgres' / 'postgresql.conf').read_text() == \
+        config.postgres_conf()
+    assert (des.parent / 'pgbouncer' / 'pgbouncer.ini').read_text() == \
+        config.pgbouncer_ini()
+    nginx = services['pyproject_starter_nginx']
+    assert f'./nginx/nginx.conf:{docker_config.NGINX_CONF}:ro' in \
+        nginx['volumes']
+    assert (des.parent / 'nginx' / 'nginx.conf').read_text() == \
+        config.nginx_conf()
+
+
+# Test ComposeConfiguration.nginx_conf()
+nginx_conf = {
+    'batch': ('batch', 'worker_processes 2;'),
+    'serve': ('serve', 'worker_processes 4;'),
+}
+
+
+@pytest.mark.parametrize('profile, workers',
+                         list(nginx_conf.values()),
+                         ids=list(nginx_conf.keys()))
+def test_nginx_conf(config, profile, workers):
+    config.add_resource_profile(profile)
+    conf = config.nginx_conf()
+    assert workers in conf
+    for directive in ('gzip on;', 'gzip_static on;', 'sendfile on;',
+                      'tcp_nopush on;', 'open_file_cache max=2000'):
+        assert directive in conf
+    assert "default 'public, max-age=31536000, immutable';" in conf
+    assert conf.count('{') == conf.count('}')
+
+
+# Test compress_static()
+def test_compress_static(compress_static, tmp_path):
+    static_dir = tmp_path / '_static'
+    static_dir.mkdir()
+    (static_dir / 'basic.css').write_text('body { margin: 0; }\n' * 100)
+    (static_dir / 'small.js').write_text('let x = 1;\n')
+    (static_dir / 'logo.png').write_bytes(b'\x89PNG' * 1000)
+
+    written = compress_static.compress_static(tmp_path)
+    assert written == [static_dir / 'basic.css.gz']
+    assert gzip.decompress(written[0].read_bytes()).decode() == \
+        (static_dir / 'basic.css').read_text()
+    assert compress_static.compress_static(tmp_path) == []
+
+
+# Test ComposeConfiguration.add_service()
+def test_add_service_ray(docker_config, config):
+    config.add_service(docker_config.ComposeService.RAY)
+    config.add_resource_profile('batch')
+    services = config.config['services']
+    head = services['pyproject_starter_ray']
+    assert '--head' in head['command']
+    assert '--num-cpus=0' in head['command']
+
+    workers = [services[f'pyproject_starter_ray_worker_{n}'] for n in (1, 2)]
+    memory = int(0.55 * 0.8 * 64 * GB / 2)
+    object_store = int(memory * docker_config.RAY_OBJECT_STORE_FRACTION)
+    for worker in workers:
+        assert worker['cpus'] == '8'
+        assert worker['mem_limit'] == docker_config.docker_bytes(memory)
+        assert worker['networks'] == ['pyproject_starter-network']
+        assert '--address=pyproject_starter_ray:6379' in worker['command']
+        assert f'--object-store-memory={object_store}' in worker['command']
+        assert worker['shm_size'] == docker_config.docker_bytes(
+            object_store + docker_config.MIN_MEMORY)
+    py_service = services['pyproject_starter_python']
+    assert 'RAY_ADDRESS=pyproject_starter_ray:6379' in \
+        py_service['environment']
+    assert py_service['mem_limit'] == \
+        docker_config.docker_bytes(0.55 * 0.15 * 64 * GB)
+
+
+@pytest.mark.parametrize('profile', ['batch', 'dev', 'serve'])
+def test_add_service_ray_memory(docker_config, config, profile):
+    config.add_resource_profile(profile)
+    config.add_service(docker_config.ComposeService.RAY)
+    services = config.config['services']
+    memory = sum(
+        parse_bytes(service['mem_limit']) for service in services.values()
+        if 'mem_limit' in service)
+    assert memory <= 64 * GB
+
+
+def test_remove_service_ray(docker_config, config):
+    config.add_resource_profile('batch')
+    py_service = config.config['services']['pyproject_starter_python']
+    mem_limit = py_service['mem_limit']
+    config.add_service(docker_config.ComposeService.RAY)
+    config.remove_service(docker_config.ComposeService.RAY)
+    assert not any('ray' in name for name in config.config['services'])
+    assert not any(v.startswith('RAY_ADDRESS=')
+                   for v in py_service['environment'])
+    assert 'pyproject_starter_ray' not in py_service.get('depends_on', [])
+    assert py_service['mem_limit'] == mem_limit
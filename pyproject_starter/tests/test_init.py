@@ -0,0 +1,46 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+""" Package Import Unit Tests
+
+"""
+import subprocess
+import sys
+
+import pytest
+
+from .. import pkg_globals
+
+HEAVY_MODULES = ('matplotlib', 'numpy', 'pandas', 'ray')
+IMPORT_BUDGET = 0.5
+
+
+def run_python(code: str) -> str:
+    return subprocess.run([sys.executable, '-c', code],
+                          capture_output=True,
+                          check=True,
+                          text=True).stdout
+
+
+# Test import pyproject_starter
+def test_import_budget():
+    code = ('import time\n'
+            'start = time.perf_counter()\n'
+            'import pyproject_starter\n'
+            'print(time.perf_counter() - start)\n')
+    assert float(run_python(code)) < IMPORT_BUDGET
+
+
+@pytest.mark.parametrize('module', HEAVY_MODULES)
+def test_import_lazy(module):
+    code = f'import sys, pyproject_starter; print({module!r} in sys.modules)'
+    assert run_python(code).strip() == 'False'
+
+
+def test_import_submodule():
+    code = 'import pyproject_starter; print(pyproject_starter.exceptions)'
+    assert 'pyproject_starter.exceptions' in run_python(code)
+
+
+# Test pkg_globals.NVIDIA_NGC_BASE_IMAGE
+def test_nvidia_ngc_base_image():
+    assert pkg_globals.NVIDIA_NGC_BASE_IMAGE.startswith('nvcr.io')
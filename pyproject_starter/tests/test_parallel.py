@@ -0,0 +1,196 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+""" Parallel Execution Unit Tests
+
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytest
+
+from .. import exceptions
+from .. import parallel
+
+
+def offset_square(x, offset=0):
+    return x**2 + offset
+
+
+def shared_sum(descriptor):
+    return float(parallel.SharedArray.attach(descriptor).sum())
+
+
+def shared_index(x, arr):
+    return arr[x]
+
+
+def shared_writeable(x, arr):
+    return arr.flags.writeable
+
+
+@pytest.fixture(scope='module')
+def ray_cluster():
+    ray = pytest.importorskip('ray')
+    ray.init(num_cpus=2, include_dashboard=False, log_to_driver=False)
+    yield ray
+    ray.shutdown()
+
+
+# Test SharedArray()
+def test_shared_array_attach():
+    arr = np.arange(12, dtype=np.float32).reshape(3, 4)
+    with parallel.SharedArray(arr) as shared:
+        attached = parallel.SharedArray.attach(shared.descriptor)
+        assert np.array_equal(attached, arr)
+        assert not attached.flags.writeable
+        del attached
+        parallel.SharedArray.detach(shared.descriptor)
+    assert shared.refs == 0
+    with pytest.raises(FileNotFoundError):
+        parallel.SharedArray.attach(shared.descriptor)
+
+
+def test_shared_array_writeable():
+    with parallel.SharedArray(np.zeros(3), readonly=False) as shared:
+        attached = parallel.SharedArray.attach(shared.descriptor)
+        attached[1] = 5
+        assert shared.array[1] == 5
+        del attached
+
+
+def test_shared_array_refs():
+    shared = parallel.SharedArray(np.ones(3))
+    descriptor = shared.acquire()
+    shared.release()
+    assert shared.refs == 1
+    assert np.array_equal(parallel.SharedArray.attach(descriptor), np.ones(3))
+    parallel.SharedArray.detach(descriptor)
+    shared.release()
+    with pytest.raises(exceptions.InputError):
+        shared.acquire()
+
+
+def test_shared_array_release_exported(monkeypatch):
+    shared = parallel.SharedArray(np.ones(3))
+
+    def exported(descriptor):
+        raise BufferError('cannot close exported pointers exist')
+
+    monkeypatch.setattr(parallel.SharedArray, 'detach',
+                        staticmethod(exported))
+    with pytest.raises(BufferError):
+        shared.release()
+    assert shared.refs == 0
+    with pytest.raises(FileNotFoundError):
+        parallel.SharedArray.attach(shared.descriptor)
+
+
+def test_shared_array_process():
+    arr = np.arange(1000, dtype=np.int64)
+    with parallel.SharedArray(arr) as shared:
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            total = executor.submit(shared_sum, shared.descriptor).result()
+    assert total == arr.sum()
+
+
+def test_shared_array_input_error():
+    with pytest.raises(exceptions.InputError):
+        parallel.SharedArray(np.array([{}, []], dtype=object))
+
+
+# Test _auto_batch_size()
+auto_batch_size = {
+    'sized': (range(1000), 2, 125),
+    'small': (range(3), 8, 1),
+    'unsized': (iter(range(1000)), 2, parallel.DEFAULT_BATCH_SIZE),
+}
+
+
+@pytest.mark.parametrize('iterable, workers, expected',
+                         list(auto_batch_size.values()),
+                         ids=list(auto_batch_size.keys()))
+def test_auto_batch_size(iterable, workers, expected):
+    assert parallel._auto_batch_size(iterable, workers) == expected
+
+
+# Test _batches()
+def test_batches():
+    assert list(parallel._batches(range(5), 2)) == [[0, 1], [2, 3], [4]]
+
+
+# Test parallel_map()
+parallel_map = {
+    'process ordered': ('process', True),
+    'process unordered': ('process', False),
+    'ray fallback': ('ray', True),
+    'thread ordered': ('thread', True),
+    'thread unordered': ('thread', False),
+}
+
+
+@pytest.mark.parametrize('backend, ordered',
+                         list(parallel_map.values()),
+                         ids=list(parallel_map.keys()))
+def test_parallel_map(backend, ordered):
+    results = parallel.parallel_map(offset_square,
+                                    range(100),
+                                    backend=backend,
+                                    batch_size=7,
+                                    ordered=ordered,
+                                    max_workers=2,
+                                    offset=1)
+    results = list(results) if ordered else sorted(results)
+    assert results == [x**2 + 1 for x in range(100)]
+
+
+def test_parallel_map_array_thread():
+    arr = np.arange(10)
+    results = parallel.parallel_map(offset_square,
+                                    range(3),
+                                    backend='thread',
+                                    offset=arr)
+    assert all(np.array_equal(r, x**2 + arr) for x, r in enumerate(results))
+
+
+def test_parallel_map_shared_memory(monkeypatch):
+    monkeypatch.setattr(parallel, 'SHARED_MEMORY_THRESHOLD', 0)
+    arr = np.arange(100) * 2
+    results = parallel.parallel_map(shared_index,
+                                    range(100),
+                                    backend='process',
+                                    max_workers=2,
+                                    arr=arr)
+    assert list(results) == list(arr)
+
+
+def test_parallel_map_ray(ray_cluster, monkeypatch):
+    puts = []
+    put = ray_cluster.put
+    monkeypatch.setattr(ray_cluster, 'put',
+                        lambda value: puts.append(value) or put(value))
+    results = list(
+        parallel.parallel_map(shared_writeable,
+                              range(20),
+                              backend='ray',
+                              batch_size=1,
+                              arr=np.arange(100_000)))
+    assert len(results) == 20
+    # One copy of the kwargs is put in the object store and every task
+    # reads it zero-copy as an immutable view
+    assert len([p for p in puts if isinstance(p, dict)]) == 1
+    assert not any(results)
+
+
+parallel_map_input_error = {
+    'backend': {'backend': 'invalid'},
+    'zero batch size': {'batch_size': 0},
+    'negative batch size': {'batch_size': -1},
+}
+
+
+@pytest.mark.parametrize('kwargs',
+                         list(parallel_map_input_error.values()),
+                         ids=list(parallel_map_input_error.keys()))
+def test_parallel_map_input_error(kwargs):
+    with pytest.raises(exceptions.InputError):
+        parallel.parallel_map(offset_square, range(3), **kwargs)
@@ -0,0 +1,88 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+""" Plotting Unit Tests
+
+"""
+import matplotlib
+import numpy as np
+import pytest
+
+from .. import exceptions
+from .. import plots
+
+matplotlib.use('Agg')
+
+N_POINTS = 100_001
+X = np.arange(N_POINTS)
+Y = np.sin(X / 500) + np.where(X == 12_345, 10, 0)
+
+
+# Test lttb()
+def test_lttb():
+    idx = plots.lttb(X, Y, 500)
+    assert idx.size == 500
+    assert idx[0] == 0 and idx[-1] == N_POINTS - 1
+    assert np.all(np.diff(idx) > 0)
+    assert 12_345 in idx
+
+
+def test_lttb_datetime():
+    x = np.arange('2020-01-01', '2020-02-01', dtype='datetime64[h]')
+    idx = plots.lttb(x, np.arange(x.size), 10)
+    assert idx.size == 10
+
+
+def test_lttb_input_error():
+    with pytest.raises(exceptions.InputError):
+        plots.lttb(X, Y, 2)
+
+
+# Test minmax()
+def test_minmax():
+    idx = plots.minmax(Y, 1000)
+    assert idx.size <= 1002
+    assert Y[idx].max() == Y.max()
+    assert Y[idx].min() == Y.min()
+
+
+# Test downsample()
+downsample = {
+    'lttb': ('lttb', 1000),
+    'minmax': ('minmax', 1000),
+    'no reduction': ('lttb', N_POINTS + 1),
+}
+
+
+@pytest.mark.parametrize('method, n_out',
+                         list(downsample.values()),
+                         ids=list(downsample.keys()))
+def test_downsample(method, n_out):
+    x, y = plots.downsample(None, Y, n_out, method)
+    assert x.size == y.size <= min(n_out + 2, N_POINTS)
+    assert np.array_equal(Y[x], y)
+
+
+def test_downsample_input_error():
+    with pytest.raises(exceptions.InputError):
+        plots.downsample(X, Y, 100, 'invalid')
+
+
+# Test plot_series()
+def test_plot_series():
+    ax = plots.plot_series(X, Y)
+    width = ax.get_window_extent().width
+    assert ax.lines[0].get_xdata().size <= 2 * width + 2
+    ax.figure.clf()
+
+
+# Test plotly_series()
+def test_plotly_series():
+    fig = plots.plotly_series(X, Y, n_out=200, title='test')
+    assert fig.data[0].x.size <= 202
+    assert fig.layout.title.text == 'test'
+
+
+# Test save_series()
+def test_save_series(tmp_path):
+    file_path = plots.save_series(tmp_path / 'series.png', X, Y)
+    assert file_path.stat().st_size > 0
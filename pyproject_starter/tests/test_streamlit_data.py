@@ -0,0 +1,125 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+""" Streamlit Data Access Unit Tests
+
+"""
+import pytest
+import sqlalchemy as sa
+
+data = pytest.importorskip('applications.streamlit.data')
+
+
+@pytest.fixture
+def cleared():
+    data.clear_cache()
+    yield
+    data.clear_cache()
+
+
+# Test sql_table()
+def test_sql_table(cleared, sqlite_database):
+    kwargs = {
+        'host': None,
+        'database': sqlite_database,
+        'schema': None,
+        'table_name': 'data',
+        'dialect': 'sqlite',
+    }
+    for _ in range(3):
+        assert len(data.sql_table(**kwargs)) == 10
+    data.sql_table(columns=['value'], **kwargs)
+
+    stats = data.cache_stats().loc['sql_table']
+    assert stats['calls'] == 4
+    assert stats['misses'] == 2
+    assert stats['hit_rate'] == 0.5
+
+
+# Test clear_cache()
+def test_clear_cache(cleared, sqlite_database):
+    kwargs = {
+        'host': None,
+        'database': sqlite_database,
+        'schema': None,
+        'table_name': 'data',
+        'dialect': 'sqlite',
+    }
+    data.sql_table(**kwargs)
+    data.clear_cache('sql_table')
+    assert data.cache_stats().loc['sql_table', 'calls'] == 0
+    data.sql_table(**kwargs)
+    assert data.cache_stats().loc['sql_table', 'misses'] == 1
+
+
+# Test sql_aggregate()
+def test_sql_aggregate(cleared, sqlite_database):
+    kwargs = {
+        'host': None,
+        'database': sqlite_database,
+        'schema': None,
+        'table_name': 'data',
+        'aggs': {'id': 'count'},
+        'group_by': 'category',
+        'dialect': 'sqlite',
+    }
+    for _ in range(2):
+        df = data.sql_aggregate(**kwargs)
+        assert df['id'].tolist() == [4, 3, 3]
+    assert data.cache_stats().loc['sql_aggregate', 'misses'] == 1
+
+
+def test_sql_aggregate_where(cleared, sqlite_database):
+    kwargs = {
+        'host': None,
+        'database': sqlite_database,
+        'schema': None,
+        'table_name': 'data',
+        'aggs': {'id': 'count'},
+        'dialect': 'sqlite',
+    }
+    for _ in range(2):
+        df = data.sql_aggregate(where={'category': [0, 2]}, **kwargs)
+        assert df['id'].tolist() == [7]
+    df = data.sql_aggregate(where={'category': 1}, **kwargs)
+    assert df['id'].tolist() == [3]
+
+    stats = data.cache_stats().loc['sql_aggregate']
+    assert stats['calls'] == 3
+    assert stats['misses'] == 2
+
+
+# Test sql_data()
+def test_sql_data(cleared, sqlite_database):
+    kwargs = {
+        'host': None,
+        'database': sqlite_database,
+        'schema': None,
+        'table_name': 'data',
+        'dialect': 'sqlite',
+    }
+
+    def category(n):
+
+        def query(session, table):
+            return sa.select(table.c['id']).where(table.c['category'] == n)
+
+        return query
+
+    for _ in range(2):
+        assert len(data.sql_data(_query=category(0),
+                                 query_key='category=0',
+                                 **kwargs)) == 4
+    assert len(data.sql_data(_query=category(1),
+                             query_key='category=1',
+                             **kwargs)) == 3
+
+    stats = data.cache_stats().loc['sql_data']
+    assert stats['calls'] == 3
+    assert stats['misses'] == 2
+
+
+# Test connection()
+def test_connection(sqlite_database):
+    conn = data.connection(None, sqlite_database, 'sqlite')
+    assert conn.conn.closed
+    assert conn is data.connection(None, sqlite_database, 'sqlite')
@@ -0,0 +1,90 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+""" Streamlit Shared Dataset Unit Tests
+
+"""
+import itertools
+import threading
+
+import pytest
+
+datasets = pytest.importorskip('applications.streamlit.datasets')
+
+
+@pytest.fixture
+def refresher():
+    shared = datasets.DatasetRefresher(interval=60, tick=0.01)
+    yield shared
+    shared.stop()
+
+
+# Test DatasetRefresher.get()
+def test_get(refresher):
+    counter = itertools.count()
+    refresher.register('numbers', lambda: next(counter))
+    assert refresher.get('numbers', timeout=5) == 0
+    assert refresher.get('numbers') == 0
+    assert refresher.status()[0]['loads'] == 1
+
+
+def test_get_stale_while_revalidate(refresher):
+    release = threading.Event()
+    values = iter(['old', 'new'])
+
+    def loader():
+        value = next(values)
+        if value == 'new':
+            release.wait(5)
+        return value
+
+    refresher.register('data', loader, interval=0)
+    assert refresher.get('data', timeout=5) == 'old'
+    assert refresher.get('data') == 'old'
+    assert refresher.status()[0]['refreshing']
+    release.set()
+    refresher.refresh('data').result(5)
+    assert refresher.get('data') == 'new'
+
+
+def test_get_failed_refresh(refresher):
+    calls = itertools.count()
+
+    def loader():
+        if next(calls):
+            raise ValueError('unavailable')
+        return 'data'
+
+    refresher.register('data', loader)
+    assert refresher.get('data', timeout=5) == 'data'
+    with pytest.raises(ValueError):
+        refresher.refresh('data').result(5)
+    assert refresher.get('data') == 'data'
+    status = refresher.status()[0]
+    assert status['failures'] == 1
+    assert 'unavailable' in status['error']
+
+
+# Test DatasetRefresher.start()
+def test_start(refresher):
+    loaded = threading.Event()
+    counter = itertools.count()
+
+    def loader():
+        n = next(counter)
+        if n == 2:
+            loaded.set()
+        return n
+
+    refresher.register('numbers', loader, interval=0.01)
+    refresher.start()
+    assert loaded.wait(5)
+    assert refresher.get('numbers') >= 1
+
+
+# Test DatasetRefresher.warm()
+def test_warm(refresher):
+    refresher.register('a', lambda: 'a')
+    refresher.register('b', lambda: 'b')
+    assert len(refresher.warm()) == 2
+    assert all(s['loads'] == 1 for s in refresher.status())
+    assert refresher.warm() == []
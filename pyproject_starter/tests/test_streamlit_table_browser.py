@@ -0,0 +1,48 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+""" Streamlit Table Browser Unit Tests
+
+"""
+import pytest
+import sqlalchemy as sa
+
+from .. import db
+
+table_browser = pytest.importorskip(
+    'applications.streamlit.subpages.table_browser')
+
+
+@pytest.fixture
+def keyed_database(tmp_path):
+    database = str(tmp_path / 'keyed.db')
+    engine = sa.create_engine(f'sqlite:///{database}')
+    meta = sa.MetaData()
+    sa.Table('keyed', meta,
+             sa.Column('id', sa.Integer, primary_key=True),
+             sa.Column('email', sa.String(60), nullable=False, unique=True),
+             sa.Column('code', sa.String(8), nullable=False),
+             sa.Column('nickname', sa.String(16), unique=True),
+             sa.Column('name', sa.String(16)),
+             sa.Index('ix_keyed_code', 'code', unique=True),
+             sa.Index('ix_keyed_name', 'name'))
+    meta.create_all(engine)
+    engine.dispose()
+    return database
+
+
+# Test _key_columns()
+key_columns = {
+    'unique keys': ('keyed_database', 'keyed', ['id', 'email', 'code']),
+    'no keys': ('sqlite_database', 'data', []),
+}
+
+
+@pytest.mark.parametrize('fixture, table_name, expected',
+                         list(key_columns.values()),
+                         ids=list(key_columns.keys()))
+def test_key_columns(request, fixture, table_name, expected):
+    database = request.getfixturevalue(fixture)
+    with db.Connect(database=database, dialect='sqlite') as conn:
+        assert table_browser._key_columns(None, database, None, table_name,
+                                          'sqlite', conn) == expected
+        assert not conn.meta.tables
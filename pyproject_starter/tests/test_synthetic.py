@@ -0,0 +1,111 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+""" Synthetic Data Test Module
+
+"""
+import numpy as np
+import pandas as pd
+import pytest
+import sqlalchemy as sa
+
+from .. import synthetic
+from ..exceptions import InputError
+
+
+def chunks(n_users, prefs_per_user, seed, chunk_size):
+    frames = list(
+        synthetic.generate(n_users, prefs_per_user, seed, chunk_size))
+    return (pd.concat([u for u, _ in frames], ignore_index=True),
+            pd.concat([p for _, p in frames], ignore_index=True))
+
+
+# Test users()
+def test_users():
+    df = synthetic.users(np.arange(1, 101))
+    assert df['user_id'].tolist() == list(range(1, 101))
+    assert df['User_name'].is_unique
+    assert df['email_address'].str.contains('@').all()
+    assert (df['password'].str.len() == synthetic.PASSWORD_LENGTH).all()
+
+
+# Test prefs()
+def test_prefs():
+    df = synthetic.prefs(np.arange(11, 21), prefs_per_user=4)
+    assert df['pref_id'].tolist() == list(range(41, 81))
+    assert (df.groupby('user_id')['pref_name'].nunique() == 4).all()
+    for name, values in synthetic.PREFERENCES.items():
+        assert df.loc[df['pref_name'] == name, 'pref_value'].isin(values).all()
+
+
+# Test prefs() invalid number of preferences
+@pytest.mark.parametrize('prefs_per_user', [-1, 9])
+def test_prefs_invalid(prefs_per_user):
+    with pytest.raises(InputError):
+        synthetic.prefs(np.arange(1, 3), prefs_per_user)
+
+
+# Test generate()
+def test_generate():
+    users, prefs = chunks(25, 3, seed=1, chunk_size=10)
+    again_users, again_prefs = chunks(25, 3, seed=1, chunk_size=10)
+    other_users, _ = chunks(25, 3, seed=2, chunk_size=10)
+    assert len(users) == 25
+    assert len(prefs) == 75
+    assert users['user_id'].is_unique
+    assert prefs['pref_id'].is_unique
+    pd.testing.assert_frame_equal(users, again_users)
+    pd.testing.assert_frame_equal(prefs, again_prefs)
+    assert not users.equals(other_users)
+
+
+# Test load()
+def test_load(users_small):
+    n_users, prefs_per_user = synthetic.SIZES['small']
+    engine = sa.create_engine(f'sqlite:///{users_small}')
+    with engine.connect() as conn:
+        users = conn.execute(sa.text('SELECT COUNT(*) FROM user')).scalar()
+        prefs = conn.execute(
+            sa.text('SELECT COUNT(*) FROM user_pref')).scalar()
+        orphans = conn.execute(
+            sa.text('SELECT COUNT(*) FROM user_pref p '
+                    'LEFT JOIN user u ON p.user_id = u.user_id '
+                    'WHERE u.user_id IS NULL')).scalar()
+    assert users == n_users
+    assert prefs == n_users * prefs_per_user
+    assert orphans == 0
+
+
+# Test load() replaces existing tables
+def test_load_replace(tmp_path):
+    database = str(tmp_path / 'users.db')
+    synthetic.load(None, database, 20, dialect='sqlite')
+    with pytest.raises(InputError):
+        synthetic.load(None, database, 10, 2, dialect='sqlite')
+    assert synthetic.load(None, database, 10, 2, dialect='sqlite',
+                          replace=True) == (10, 20)
+
+
+# Test load() into a schema
+def test_load_schema(tmp_path):
+    database = str(tmp_path / 'users.db')
+    assert synthetic.load(None, database, 10, 2, schema='main',
+                          dialect='sqlite') == (10, 20)
+    engine = sa.create_engine(f'sqlite:///{database}')
+    with engine.connect() as conn:
+        emails = conn.execute(
+            sa.text('SELECT COUNT(email_address) FROM main.user')).scalar()
+    assert emails == 10
+
+
+# Test load() input error
+@pytest.mark.parametrize('prefs_per_user', [-1, 9])
+def test_load_invalid(tmp_path, prefs_per_user):
+    database = str(tmp_path / 'users.db')
+    synthetic.load(None, database, 10, dialect='sqlite')
+    with pytest.raises(InputError):
+        synthetic.load(None, database, 10, prefs_per_user, dialect='sqlite',
+                       replace=True)
+    engine = sa.create_engine(f'sqlite:///{database}')
+    with engine.connect() as conn:
+        users = conn.execute(sa.text('SELECT COUNT(*) FROM user')).scalar()
+    assert users == 10
@@ -0,0 +1,125 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+""" NVIDIA Tag Update Unit Tests
+
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+
+import pytest
+
+ETAG = '"v1"'
+TAGS = {
+    'pytorch': '24.01-py3',
+    'tensorflow': '24.01-tf2-py3',
+}
+
+
+class CatalogHandler(BaseHTTPRequestHandler):
+    """Stand-in for the NGC catalog supporting conditional requests."""
+    requests = []
+
+    def do_GET(self):
+        framework = self.path.strip('/')
+        self.requests.append((framework, self.headers.get('If-None-Match')))
+        if framework not in TAGS:
+            self.send_error(404)
+            return
+        if self.headers.get('If-None-Match') == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = (' ' * 100_000 +
+                f'{{"latestTag":"{TAGS[framework]}"}}').encode()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', ETAG)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def catalog():
+    CatalogHandler.requests = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), CatalogHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}/'
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def docker_dir(tmp_path):
+    path = tmp_path / 'docker'
+    path.mkdir()
+    (path / 'pytorch.Dockerfile').write_text(
+        'FROM nvcr.io/nvidia/pytorch:23.11-py3\n\nRUN echo\n')
+    (path / 'tensorflow.Dockerfile').write_text(
+        'FROM nvcr.io/nvidia/tensorflow:\n')
+    return path
+
+
+# Test fetch_tag()
+def test_fetch_tag(update_nvidia_tags, catalog):
+    entry = update_nvidia_tags.fetch_tag('pytorch', base_url=catalog)
+    assert entry == {
+        'etag': ETAG,
+        'last_modified': None,
+        'tag': TAGS['pytorch'],
+    }
+    assert update_nvidia_tags.fetch_tag('pytorch', entry,
+                                        base_url=catalog) is entry
+    assert CatalogHandler.requests[-1] == ('pytorch', ETAG)
+
+
+def test_fetch_tag_http_error(update_nvidia_tags, catalog):
+    with pytest.raises(OSError):
+        update_nvidia_tags.fetch_tag('unknown', base_url=catalog)
+
+
+# Test update_dockerfiles()
+def test_update_dockerfiles(update_nvidia_tags, catalog, docker_dir,
+                            tmp_path):
+    cache_file = tmp_path / 'cache' / 'tags.json'
+    kwargs = {
+        'base_url': catalog,
+        'cache_file': cache_file,
+        'docker_dir': docker_dir,
+    }
+    assert update_nvidia_tags.update_dockerfiles(**kwargs) == TAGS
+    assert (docker_dir / 'pytorch.Dockerfile').read_text() == \
+        f'FROM nvcr.io/nvidia/pytorch:{TAGS["pytorch"]}\n\nRUN echo\n'
+    assert update_nvidia_tags.load_cache(cache_file)['pytorch']['etag'] == \
+        ETAG
+
+    mtime = (docker_dir / 'pytorch.Dockerfile').stat().st_mtime_ns
+    assert update_nvidia_tags.update_dockerfiles(**kwargs) == {}
+    assert (docker_dir / 'pytorch.Dockerfile').stat().st_mtime_ns == mtime
+    assert all(etag == ETAG for _, etag in CatalogHandler.requests[2:])
+
+
+def test_update_dockerfiles_offline(update_nvidia_tags, docker_dir,
+                                    tmp_path):
+    cache_file = tmp_path / 'tags.json'
+    update_nvidia_tags.save_cache({'pytorch': {'tag': 'cached'}}, cache_file)
+    updated = update_nvidia_tags.update_dockerfiles(offline=True,
+                                                    cache_file=cache_file,
+                                                    docker_dir=docker_dir)
+    assert updated == {'pytorch': 'cached'}
+
+
+def test_update_dockerfiles_unreachable(update_nvidia_tags, docker_dir,
+                                        tmp_path):
+    cache_file = tmp_path / 'tags.json'
+    update_nvidia_tags.save_cache({'tensorflow': {'tag': 'cached'}},
+                                  cache_file)
+    updated = update_nvidia_tags.update_dockerfiles(
+        base_url='http://127.0.0.1:9/',
+        cache_file=cache_file,
+        docker_dir=docker_dir,
+        timeout=1)
+    assert updated == {'tensorflow': 'cached'}
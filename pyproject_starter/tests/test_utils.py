@@ -3,11 +3,21 @@
 """ Utilities Unit Tests
 
 """
+import json
 import logging
+import io
+import os
 from pathlib import Path
+import queue
+import subprocess
+import sys
+import threading
+import time
+import types
 import warnings
 
 import numpy as np
+import pandas as pd
 import pytest
 
 from .conftest import TEST_STRFTIME
@@ -17,6 +27,28 @@ from .. import utils
 
 LOGGER = logging.getLogger(__name__)
 
+# Test compile_path()
+compile_path = {
+    'first level': (['x'], 0),
+    'nested level': (['a', 'b', 'c'], 2),
+    'list index': (['l', 1], 4),
+    'missing': (['a', 'z'], -1),
+}
+
+
+@pytest.mark.parametrize('key_path, expected',
+                         list(compile_path.values()),
+                         ids=list(compile_path.keys()))
+def test_compile_path(key_path, expected):
+    sample_dict = {'a': {'b': {'c': 2}, 'y': 1}, 'l': [3, 4], 'x': 0}
+    assert utils.compile_path(key_path, default=-1)(sample_dict) == expected
+
+
+def test_compile_path_key_error():
+    with pytest.raises(KeyError):
+        utils.compile_path(['a', 'z'])({'a': {}})
+
+
 # Test docker_secret()
 docker_secret = {
     'package': ('package', 'pyproject_starter'),
@@ -34,6 +66,73 @@ def test_docker_secret_missing():
     assert utils.docker_secret('missing-secret') is None
 
 
+def test_docker_secret_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(utils, 'DOCKER_SECRETS_DIR', tmp_path)
+    secret = tmp_path / 'test-secret'
+    secret.write_text('first\n')
+    assert utils.docker_secret('test-secret') == 'first'
+    secret.write_text('rotated\n')
+    assert utils.docker_secret('test-secret') == 'rotated'
+    secret.unlink()
+    assert utils.docker_secret('test-secret') is None
+    utils.reload_secrets()
+
+
+# Test docker_secrets()
+def test_docker_secrets(monkeypatch, tmp_path):
+    monkeypatch.setattr(utils, 'DOCKER_SECRETS_DIR', tmp_path)
+    (tmp_path / 'user').write_text('name')
+    assert utils.docker_secrets('user', 'missing') == ('name', None)
+    utils.reload_secrets()
+
+
+# Test reload_secrets()
+def test_reload_secrets(monkeypatch, tmp_path):
+    monkeypatch.setattr(utils, 'DOCKER_SECRETS_DIR', tmp_path)
+    (tmp_path / 'user').write_text('name')
+    utils.docker_secret('user')
+    utils.reload_secrets()
+    assert not utils._secret_cache
+
+
+# Test extract_columns()
+def test_extract_columns():
+    records = [
+        {'a': {'b': 1}, 'x': 'r'},
+        {'a': {'b': 2}, 'x': 's'},
+        {'a': None, 'x': 't'},
+    ]
+    columns = {'b': ['a', 'b'], 'x': ['x']}
+    arrays = utils.extract_columns(records, columns, default=-1)
+    assert np.array_equal(arrays['b'], np.array([1, 2, -1]))
+    assert list(arrays['x']) == ['r', 's', 't']
+    df = utils.extract_columns(records, columns, as_frame=True)
+    assert list(df.columns) == ['b', 'x']
+    assert df['b'].isna().sum() == 1
+
+
+extract_columns_lists = {
+    'equal length': ([1, 2], [3, 4]),
+    'ragged': ([1, 2], [3]),
+}
+
+
+@pytest.mark.parametrize('first, second',
+                         list(extract_columns_lists.values()),
+                         ids=list(extract_columns_lists.keys()))
+def test_extract_columns_lists(first, second):
+    records = [{'a': {'b': first}}, {'a': {'b': second}}]
+    arrays = utils.extract_columns(records, {'b': ['a', 'b']})
+    assert arrays['b'].shape == (2, )
+    assert arrays['b'].dtype == object
+    assert arrays['b'].tolist() == [first, second]
+
+
+def test_extract_columns_empty():
+    arrays = utils.extract_columns([], {'b': ['a', 'b']})
+    assert arrays['b'].size == 0
+
+
 # Test logger_setup()
 logger_setup = {
     'default args': (None, Path('info.log')),
@@ -51,6 +150,235 @@ def test_logger_setup(patch_strftime, file_path, log_file):
     log_file.unlink()
 
 
+def test_logger_setup_async(tmp_path):
+    logger = utils.logger_setup(tmp_path / 'test', async_handlers=True)
+    assert isinstance(logger.handlers[0], utils.BoundedQueueHandler)
+    logger.info('queued message')
+    utils.logger_shutdown()
+    assert not any(isinstance(h, utils.BoundedQueueHandler)
+                   for h in logger.handlers)
+    logger.info('direct message')
+    log_file = next(tmp_path.glob('*.log'))
+    text = log_file.read_text()
+    assert 'queued message' in text
+    assert 'direct message' in text
+
+
+logger_shutdown_overflow = {
+    'count': ('count', True),
+    'drop': ('drop', False),
+}
+
+
+@pytest.mark.parametrize('overflow, reported',
+                         list(logger_shutdown_overflow.values()),
+                         ids=list(logger_shutdown_overflow.keys()))
+def test_logger_shutdown_overflow(tmp_path, overflow, reported):
+    logger = utils.logger_setup(tmp_path / 'test',
+                                async_handlers=True,
+                                overflow=overflow)
+    logger.handlers[0].dropped = 3
+    utils.logger_shutdown()
+    text = next(tmp_path.glob('*.log')).read_text()
+    assert ('Dropped log records: 3' in text) is reported
+
+
+@pytest.fixture
+def package_filters():
+    yield
+    for name in ('package', None):
+        for handler in logging.getLogger(name).handlers:
+            for log_filter in handler.filters[:]:
+                handler.removeFilter(log_filter)
+
+
+class RecordHandler(logging.Handler):
+
+    def __init__(self):
+        super(RecordHandler, self).__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def rate_limited():
+    limited_logger = logging.getLogger('test_rate_limit')
+    handler = RecordHandler()
+    handler.addFilter(utils.RateLimitFilter(rate=1, name='test_rate_limit'))
+    limited_logger.addHandler(handler)
+    limited_logger.propagate = False
+    yield limited_logger, handler
+    limited_logger.removeHandler(handler)
+    limited_logger.propagate = True
+
+
+def test_logger_setup_json(tmp_path, package_filters):
+    logger = utils.logger_setup(tmp_path / 'test',
+                                json_format=True,
+                                rate_limits={'package': 1})
+    logger.info('repeated %s', 'message', extra={'user': lambda: 'lazy'})
+    logging.getLogger('package.child').info('repeated %s', 'message')
+    logging.getLogger('package.child').info('repeated %s', 'message')
+    for handler in logger.handlers:
+        handler.flush()
+    lines = next(tmp_path.glob('*.log')).read_text().splitlines()
+    assert len(lines) == 2
+    assert json.loads(lines[1])['logger'] == 'package.child'
+    entry = json.loads(lines[0])
+    assert entry['message'] == 'repeated message'
+    assert entry['user'] == 'lazy'
+
+
+# Test JsonFormatter()
+def test_json_formatter():
+    record = logging.makeLogRecord({'msg': 'test %d', 'args': (1, )})
+    entry = json.loads(utils.JsonFormatter().format(record))
+    assert entry['message'] == 'test 1'
+
+
+# Test RateLimitFilter()
+def test_rate_limit_filter(rate_limited, monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(utils, 'time',
+                        types.SimpleNamespace(monotonic=lambda: clock[0]))
+    limited_logger, handler = rate_limited
+    child_logger = logging.getLogger('test_rate_limit.child')
+    for _ in range(4):
+        child_logger.warning('test')
+    clock[0] = 1.0
+    child_logger.warning('test')
+    assert len(handler.records) == 2
+    assert not hasattr(handler.records[0], 'suppressed')
+    assert handler.records[1].suppressed == 3
+
+
+def test_rate_limit_filter_shared():
+    log_filter = utils.RateLimitFilter(rate=1, name='package')
+    record = logging.makeLogRecord({'name': 'package.db', 'msg': 'test'})
+    assert log_filter.filter(record)
+    assert log_filter.filter(record)
+    other = logging.makeLogRecord({'name': 'other', 'msg': 'test'})
+    for _ in range(2):
+        assert log_filter.filter(other)
+
+
+# Test TextFormatter()
+def test_text_formatter():
+    record = logging.makeLogRecord({'msg': 'test', 'suppressed': 2})
+    assert utils.TextFormatter('%(message)s').format(record) == \
+        'test (2 similar messages suppressed)'
+
+
+# Test BoundedQueueHandler()
+def test_bounded_queue_handler():
+    handler = utils.BoundedQueueHandler(queue.Queue(maxsize=1), 'drop')
+    threads = [
+        threading.Thread(target=handler.handle,
+                         args=(logging.makeLogRecord({'msg': 'test'}), ))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert handler.dropped == 7
+
+
+def test_bounded_queue_handler_input_error():
+    with pytest.raises(exceptions.InputError):
+        utils.BoundedQueueHandler(queue.Queue(), 'invalid')
+
+
+# Test _stable_hash()
+def test_stable_hash_sets():
+    code = ('import hashlib\n'
+            'from pyproject_starter import utils\n'
+            'hasher = hashlib.sha256()\n'
+            "names = {'alpha', 'beta', 'gamma', 'delta'}\n"
+            "utils._stable_hash((names, frozenset(['x', 'y'])), hasher)\n"
+            'print(hasher.hexdigest())\n')
+    digests = {
+        subprocess.run([sys.executable, '-c', code],
+                       capture_output=True,
+                       check=True,
+                       env={**os.environ, 'PYTHONHASHSEED': seed},
+                       text=True).stdout
+        for seed in ('1', '2')
+    }
+    assert len(digests) == 1
+
+
+# Test memoize_to_disk()
+memoize_to_disk = {
+    'array': (lambda n: np.arange(n), np.ndarray),
+    'data frame': (lambda n: pd.DataFrame({'a': range(n)}), pd.DataFrame),
+    'object': (lambda n: {'n': list(range(n))}, dict),
+}
+
+
+@pytest.mark.parametrize('make_result, result_type',
+                         list(memoize_to_disk.values()),
+                         ids=list(memoize_to_disk.keys()))
+def test_memoize_to_disk(tmp_path, make_result, result_type):
+    calls = []
+
+    @utils.memoize_to_disk(cache_dir=tmp_path)
+    def foo(n):
+        calls.append(n)
+        return make_result(n)
+
+    first = foo(5)
+    second = foo(5)
+    foo(6)
+    assert calls == [5, 6]
+    assert isinstance(second, result_type)
+    if isinstance(first, pd.DataFrame):
+        pd.testing.assert_frame_equal(first, second)
+    elif isinstance(first, np.ndarray):
+        assert np.array_equal(first, second)
+        assert isinstance(second, np.memmap)
+    else:
+        assert first == second
+    foo.cache_clear()
+    foo(5)
+    assert calls == [5, 6, 5]
+
+
+def test_memoize_to_disk_unreadable(tmp_path):
+    calls = []
+
+    @utils.memoize_to_disk(cache_dir=tmp_path)
+    def foo(n):
+        calls.append(n)
+        return {'n': n}
+
+    foo(1)
+    path, = foo.cache_dir.glob('*.pkl')
+    path.with_suffix('.tmp123').write_bytes(b'partial')
+    assert foo(1) == {'n': 1}
+    path.write_bytes(b'corrupt')
+    assert foo(1) == {'n': 1}
+    assert foo(1) == {'n': 1}
+    assert calls == [1, 1]
+    assert path.with_suffix('.tmp123').exists()
+
+
+def test_memoize_to_disk_eviction(tmp_path):
+
+    @utils.memoize_to_disk(cache_dir=tmp_path, max_bytes=1500)
+    def foo(n):
+        return np.full(100, n, dtype=np.float64)
+
+    for n in range(3):
+        foo(n)
+        time.sleep(0.01)
+    files = list(foo.cache_dir.glob('*.npy'))
+    assert len(files) == 1
+    assert np.all(np.load(files[0]) == 2)
+
+
 # Test nested_get()
 nested_get = {
     'first level': (['x'], 0),
@@ -82,6 +410,62 @@ def test_nested_set(key_path, value):
     assert utils.nested_get(sample_dict, key_path) == value
 
 
+# Test Progress()
+def test_progress_iter():
+    stream = io.StringIO()
+    with utils.Progress(range(10), msg='Test', stream=stream) as progress:
+        items = list(progress)
+    assert items == list(range(10))
+    assert progress.count == 10
+    assert stream.getvalue().startswith('\rTest:  100.0%')
+    assert stream.getvalue().endswith('\n')
+
+
+def test_progress_throttle():
+    stream = io.StringIO()
+    progress = utils.Progress(total=100_000, max_redraws=1, stream=stream)
+    for _ in range(100_000):
+        progress.update()
+    assert stream.getvalue().count('\r') <= 2
+
+
+def test_progress_threads():
+    progress = utils.Progress(total=4000, stream=io.StringIO())
+
+    def work():
+        for _ in range(1000):
+            progress.update()
+
+    workers = [threading.Thread(target=work) for _ in range(4)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    assert progress.count == 4000
+
+
+def test_progress_eta():
+    progress = utils.Progress(total=100, stream=io.StringIO())
+    assert progress.eta is None
+    progress.count, progress.rate = 50, 10.0
+    assert progress.eta == 5.0
+    assert 'ETA 0:00:05' in str(progress)
+
+
+def test_progress_total_exceeded():
+    stream = io.StringIO()
+    progress = utils.Progress(total=2, max_redraws=1e9, stream=stream)
+    for _ in range(3):
+        progress.update()
+    assert stream.getvalue().endswith(
+        f'\rProgress: 3 | {progress.rate:0.4g} it/s | ETA 0:00:00')
+
+
+def test_progress_iter_input_error():
+    with pytest.raises(exceptions.InputError):
+        list(utils.Progress(total=10))
+
+
 # Test progress_str()
 progress_str = {
     '0%': (0, 100, '\rProgress:  0.0%'),
@@ -106,6 +490,28 @@ def test_progress_str_input_error():
         utils.progress_str(100, 50)
 
 
+# Test ray_init()
+ray_init = {
+    'argument': ('head:6379', None, {'address': 'head:6379'}),
+    'environment': (None, 'head:6379', {'address': 'head:6379'}),
+    'local': (None, None, {'dashboard_host': '0.0.0.0',
+                           'dashboard_port': 8265}),
+}
+
+
+@pytest.mark.parametrize('address, env, expected',
+                         list(ray_init.values()),
+                         ids=list(ray_init.keys()))
+def test_ray_init(monkeypatch, address, env, expected):
+    ray = pytest.importorskip('ray')
+    if env:
+        monkeypatch.setenv('RAY_ADDRESS', env)
+    else:
+        monkeypatch.delenv('RAY_ADDRESS', raising=False)
+    monkeypatch.setattr(ray, 'init', lambda **kwargs: kwargs)
+    assert utils.ray_init(port=8265, address=address) == expected
+
+
 # Test rle()
 rle = {
     'None': ([], (None, None, None)),
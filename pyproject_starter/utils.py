@@ -2,42 +2,450 @@
 # -*- coding: utf-8 -*-
 """ Package Utilities Module
 
+.. note:: NumPy, pandas, matplotlib and Ray are imported inside the functions \
+    that use them to keep `import pyproject_starter` fast.
 """
+from __future__ import annotations
+
+import atexit
+from collections import OrderedDict
+import datetime
+import json
 import logging
 import logging.config
+import logging.handlers
 import functools
+import hashlib
+import inspect
 import operator
 import os
 from pathlib import Path
+import pickle
+import queue
+import sys
+import threading
 import time
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import (TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator,
+                    List, Optional, TextIO, Tuple, Union)
 import warnings
-
-import matplotlib.pyplot as plt
-import numpy as np
-import ray
-from ray._private.worker import BaseContext
+import weakref
 
 from pyproject_starter.exceptions import InputError
-from pyproject_starter.pkg_globals import FONT_SIZE, TIME_FORMAT
+from pyproject_starter.pkg_globals import (CACHE_DIR, DOCKER_SECRETS_DIR,
+                                           FONT_SIZE, TIME_FORMAT)
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+    import ray
+
+_MISSING = object()
+_secret_cache: Dict[str, Tuple[Tuple[int, ...], str]] = {}
+_CACHE_LOAD_ERRORS = (EOFError, OSError, ValueError, pickle.UnpicklingError)
+_CACHE_SUFFIXES = ('.npy', '.parquet', '.pkl')
+_LOOKUP_ERRORS = (IndexError, KeyError, TypeError)
+
+
+def _column_array(values: Iterable[Any]) -> np.ndarray:
+    """
+    One dimensional array of column values.
+
+    Values that NumPy would nest (e.g. lists of equal length) or cannot \
+    combine (ragged lists) are kept as objects.
+    """
+    import numpy as np
+
+    values = list(values)
+    try:
+        arr = np.array(values)
+    except ValueError:
+        arr = None
+    if arr is None or arr.ndim != 1:
+        arr = np.empty(len(values), dtype=object)
+        for n, value in enumerate(values):
+            arr[n] = value
+    return arr
+
+
+def _getitem_expression(key_path: Iterable[Any], namespace: Dict[str, Any],
+                        prefix: str = 'k') -> str:
+    """
+    Build a chained subscript expression for `key_path`.
+
+    :param key_path: list of key levels with the final entry being the target
+    :param namespace: mapping updated with the variables bound to each key
+    :param prefix: prefix for the generated key variable names
+    :return: expression subscripting the variable `obj` by each key
+    """
+    expression = 'obj'
+    for n, key in enumerate(key_path):
+        namespace[f'{prefix}{n}'] = key
+        expression += f'[{prefix}{n}]'
+    return expression
+
+
+def _stable_hash(obj: Any, hasher: Any):
+    """
+    Update a hash with a representation of `obj` that is stable between \
+    processes and sessions.
+
+    :param obj: object to hash
+    :param hasher: `hashlib` hash object to update
+    """
+    np = sys.modules.get('numpy')
+    pd = sys.modules.get('pandas')
+    hasher.update(type(obj).__qualname__.encode())
+    if obj is None or isinstance(obj, (bool, int, float, complex, str)):
+        hasher.update(repr(obj).encode())
+    elif isinstance(obj, bytes):
+        hasher.update(obj)
+    elif isinstance(obj, Path):
+        hasher.update(str(obj).encode())
+    elif isinstance(obj, (list, tuple)):
+        hasher.update(str(len(obj)).encode())
+        for item in obj:
+            _stable_hash(item, hasher)
+    elif isinstance(obj, dict):
+        hasher.update(str(len(obj)).encode())
+        for key in sorted(obj, key=repr):
+            _stable_hash(key, hasher)
+            _stable_hash(obj[key], hasher)
+    elif isinstance(obj, (set, frozenset)):
+        # Iteration order depends on PYTHONHASHSEED, so the items are
+        # combined in the order of their own digests
+        hasher.update(str(len(obj)).encode())
+        digests = []
+        for item in obj:
+            item_hasher = hashlib.new(hasher.name)
+            _stable_hash(item, item_hasher)
+            digests.append(item_hasher.digest())
+        for digest in sorted(digests):
+            hasher.update(digest)
+    elif (np is not None and isinstance(obj, np.ndarray)
+          and not obj.dtype.hasobject):
+        hasher.update(f'{obj.dtype.str}{obj.shape}'.encode())
+        hasher.update(np.ascontiguousarray(obj).data)
+    elif pd is not None and isinstance(obj, (pd.DataFrame, pd.Series)):
+        hasher.update(repr(getattr(obj, 'columns', obj.name)).encode())
+        hasher.update(pd.util.hash_pandas_object(obj).values.data)
+    else:
+        hasher.update(pickle.dumps(obj, protocol=4))
+
+
+def compile_path(key_path: Iterable[Any],
+                 default: Any = _MISSING) -> Callable[[Any], Any]:
+    """
+    Precompile a nested key path into a fast accessor.
+
+    The returned function performs the lookups as a single chained \
+    subscript, avoiding the per level call overhead of `nested_get`.
+
+    :param key_path: list of key levels with the final entry being the target
+    :param default: value returned when a key is missing (if not supplied \
+        the lookup error is raised)
+    :return: function that retrieves the target value from a nested object
+
+    >>> compile_path(['a', 'b'])({'a': {'b': 1}})
+    1
+    """
+    namespace = {'default': default, 'lookup_errors': _LOOKUP_ERRORS}
+    expression = _getitem_expression(key_path, namespace)
+    if default is _MISSING:
+        source = f'def accessor(obj):\n    return {expression}\n'
+    else:
+        source = ('def accessor(obj):\n'
+                  '    try:\n'
+                  f'        return {expression}\n'
+                  '    except lookup_errors:\n'
+                  '        return default\n')
+    exec(source, namespace)
+    return namespace['accessor']
 
 
 def docker_secret(secret_name: str) -> Optional[str]:
     """
     Read Docker secret file.
 
+    Secrets are cached for the life of the process and only re-read when \
+    the modification time, size or inode of the secret file changes, so \
+    rotated secrets are picked up without reading the file on every call.
+
     :param secret_name: name of secrete to retrieve
     :return: contents of secrete file
     """
+    path = DOCKER_SECRETS_DIR / secret_name
+    try:
+        stat = os.stat(path)
+    except OSError:
+        _secret_cache.pop(secret_name, None)
+        return None
+    signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    cached = _secret_cache.get(secret_name)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
     try:
-        with open(f'/run/secrets/{secret_name}', 'r') as f:
-            return f.read().strip('\n')
+        with open(path, 'r') as f:
+            secret = f.read().strip('\n')
     except IOError:
         return None
+    _secret_cache[secret_name] = (signature, secret)
+    return secret
+
+
+def docker_secrets(*secret_names: str) -> Tuple[Optional[str], ...]:
+    """
+    Read several Docker secret files.
+
+    :param secret_names: names of secrets to retrieve
+    :return: contents of each secret file in the order requested
+    """
+    return tuple(docker_secret(name) for name in secret_names)
+
+
+def extract_columns(
+    records: Iterable[Any],
+    columns: Dict[str, Iterable[Any]],
+    default: Any = None,
+    as_frame: bool = False,
+) -> Union[Dict[str, np.ndarray], pd.DataFrame]:
+    """
+    Extract several nested key paths from many records in a single pass.
+
+    :param records: nested dictionaries (e.g. parsed JSON records)
+    :param columns: mapping of output column name to key path
+    :param default: value used when a key path is missing from a record
+    :param as_frame: if True return a data frame else a dictionary of arrays
+    :return: extracted values for each column
+    """
+    import numpy as np
+
+    names = list(columns)
+    namespace = {}
+    expressions = [
+        _getitem_expression(columns[name], namespace, f'k{n}_')
+        for n, name in enumerate(names)
+    ]
+    source = f'def row(obj):\n    return ({", ".join(expressions)}, )\n'
+    exec(source, namespace)
+    row = namespace['row']
+    accessors = [compile_path(columns[name], default) for name in names]
+
+    rows = []
+    append = rows.append
+    for record in records:
+        try:
+            append(row(record))
+        except _LOOKUP_ERRORS:
+            append(tuple([accessor(record) for accessor in accessors]))
+    values = zip(*rows) if rows else ([] for _ in names)
+    arrays = {name: _column_array(v) for name, v in zip(names, values)}
+    if as_frame:
+        import pandas as pd
+        return pd.DataFrame(arrays)
+    return arrays
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler with a bounded queue and an overflow policy.
+
+    :Attributes:
+
+    - **dropped**: *int* number of records discarded because the queue was \
+        full
+    - **overflow**: *str* policy applied when the queue is full
+
+        - `block`: wait for the listener to free a slot
+        - `drop`: silently discard the record
+        - `count`: discard the record and report the total at shutdown
+    """
+    overflow_policies = ('block', 'drop', 'count')
+
+    def __init__(self, log_queue: queue.Queue, overflow: str = 'block'):
+        if overflow not in self.overflow_policies:
+            raise InputError(
+                expression='overflow',
+                message=(f'Overflow policy must be one of: '
+                         f'{", ".join(self.overflow_policies)}'))
+        super(BoundedQueueHandler, self).__init__(log_queue)
+        self.dropped = 0
+        self.overflow = overflow
+        self._dropped_lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Pass records through unformatted.
+
+        The listener runs in the same process, so formatting is deferred to \
+        the listener thread instead of being paid by the caller.
+        """
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        if self.overflow == 'block':
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Format log records as single line JSON objects.
+
+    Attributes supplied through the `extra` keyword are added as fields. \
+    Callable values are only evaluated when the record is formatted, so \
+    expensive fields cost nothing for records that are filtered out and are \
+    computed on the listener thread when asynchronous handlers are enabled.
+    """
+    reserved_attrs = frozenset(
+        (*vars(logging.makeLogRecord({})), 'asctime', 'message'))
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record, self.datefmt),
+            'level': record.levelname,
+            'logger': record.name,
+            'module': record.module,
+            'line': record.lineno,
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in self.reserved_attrs:
+                entry[key] = value() if callable(value) else value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc_info'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Text formatter noting how many similar messages were suppressed."""
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        message = super(TextFormatter, self).formatMessage(record)
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            message += f' ({suppressed} similar messages suppressed)'
+        return message
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Limit how often an identical message is emitted.
+
+    Records are grouped by logger name and message template. Each group may \
+    emit `rate` records per second; the rest are suppressed and the number \
+    suppressed is attached to the next emitted record as `suppressed`.
+
+    Only records of the logger `name` and its children are limited. The \
+    filter is meant to be added to handlers, which see the records of child \
+    loggers, and one instance may be shared by several handlers: each \
+    record is decided once.
+
+    :Attributes:
+
+    - **max_keys**: *int* maximum number of message groups tracked
+    - **rate**: *float* records per second allowed for each message group
+    """
+
+    def __init__(self, rate: float = 1.0, max_keys: int = 1024,
+                 name: str = ''):
+        super(RateLimitFilter, self).__init__(name)
+        self.max_keys = max_keys
+        self.rate = rate
+        self._buckets = OrderedDict()
+        self._decisions = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not super(RateLimitFilter, self).filter(record):
+            return True
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        capacity = max(self.rate, 1.0)
+        with self._lock:
+            if record in self._decisions:
+                return self._decisions[record]
+            tokens, stamp, suppressed = self._buckets.pop(
+                key, (capacity, now, 0))
+            tokens = min(capacity, tokens + (now - stamp) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                self._buckets[key] = (tokens - 1, now, 0)
+            else:
+                self._buckets[key] = (tokens, now, suppressed + 1)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            self._decisions[record] = allowed
+        if allowed and suppressed:
+            record.suppressed = suppressed
+        return allowed
+
+
+class _QueueListener(logging.handlers.QueueListener):
+    """Queue listener that waits for a free slot to enqueue its sentinel."""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+_log_listener: Optional[_QueueListener] = None
+
+
+def logger_shutdown():
+    """
+    Stop the asynchronous logging listener and flush pending records.
+
+    The queue handler is replaced by the handlers it fed before the queue \
+    is drained, so records logged afterwards are written directly instead \
+    of waiting on a queue nobody reads.
+
+    .. note:: Registered with `atexit` by `logger_setup` when \
+        `async_handlers` is enabled; safe to call more than once.
+    """
+    global _log_listener
+    if _log_listener is None:
+        return
+    listener, _log_listener = _log_listener, None
+    package_logger = logging.getLogger('package')
+    queue_handlers = [
+        h for h in package_logger.handlers
+        if isinstance(h, BoundedQueueHandler)
+    ]
+    for handler in queue_handlers:
+        package_logger.removeHandler(handler)
+    for handler in listener.handlers:
+        package_logger.addHandler(handler)
+    listener.stop()
+    for handler in queue_handlers:
+        if handler.overflow == 'count' and handler.dropped:
+            record = logging.makeLogRecord({
+                'name': 'package',
+                'levelno': logging.WARNING,
+                'levelname': 'WARNING',
+                'msg': f'Dropped log records: {handler.dropped}',
+            })
+            for h in listener.handlers:
+                h.handle(record)
+    for handler in listener.handlers:
+        handler.flush()
 
 
 def logger_setup(file_path: Union[None, Path, str] = None,
-                 logger_name: str = 'package') -> logging.Logger:
+                 logger_name: str = 'package',
+                 async_handlers: bool = False,
+                 queue_size: int = 10000,
+                 overflow: str = 'block',
+                 max_bytes: int = 10 * 1024**2,
+                 backup_count: int = 5,
+                 json_format: bool = False,
+                 rate_limits: Optional[Dict[str, float]] = None) \
+        -> logging.Logger:
     """
     Configure logger with console and file handlers.
 
@@ -45,7 +453,21 @@ def logger_setup(file_path: Union[None, Path, str] = None,
         and ".log" else the default name of "info.log" will be saved in the \
         location of the caller.
     :param logger_name: name to be assigned to logger
+    :param async_handlers: if True records are placed on a bounded queue \
+        and written by a background listener thread
+    :param queue_size: maximum number of records held by the queue
+    :param overflow: policy applied when the queue is full (`block`, \
+        `drop` or `count`)
+    :param max_bytes: size in bytes at which the log file is rotated
+    :param backup_count: number of rotated log files to retain
+    :param json_format: if True the file handler writes JSON records
+    :param rate_limits: maximum records per second for each repeated \
+        message keyed by logger name, children included (e.g. \
+        `{'package': 10}`); applied by the handlers, so on the listener \
+        thread when `async_handlers` is enabled
     """
+    global _log_listener
+    logger_shutdown()
     if file_path:
         file_path = (Path(file_path).absolute()
                      if isinstance(file_path, str) else file_path.absolute())
@@ -58,12 +480,17 @@ def logger_setup(file_path: Union[None, Path, str] = None,
         'disable_existing_loggers': False,
         'formatters': {
             'console': {
-                'format': ('%(levelname)s - %(name)s -> Line: %(lineno)d <- '
-                           '%(message)s'),
+                '()': TextFormatter,
+                'fmt': ('%(levelname)s - %(name)s -> Line: %(lineno)d <- '
+                        '%(message)s'),
             },
             'file': {
-                'format': ('%(asctime)s - %(levelname)s - %(module)s.py -> '
-                           'Line: %(lineno)d <- %(message)s'),
+                '()': TextFormatter,
+                'fmt': ('%(asctime)s - %(levelname)s - %(module)s.py -> '
+                        'Line: %(lineno)d <- %(message)s'),
+            },
+            'json': {
+                '()': JsonFormatter,
             },
         },
         'handlers': {
@@ -75,11 +502,12 @@ def logger_setup(file_path: Union[None, Path, str] = None,
             },
             'file': {
                 'class': 'logging.handlers.RotatingFileHandler',
+                'backupCount': backup_count,
                 'encoding': 'utf8',
                 'level': 'DEBUG',
                 'filename': file_path,
-                'formatter': 'file',
-                'mode': 'w',
+                'formatter': 'json' if json_format else 'file',
+                'maxBytes': max_bytes,
             },
         },
         'loggers': {
@@ -95,9 +523,30 @@ def logger_setup(file_path: Union[None, Path, str] = None,
         },
     }
     logging.config.dictConfig(config)
+
+    handlers = {
+        *logging.getLogger('package').handlers,
+        *logging.getLogger().handlers,
+    }
+    for name, rate in (rate_limits or {}).items():
+        log_filter = RateLimitFilter(rate=rate, name=name)
+        for handler in handlers:
+            handler.addFilter(log_filter)
+
+    if async_handlers:
+        package_logger = logging.getLogger('package')
+        handlers = package_logger.handlers[:]
+        log_queue = queue.Queue(maxsize=queue_size)
+        package_logger.handlers = [BoundedQueueHandler(log_queue, overflow)]
+        _log_listener = _QueueListener(
+            log_queue, *handlers, respect_handler_level=True)
+        _log_listener.start()
     return logging.getLogger(logger_name)
 
 
+atexit.register(logger_shutdown)
+
+
 def matplotlib_defaults():
     """Set matplotlib default values."""
     params = {
@@ -107,7 +556,128 @@ def matplotlib_defaults():
         'patch.edgecolor': 'black',
         'patch.force_edgecolor': True,
     }
-    plt.rcParams.update(params)
+    import matplotlib
+    matplotlib.rcParams.update(params)
+
+
+def _cache_evict(cache_dir: Path, max_bytes: int):
+    """Remove least recently used cache files until under `max_bytes`."""
+    entries = []
+    for path in cache_dir.glob('*/*'):
+        if path.suffix.startswith('.tmp'):
+            continue
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries, key=lambda x: x[0]):
+        if total <= max_bytes:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+
+
+def _cache_load(path: Path) -> Any:
+    """Load a cached result, memory mapping NumPy arrays."""
+    if path.suffix == '.npy':
+        import numpy as np
+        return np.load(path, mmap_mode='r')
+    if path.suffix == '.parquet':
+        import pandas as pd
+        return pd.read_parquet(path)
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def _cache_save(base_path: Path, result: Any):
+    """Atomically save a result using a format suited to its type."""
+    np = sys.modules.get('numpy')
+    pd = sys.modules.get('pandas')
+    tmp_path = base_path.with_suffix(f'.tmp{os.getpid()}')
+    if (np is not None and isinstance(result, np.ndarray)
+            and not result.dtype.hasobject):
+        suffix = '.npy'
+        with open(tmp_path, 'wb') as f:
+            np.save(f, result)
+    else:
+        suffix = '.pkl'
+        if pd is not None and isinstance(result, pd.DataFrame):
+            try:
+                result.to_parquet(tmp_path)
+                suffix = '.parquet'
+            except (ImportError, ValueError, TypeError):
+                pass
+        if suffix == '.pkl':
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, base_path.with_suffix(suffix))
+
+
+def memoize_to_disk(cache_dir: Union[None, Path, str] = None,
+                    max_bytes: Optional[int] = 2**30) -> Callable:
+    """
+    Decorator to persist function results on disk between sessions.
+
+    Results are keyed by the function source code and a stable hash of the \
+    arguments, so editing the function invalidates its entries. NumPy \
+    arrays are saved as `.npy` files and loaded memory mapped, data frames \
+    are saved as Parquet and everything else is pickled. When the cache \
+    exceeds `max_bytes` the least recently used entries are evicted.
+
+    The decorated function gains a `cache_clear()` method and a \
+    `cache_dir` attribute.
+
+    :param cache_dir: directory to store results (default: `cache` \
+        directory in the package root); each function uses a sub-directory \
+        named after its qualified name
+    :param max_bytes: total size budget for `cache_dir` (if None the cache \
+        is unbounded)
+    """
+    cache_dir = Path(cache_dir) if cache_dir else CACHE_DIR
+
+    def memoize_decorator(func):
+        func_dir = cache_dir / f'{func.__module__}.{func.__qualname__}'
+        try:
+            source = inspect.getsource(func)
+        except (OSError, TypeError):
+            source = func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            hasher = hashlib.sha256(source.encode())
+            _stable_hash((args, kwargs), hasher)
+            key = hasher.hexdigest()
+            for suffix in _CACHE_SUFFIXES:
+                path = func_dir / f'{key}{suffix}'
+                if not path.exists():
+                    continue
+                try:
+                    result = _cache_load(path)
+                except _CACHE_LOAD_ERRORS:
+                    # Corrupt or truncated entries are recomputed
+                    path.unlink(missing_ok=True)
+                    continue
+                os.utime(path)
+                return result
+
+            result = func(*args, **kwargs)
+            func_dir.mkdir(parents=True, exist_ok=True)
+            _cache_save(func_dir / key, result)
+            if max_bytes is not None:
+                _cache_evict(cache_dir, max_bytes)
+            return result
+
+        def cache_clear():
+            for path in func_dir.glob('*'):
+                path.unlink(missing_ok=True)
+
+        wrapper.cache_clear = cache_clear
+        wrapper.cache_dir = func_dir
+        return wrapper
+
+    return memoize_decorator
 
 
 def nested_get(nested_dict: Dict[Any, Any], key_path: List[Any]) -> Any:
@@ -131,29 +701,177 @@ def nested_set(nested_dict: Dict[Any, Any], key_path: List[Any], value: Any):
     nested_get(nested_dict, key_path[:-1])[key_path[-1]] = value
 
 
+class Progress:
+    """
+    Throughput aware progress reporter.
+
+    Tracks the number of completed items, an exponentially weighted moving \
+    average (EWMA) of items per second and the estimated time remaining. \
+    Output is redrawn at most `max_redraws` times per second, so reporting \
+    every item of a long loop costs little more than a counter increment. \
+    Updates are thread safe, allowing several workers to share a reporter.
+
+    :Attributes:
+
+    - **count**: *int* number of completed items
+    - **max_redraws**: *float* maximum number of redraws per second
+    - **msg**: *str* message prepended to the progress output
+    - **rate**: *float* smoothed throughput in items per second
+    - **smoothing**: *float* EWMA weight given to the newest rate sample
+    - **total**: *int* total number of items (None if unknown)
+
+    Example::
+        with Progress(range(1000), msg='Counting') as progress:
+            for n in progress:
+                ...
+    """
+
+    def __init__(self,
+                 iterable: Optional[Iterable[Any]] = None,
+                 total: Optional[int] = None,
+                 msg: Union[None, str] = 'Progress',
+                 max_redraws: float = 4.0,
+                 smoothing: float = 0.3,
+                 stream: Optional[TextIO] = None):
+        if total is None and iterable is not None:
+            try:
+                total = len(iterable)
+            except TypeError:
+                pass
+        self.count = 0
+        self.iterable = iterable
+        self.max_redraws = max_redraws
+        self.msg = msg
+        self.rate = 0.0
+        self.smoothing = smoothing
+        self.total = total
+
+        self._closed = False
+        self._lock = threading.Lock()
+        self._stream = stream
+        self._start = time.monotonic()
+        self._last_count = 0
+        self._last_draw = self._start
+        self._last_sample = self._start
+
+    def __repr__(self) -> str:
+        return (f'<{type(self).__name__}('
+                f'count={self.count!r}, '
+                f'total={self.total!r}'
+                f')>')
+
+    def __str__(self) -> str:
+        # An estimated total may be exceeded, so fall back to the count
+        progress = (self.percent_str()
+                    if self.total and self.count <= self.total else
+                    f'\r{self.msg}: {self.count}')
+        eta = self.eta
+        eta = ('--:--:--' if eta is None else
+               str(datetime.timedelta(seconds=round(eta))))
+        return f'{progress} | {self.rate:0.4g} it/s | ETA {eta}'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __iter__(self) -> Iterator[Any]:
+        if self.iterable is None:
+            raise InputError(
+                expression='iterable',
+                message='An iterable must be supplied to iterate progress.')
+        for item in self.iterable:
+            yield item
+            self.update()
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Estimated seconds until all items are completed."""
+        if self.total is None or self.rate <= 0:
+            return None
+        return max(self.total - self.count, 0) / self.rate
+
+    def _sample_rate(self, now: float):
+        """Update the EWMA throughput with the items since the last sample."""
+        elapsed = now - self._last_sample
+        if elapsed <= 0 or self.count == self._last_count:
+            return
+        sample = (self.count - self._last_count) / elapsed
+        self.rate = (sample if self._last_count == 0 else self.smoothing *
+                     sample + (1 - self.smoothing) * self.rate)
+        self._last_count = self.count
+        self._last_sample = now
+
+    def _draw(self):
+        stream = self._stream if self._stream else sys.stderr
+        stream.write(str(self))
+        stream.flush()
+
+    def close(self):
+        """Draw the final progress state and end the output line."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._sample_rate(time.monotonic())
+            self._draw()
+            stream = self._stream if self._stream else sys.stderr
+            stream.write('\n')
+
+    def percent_str(self, n: Optional[int] = None) -> str:
+        """
+        Generate progress percentage message.
+
+        :param n: number of current item (default: completed item count)
+        """
+        n = self.count if n is None else n
+        if self.total == 0:
+            raise ZeroDivisionError(
+                'Parameter `total` may not be equal to zero.')
+        if n > self.total:
+            raise InputError(
+                expression='n > total',
+                message='Current item value `n` must be less than total.')
+        return f'\r{self.msg}: {n / self.total: .1%}'
+
+    def update(self, n: int = 1):
+        """
+        Record completed items and redraw if the redraw interval elapsed.
+
+        :param n: number of items completed since the last update
+        """
+        with self._lock:
+            self.count += n
+            now = time.monotonic()
+            if now - self._last_draw < 1 / self.max_redraws:
+                return
+            self._last_draw = now
+            self._sample_rate(now)
+            self._draw()
+
+
 def progress_str(n: int,
                  total: int,
                  msg: Union[None, str] = 'Progress') -> str:
     """
     Generate progress percentage message.
 
+    .. note:: Compatibility wrapper around `Progress.percent_str`; use \
+        `Progress` to report throughput and time remaining.
+
     :param n: number of current item
     :param total: total number of items
     :param msg: message to prepend to progress percentage
     """
-    if total == 0:
-        raise ZeroDivisionError('Parameter `total` may not be equal to zero.')
-    if n > total:
-        raise InputError(
-            expression='n > total',
-            message='Current item value `n` must be less than total.')
-    progress_msg = f'\r{msg}: {n / total: .1%}'
+    progress_msg = Progress(total=total, msg=msg).percent_str(n)
     return progress_msg if n < total else progress_msg + '\n\n'
 
 
 def ray_init(
     host: str = '0.0.0.0',
     port: Optional[int] = None,
+    address: Optional[str] = None,
 ) -> ray._private.worker.RayContext:
     """
     Initialize Ray cluster utilizing provided host and port.
@@ -161,12 +879,20 @@ def ray_init(
     :param host: Host address to bind dashboard
     :param port: Host port to bind dashboard (if None then the environment \
         variable RAY_DASHBOARD port will be used)
+    :param address: address of an existing Ray head to connect to instead \
+        of starting a local cluster (if None then the environment variable \
+        RAY_ADDRESS will be used)
     :return: Ray server context and Ray dashboard URL
 
     .. note::
         When using Ray inside a Docker container set the host to '0.0.0.0' and
         chose a port that is mapped from the host to the container.
     """
+    import ray
+
+    address = os.getenv('RAY_ADDRESS') if address is None else address
+    if address:
+        return ray.init(address=address)
     port = int(os.getenv('PORT_RAY_DASHBOARD')) if port is None else port
     return ray.init(
         dashboard_host=host,
@@ -174,6 +900,11 @@ def ray_init(
     )
 
 
+def reload_secrets():
+    """Clear cached Docker secrets so they are read again on next access."""
+    _secret_cache.clear()
+
+
 def rle(arr: Union[List[Any], np.ndarray]) \
         -> Union[Tuple[np.ndarray, ...], Tuple[None, ...]]:
     """
@@ -182,6 +913,8 @@ def rle(arr: Union[List[Any], np.ndarray]) \
     :param arr: array to be encoded
     :return: Start Indices for code, Length of code, Value of code
     """
+    import numpy as np
+
     arr = np.array(arr) if not isinstance(arr, np.ndarray) else arr
     vec = arr.flatten() if arr.ndim > 1 else arr
     n = vec.size
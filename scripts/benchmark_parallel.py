@@ -0,0 +1,53 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+""" Script to find the crossover points of the `parallel_map` backends.
+
+"""
+import time
+
+import ray
+
+from pyproject_starter.parallel import parallel_map
+
+SIZES = (100, 10_000, 100_000)
+WORK = {
+    'cheap': 10,
+    'moderate': 10_000,
+}
+
+
+def work(n: int, iterations: int = 10) -> int:
+    """Burn CPU proportional to `iterations`."""
+    return sum(i * n for i in range(iterations))
+
+
+def benchmark_parallel(sizes=SIZES):
+    """
+    Print wall time of serial execution and each `parallel_map` backend.
+
+    :param sizes: number of items to process
+    """
+    ray.init(include_dashboard=False, log_to_driver=False)
+    print(f'{"work":>10} {"items":>8} {"serial":>8} {"thread":>8} '
+          f'{"process":>8} {"ray":>8}')
+    for name, iterations in WORK.items():
+        for size in sizes:
+            timings = []
+            start = time.perf_counter()
+            _ = [work(x, iterations) for x in range(size)]
+            timings.append(time.perf_counter() - start)
+            for backend in ('thread', 'process', 'ray'):
+                start = time.perf_counter()
+                _ = list(
+                    parallel_map(work,
+                                 range(size),
+                                 backend=backend,
+                                 iterations=iterations))
+                timings.append(time.perf_counter() - start)
+            print(f'{name:>10} {size:>8} ' +
+                  ' '.join(f'{t:>7.3f}s' for t in timings))
+    ray.shutdown()
+
+
+if __name__ == '__main__':
+    benchmark_parallel()
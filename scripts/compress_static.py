@@ -0,0 +1,70 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+""" Script to pre-compress static files served by NGINX `gzip_static`.
+
+"""
+import argparse
+import gzip
+import logging
+import os
+from pathlib import Path
+from typing import List, Union
+
+from pyproject_starter.pkg_globals import PACKAGE_ROOT
+
+logger = logging.getLogger('package')
+
+DOCS_HTML_DIR = PACKAGE_ROOT / 'docs' / '_build' / 'html'
+EXTENSIONS = (
+    '.css',
+    '.html',
+    '.js',
+    '.json',
+    '.map',
+    '.svg',
+    '.ttf',
+    '.txt',
+    '.xml',
+)
+MIN_SIZE = 1024
+
+
+def compress_static(root: Union[Path, str] = DOCS_HTML_DIR,
+                    min_size: int = MIN_SIZE,
+                    level: int = 9) -> List[Path]:
+    """
+    Write a `.gz` copy next to every compressible file under a directory.
+
+    Files smaller than `min_size` are skipped, as are files whose `.gz` copy \
+    is already newer than the source. Compressed copies keep the source \
+    modification time, so NGINX sends the same `Last-Modified` header for \
+    both.
+
+    :param root: directory to compress (default: built HTML documentation)
+    :param min_size: minimum file size in bytes worth compressing
+    :param level: gzip compression level
+    :return: paths of the written `.gz` files
+    """
+    written = []
+    for file_path in sorted(Path(root).rglob('*')):
+        if (file_path.suffix not in EXTENSIONS or not file_path.is_file()
+                or file_path.stat().st_size < min_size):
+            continue
+        gz_path = file_path.with_name(f'{file_path.name}.gz')
+        stat = file_path.stat()
+        if (gz_path.exists()
+                and gz_path.stat().st_mtime_ns >= stat.st_mtime_ns):
+            continue
+        gz_path.write_bytes(
+            gzip.compress(file_path.read_bytes(), compresslevel=level,
+                          mtime=0))
+        os.utime(gz_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        written.append(gz_path)
+    logger.debug('Static files compressed: %d' % len(written))
+    return written
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('root', nargs='?', default=DOCS_HTML_DIR)
+    compress_static(parser.parse_args().root)
@@ -3,20 +3,139 @@
 """ Docker Configuration Module
 
 """
+import copy
 from enum import Enum
 import logging
 import os
 from pathlib import Path
-from typing import Optional
+from typing import Dict, NamedTuple, Optional
 
 import yaml
 
+from pyproject_starter.exceptions import InputError
 from pyproject_starter.pkg_globals import PACKAGE_ROOT
 
 logger = logging.getLogger('package')
 
 PROJECT_NAME = os.getenv('PROJECT_NAME')
 
+GPU_SHM_FRACTION = 0.25
+MIN_CPUS = 0.25
+MIN_MEMORY = 256 * 2**20
+NOFILE = {'soft': 65536, 'hard': 65536}
+
+# Share of host CPUs (`cpus`), memory (`memory`) and shared memory (`shm`)
+# given to each service. CPU shares are limits and may add up to more than
+# one, memory shares are kept below one so services cannot starve the host.
+RESOURCE_PROFILES = {
+    'batch': {
+        'latex': {'cpus': 0.125, 'memory': 0.03},
+        'mongo': {'cpus': 0.25, 'memory': 0.1},
+        'nginx': {'cpus': 0.125, 'memory': 0.01},
+        'pgadmin': {'cpus': 0.125, 'memory': 0.02},
+        'postgres': {'cpus': 0.5, 'memory': 0.2, 'shm': 0.05},
+        'python': {'cpus': 1.0, 'memory': 0.55, 'shm': 0.25},
+        'streamlit': {'cpus': 0.125, 'memory': 0.03},
+    },
+    'dev': {
+        'latex': {'cpus': 0.25, 'memory': 0.05},
+        'mongo': {'cpus': 0.25, 'memory': 0.1},
+        'nginx': {'cpus': 0.125, 'memory': 0.02},
+        'pgadmin': {'cpus': 0.125, 'memory': 0.03},
+        'postgres': {'cpus': 0.25, 'memory': 0.15, 'shm': 0.03},
+        'python': {'cpus': 0.75, 'memory': 0.4, 'shm': 0.1},
+        'streamlit': {'cpus': 0.25, 'memory': 0.1},
+    },
+    'serve': {
+        'latex': {'cpus': 0.125, 'memory': 0.02},
+        'mongo': {'cpus': 0.25, 'memory': 0.1},
+        'nginx': {'cpus': 0.25, 'memory': 0.03},
+        'pgadmin': {'cpus': 0.125, 'memory': 0.02},
+        'postgres': {'cpus': 0.5, 'memory': 0.3, 'shm': 0.05},
+        'python': {'cpus': 0.5, 'memory': 0.2, 'shm': 0.05},
+        'streamlit': {'cpus': 0.5, 'memory': 0.25},
+    },
+}
+# PostgreSQL settings that depend on the workload rather than the host
+POSTGRES_PROFILES = {
+    'batch': {
+        'gather_share': 0.5,
+        'max_connections': 50,
+        'max_wal_size': '16GB',
+        'min_wal_size': '4GB',
+    },
+    'dev': {
+        'gather_share': 0.25,
+        'max_connections': 100,
+        'max_wal_size': '4GB',
+        'min_wal_size': '1GB',
+    },
+    'serve': {
+        'gather_share': 0.125,
+        'max_connections': 200,
+        'max_wal_size': '8GB',
+        'min_wal_size': '2GB',
+    },
+}
+PGBOUNCER_MAX_CLIENT_CONN = 1000
+PGBOUNCER_PORT = 6432
+NGINX_CONF = '/etc/nginx/nginx.conf'
+NGINX_WORKER_CONNECTIONS = 4096
+PGBOUNCER_INI = '/etc/pgbouncer/pgbouncer.ini'
+POSTGRES_CONF = '/etc/postgresql/postgresql.conf'
+# Share of the Python service CPUs and memory given to the Ray head and to
+# all Ray workers. Ray memory is carved out of the Python service, which keeps
+# the rest to drive the cluster, while CPU shares are limits like above.
+RAY_PROFILES = {
+    'batch': {
+        'head': {'cpus': 0.125, 'memory': 0.05},
+        'workers': {'cpus': 1.0, 'memory': 0.8},
+    },
+    'dev': {
+        'head': {'cpus': 0.125, 'memory': 0.05},
+        'workers': {'cpus': 0.75, 'memory': 0.6},
+    },
+    'serve': {
+        'head': {'cpus': 0.25, 'memory': 0.1},
+        'workers': {'cpus': 1.0, 'memory': 0.6},
+    },
+}
+RAY_OBJECT_STORE_FRACTION = 0.3
+RAY_PORT = 6379
+RAY_WORKERS = int(os.getenv('RAY_WORKERS', '2'))
+SERVICE_ULIMITS = {
+    'mongo': {'nofile': NOFILE},
+    'postgres': {'nofile': NOFILE},
+    'python': {'memlock': -1, 'nofile': NOFILE},
+}
+
+
+class HostSpecs(NamedTuple):
+    """Host resources available to Docker."""
+    cpus: int
+    memory: int
+
+
+def detect_host() -> HostSpecs:
+    """
+    Detect the number of CPUs and bytes of memory of the host.
+
+    :return: host resources
+    """
+    memory = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    return HostSpecs(cpus=os.cpu_count() or 1, memory=memory)
+
+
+def docker_bytes(n_bytes: float) -> str:
+    """
+    Format a number of bytes as a Docker size string.
+
+    :param n_bytes: number of bytes
+    :return: size rounded down to whole megabytes or gigabytes
+    """
+    n_mb = int(n_bytes // 2**20)
+    return f'{n_mb // 1024}g' if n_mb % 1024 == 0 else f'{n_mb}m'
+
 
 class ComposeService(Enum):
     """Implemented Docker Compose services."""
@@ -25,10 +144,27 @@ class ComposeService(Enum):
     NGINX = f'{PROJECT_NAME}_nginx'
     POSTGRES = f'{PROJECT_NAME}_postgres'
     PGADMIN = f'{PROJECT_NAME}_pgadmin'
+    PGBOUNCER = f'{PROJECT_NAME}_pgbouncer'
     PYTHON = f'{PROJECT_NAME}_python'
+    RAY = f'{PROJECT_NAME}_ray'
     STREAMLIT = f'{PROJECT_NAME}_streamlit'
 
 
+PGBOUNCER_SERVICE = ComposeService.PGBOUNCER.value
+# Services connecting to PostgreSQL, through PgBouncer when configured
+DB_CLIENT_SERVICES = (ComposeService.PYTHON.value,
+                      ComposeService.STREAMLIT.value)
+# Generated configuration files: path relative to the compose file, mount
+# point in the container and the `ComposeConfiguration` method rendering them
+SERVICE_FILES = {
+    ComposeService.NGINX.value: ('nginx/nginx.conf', NGINX_CONF, 'nginx_conf'),
+    PGBOUNCER_SERVICE: ('pgbouncer/pgbouncer.ini', PGBOUNCER_INI,
+                        'pgbouncer_ini'),
+    ComposeService.POSTGRES.value: ('postgres/postgresql.conf',
+                                    POSTGRES_CONF, 'postgres_conf'),
+}
+
+
 class ComposeConfiguration:
     """
     Docker Compose Configuration Class
@@ -36,11 +172,21 @@ class ComposeConfiguration:
     :Attributes:
 
     - **filepath**: *Path* Path to Docker Compose configuration file
+    - **host**: *HostSpecs* host resources used to size services
+    - **profile**: *str* workload profile used to size services and tune \
+        PostgreSQL
+    - **ray_workers**: *int* number of Ray worker services
     """
     default_filepath = PACKAGE_ROOT / 'docker' / 'docker-compose.yaml'
 
-    def __init__(self, filepath: Optional[Path] = None):
+    def __init__(self,
+                 filepath: Optional[Path] = None,
+                 host: Optional[HostSpecs] = None,
+                 ray_workers: int = RAY_WORKERS):
         self.filepath = filepath if filepath else self.default_filepath
+        self.host = host if host else detect_host()
+        self.profile = 'dev'
+        self.ray_workers = ray_workers
         with open(self.filepath, 'r') as f:
             self._config = yaml.safe_load(f)
         logger.debug('Initial Docker Compose Configuration:\n\n%s' %
@@ -59,7 +205,7 @@ class ComposeConfiguration:
             f'{self._volume_secret}:{self._working_dir}/docker/secrets',
         ]
 
-        self._docker_dir = PACKAGE_ROOT / 'docker'
+        self._docker_dir = self.filepath.parent
         self._docker_secrets_dir = self._docker_dir / 'secrets'
         self._mongo_init_dir = self._docker_dir / 'mongo_init'
 
@@ -277,9 +423,11 @@ class ComposeConfiguration:
                 f'{self._volume_db}:/var/lib/postgresql/data',
                 *self._mask_secrets,
             ],
+            'command': f'postgres -c config_file={POSTGRES_CONF}',
         }
         self._update_depends_on(ComposeService.POSTGRES)
         self._add_secrets()
+        self._link_pgbouncer()
 
     def _add_pyproject_starter_pgadmin(self):
         """Add PGAdmin service to configuration."""
@@ -311,6 +459,86 @@ class ComposeConfiguration:
             ],
         }
 
+    def _add_pyproject_starter_pgbouncer(self):
+        """Add PgBouncer transaction pooling service to configuration."""
+        userlist = ('printf \'"%s" "%s"\\n\' '
+                    '"$$(cat /run/secrets/db-username)" '
+                    '"$$(cat /run/secrets/db-password)" > /tmp/userlist.txt')
+        self._config['services'][f'{PROJECT_NAME}_pgbouncer'] = {
+            'container_name':
+            f'{self._container_prefix}_pgbouncer',
+            'command': [
+                '-c',
+                f'{userlist} && exec pgbouncer {PGBOUNCER_INI}',
+            ],
+            'entrypoint': ['/bin/sh'],
+            'image':
+            'edoburu/pgbouncer',
+            'networks': [self._network],
+            'restart':
+            'always',
+            'secrets': [
+                'db-password',
+                'db-username',
+            ],
+            'volumes': [
+                *self._mask_secrets,
+            ],
+        }
+        self._link_pgbouncer()
+        self._update_depends_on(ComposeService.PGBOUNCER)
+
+    def _link_pgbouncer(self):
+        """
+        Route database clients through PgBouncer.
+
+        Clients receive the PgBouncer host and port and PgBouncer waits for \
+        PostgreSQL when both services are configured, whichever is added \
+        first.
+        """
+        services = self._config['services']
+        if PGBOUNCER_SERVICE not in services:
+            return
+        for name in DB_CLIENT_SERVICES:
+            self._set_environment(name, {
+                'DB_HOST': PGBOUNCER_SERVICE,
+                'DB_PORT': str(PGBOUNCER_PORT),
+            })
+        postgres = ComposeService.POSTGRES.value
+        if postgres in services:
+            depends_on = services[PGBOUNCER_SERVICE].setdefault(
+                'depends_on', [])
+            if postgres not in depends_on:
+                depends_on.append(postgres)
+
+    def _add_pyproject_starter_ray(self):
+        """Add Ray head and worker services to configuration."""
+        head = ComposeService.RAY.value
+        ray_service = {
+            'image': f'{self._package}_python',
+            'networks': [self._network],
+            'restart': 'always',
+            'volumes': [
+                f'..:/usr/src/{self._package}',
+                *self._mask_secrets,
+            ],
+            'working_dir': self._working_dir,
+        }
+        self._config['services'][head] = {
+            **ray_service,
+            'container_name': f'{self._container_prefix}_ray',
+        }
+        for n in range(1, self.ray_workers + 1):
+            self._config['services'][f'{head}_worker_{n}'] = {
+                **ray_service,
+                'container_name': f'{self._container_prefix}_ray_worker_{n}',
+                'depends_on': [head],
+            }
+        self._set_environment(ComposeService.PYTHON.value,
+                              {'RAY_ADDRESS': f'{head}:{RAY_PORT}'})
+        self._update_depends_on(ComposeService.RAY)
+        self._size_ray()
+
     def _add_pyproject_starter_streamlit(self):
         """Add Streamlit service to configuration."""
         self._config['services'][f'{PROJECT_NAME}_streamlit'] = {
@@ -331,22 +559,67 @@ class ComposeConfiguration:
             'ports': ['$PORT_STREAMLIT:8501'],
             'restart':
             'always',
+            'secrets': [
+                'db-database',
+                'db-password',
+                'db-username',
+            ],
             'volumes': [
                 f'../applications/streamlit:'
                 f'/usr/src/pyproject_starter/applications/streamlit',
+                f'../{self._package}:{self._working_dir}/{self._package}:ro',
             ],
         }
+        self._add_secrets()
+        self._link_pgbouncer()
+
+    def _set_environment(self, service_name: str, variables: Dict[str, str]):
+        """
+        Set environment variables of a service, replacing existing values.
+
+        :param service_name: name of the service, ignored if not configured
+        :param variables: variable names and values, a value of `None` \
+            removes the variable
+        """
+        service = self._config['services'].get(service_name)
+        if service is None:
+            return
+        environment = service.get('environment', [])
+        if isinstance(environment, dict):
+            environment = {**environment, **variables}
+            service['environment'] = {
+                k: v
+                for k, v in environment.items() if v is not None
+            }
+            return
+        service['environment'] = [
+            *(v for v in environment if v.split('=', 1)[0] not in variables),
+            *(f'{k}={v}' for k, v in variables.items() if v is not None),
+        ]
 
     def _update_depends_on(self, service_name: ComposeService):
         """Update the Python service `depends_on` tag."""
         py_tag = self._config['services'][f'{PROJECT_NAME}_python']
-        py_tag['depends_on'] = (py_tag.get('depends_on', []) +
-                                [service_name.value])
+        depends_on = py_tag.get('depends_on', [])
+        if service_name.value not in depends_on:
+            py_tag['depends_on'] = depends_on + [service_name.value]
 
     def add_gpu(self):
-        """Add GPU configuration to Python container."""
+        """
+        Add GPU configuration to Python container.
+
+        Shared memory defaults to a fraction of the host memory. Once a \
+        resource profile is applied, the profile share is kept instead and \
+        limited to the memory of the container.
+        """
         py_service = self._config['services'][f'{PROJECT_NAME}_python']
-        py_service['build']['shm_size'] = '1g'
+        shm = self.host.memory * GPU_SHM_FRACTION
+        if 'mem_limit' in py_service:
+            shares = self._service_shares('python')
+            memory = max(shares['memory'] * self.host.memory, MIN_MEMORY)
+            shm = min(shares.get('shm', GPU_SHM_FRACTION) * self.host.memory,
+                      memory)
+        py_service['build']['shm_size'] = docker_bytes(shm)
         py_service['cap_add'] = ['SYS_PTRACE']
         py_service['deploy'] = {
             'resources': {
@@ -360,8 +633,279 @@ class ComposeConfiguration:
             },
         }
         py_service['ipc'] = 'host'
-        py_service['shm_size'] = '24g'
-        py_service['ulimits'] = {'memlock': -1}
+        py_service['shm_size'] = docker_bytes(shm)
+        py_service['ulimits'] = {
+            **py_service.get('ulimits', {}),
+            'memlock': -1,
+        }
+
+    def add_resource_profile(self, profile: str = 'dev'):
+        """
+        Size CPU, memory, shared memory and ulimits of every service.
+
+        :param profile: workload profile (`batch`, `dev` or `serve`)
+        """
+        if profile not in RESOURCE_PROFILES:
+            raise InputError(
+                expression='profile',
+                message=f'Profile must be one of: {tuple(RESOURCE_PROFILES)}')
+        self.profile = profile
+        for name, service in self._config['services'].items():
+            kind = name.rsplit('_', 1)[-1]
+            shares = self._service_shares(kind)
+            if shares is None:
+                continue
+            resources = self._service_resources(shares)
+            service.update(resources)
+            if kind in SERVICE_ULIMITS:
+                service['ulimits'] = {
+                    **service.get('ulimits', {}),
+                    **copy.deepcopy(SERVICE_ULIMITS[kind]),
+                }
+        self._size_ray()
+        logger.debug('Docker resource profile added: %s' % profile)
+
+    def _service_shares(self, kind: str) -> Optional[Dict[str, float]]:
+        """
+        Share of host resources given to a kind of service by the profile.
+
+        :param kind: kind of service, the last part of the service name
+        :return: share of host CPUs, memory and shared memory or `None` if \
+            the profile does not size the service
+        """
+        shares = RESOURCE_PROFILES[self.profile].get(kind)
+        if kind == 'python' and ComposeService.RAY.value in \
+                self._config['services']:
+            ray = RAY_PROFILES[self.profile]
+            kept = 1 - ray['head']['memory'] - ray['workers']['memory']
+            shares = {**shares, 'memory': shares['memory'] * kept}
+        return shares
+
+    def _size_ray(self):
+        """
+        Size the Ray head and workers from the host and profile.
+
+        Ray takes its share of the Python service resources and each worker \
+        receives an equal part of it. The object store takes a fixed \
+        fraction of the worker memory and shared memory is sized to hold \
+        it, so Ray never falls back to disk. A Python service already sized \
+        by a profile is resized to the memory Ray leaves it.
+        """
+        head = ComposeService.RAY.value
+        services = self._config['services']
+        workers = [
+            name for name in services if name.startswith(f'{head}_worker_')
+        ]
+        py_service = services[ComposeService.PYTHON.value]
+        if 'mem_limit' in py_service:
+            py_service.update(
+                self._service_resources(self._service_shares('python')))
+        if head not in services:
+            return
+        shares = RAY_PROFILES[self.profile]
+        python = RESOURCE_PROFILES[self.profile]['python']
+        roles = {head: ('head', 1)}
+        roles.update({name: ('workers', len(workers)) for name in workers})
+        for name, (role, n_services) in roles.items():
+            cpus = max(shares[role]['cpus'] * python['cpus'] * self.host.cpus
+                       / n_services, MIN_CPUS)
+            memory = max(shares[role]['memory'] * python['memory'] *
+                         self.host.memory / n_services, MIN_MEMORY)
+            object_store = int(memory * RAY_OBJECT_STORE_FRACTION)
+            if role == 'head':
+                command = (f'ray start --head --port={RAY_PORT} '
+                           f'--num-cpus=0 --dashboard-host=0.0.0.0')
+            else:
+                command = (f'ray start --address={head}:{RAY_PORT} '
+                           f'--num-cpus={max(int(cpus), 1)}')
+            services[name].update({
+                'command': (f'{command} '
+                            f'--object-store-memory={object_store} --block'),
+                'cpus': f'{round(cpus, 2):g}',
+                'mem_limit': docker_bytes(memory),
+                'shm_size': docker_bytes(object_store + MIN_MEMORY),
+            })
+
+    def _postgres_resources(self) -> HostSpecs:
+        """CPUs and bytes of memory given to PostgreSQL by the profile."""
+        shares = RESOURCE_PROFILES[self.profile]['postgres']
+        return HostSpecs(cpus=max(round(shares['cpus'] * self.host.cpus), 1),
+                         memory=int(shares['memory'] * self.host.memory))
+
+    def nginx_conf(self) -> str:
+        """
+        NGINX configuration for serving the documentation.
+
+        Responses are gzip compressed, using the `.gz` files written next to \
+        the assets at docs build time when present. Static assets whose URL \
+        carries a Sphinx version query are cached for a year, while pages \
+        are revalidated on every visit. Workers match the CPUs given to the \
+        NGINX service rather than the host CPUs visible in the container.
+
+        :return: contents of `nginx.conf`
+        """
+        shares = RESOURCE_PROFILES[self.profile]['nginx']
+        workers = max(round(shares['cpus'] * self.host.cpus), 1)
+        gzip_types = ' '.join((
+            'application/javascript',
+            'application/json',
+            'application/xml',
+            'font/ttf',
+            'image/svg+xml',
+            'text/css',
+            'text/javascript',
+            'text/plain',
+            'text/xml',
+        ))
+        lines = [
+            f'worker_processes {workers};',
+            f'worker_rlimit_nofile {2 * NGINX_WORKER_CONNECTIONS};',
+            'error_log /var/log/nginx/error.log warn;',
+            'pid /var/run/nginx.pid;',
+            '',
+            'events {',
+            f'    worker_connections {NGINX_WORKER_CONNECTIONS};',
+            '    multi_accept on;',
+            '}',
+            '',
+            'http {',
+            '    include /etc/nginx/mime.types;',
+            '    default_type application/octet-stream;',
+            '    access_log /var/log/nginx/access.log;',
+            '    server_tokens off;',
+            '',
+            '    sendfile on;',
+            '    tcp_nopush on;',
+            '    tcp_nodelay on;',
+            '    keepalive_timeout 65;',
+            '',
+            '    open_file_cache max=2000 inactive=60s;',
+            '    open_file_cache_valid 120s;',
+            '    open_file_cache_min_uses 2;',
+            '    open_file_cache_errors on;',
+            '',
+            '    gzip on;',
+            '    gzip_static on;',
+            '    gzip_vary on;',
+            '    gzip_proxied any;',
+            '    gzip_comp_level 5;',
+            '    gzip_min_length 1024;',
+            f'    gzip_types {gzip_types};',
+            '',
+            '    map $arg_v $static_cache_control {',
+            "        '' 'public, max-age=3600';",
+            "        default 'public, max-age=31536000, immutable';",
+            '    }',
+            '',
+            '    server {',
+            '        listen 80;',
+            '        root /usr/share/nginx/html;',
+            '        index index.html;',
+            '',
+            '        location / {',
+            "            add_header Cache-Control 'no-cache';",
+            '            try_files $uri $uri/ =404;',
+            '        }',
+            '',
+            '        location ~ ^/_(static|images)/ {',
+            '            add_header Cache-Control $static_cache_control;',
+            '        }',
+            '    }',
+            '}',
+        ]
+        return '\n'.join(lines) + '\n'
+
+    def pgbouncer_ini(self) -> str:
+        """
+        PgBouncer configuration using transaction pooling.
+
+        The server pool is sized from the CPUs given to PostgreSQL, while \
+        many more client connections are multiplexed onto it.
+
+        :return: contents of `pgbouncer.ini`
+        """
+        pool_size = 2 * self._postgres_resources().cpus
+        settings = {
+            'listen_addr': '0.0.0.0',
+            'listen_port': PGBOUNCER_PORT,
+            'auth_type': 'scram-sha-256',
+            'auth_file': '/tmp/userlist.txt',
+            'pool_mode': 'transaction',
+            'max_client_conn': PGBOUNCER_MAX_CLIENT_CONN,
+            'default_pool_size': pool_size,
+            'min_pool_size': max(pool_size // 4, 1),
+            'reserve_pool_size': max(pool_size // 4, 1),
+            'server_idle_timeout': 300,
+            'ignore_startup_parameters': 'extra_float_digits',
+        }
+        lines = [
+            '[databases]',
+            f'* = host={PROJECT_NAME}_postgres port=5432',
+            '',
+            '[pgbouncer]',
+            *(f'{k} = {v}' for k, v in settings.items()),
+        ]
+        return '\n'.join(lines) + '\n'
+
+    def postgres_conf(self) -> str:
+        """
+        PostgreSQL configuration tuned to the host and workload profile.
+
+        :return: contents of `postgresql.conf`
+        """
+        resources = self._postgres_resources()
+        settings = POSTGRES_PROFILES[self.profile]
+        memory_mb = resources.memory // 2**20
+        max_connections = settings['max_connections']
+        if PGBOUNCER_SERVICE in self._config['services']:
+            max_connections = min(max_connections,
+                                  4 * resources.cpus + 10)
+        per_gather = max(int(settings['gather_share'] * resources.cpus), 1)
+        shared_buffers = memory_mb // 4
+        work_mem = ((memory_mb - shared_buffers) * 1024 //
+                    (3 * max_connections * per_gather))
+        conf = {
+            'listen_addresses': "'*'",
+            'max_connections': max_connections,
+            'shared_buffers': f'{shared_buffers}MB',
+            'effective_cache_size': f'{memory_mb * 3 // 4}MB',
+            'maintenance_work_mem': f'{min(memory_mb // 16, 2048)}MB',
+            'work_mem': f'{max(work_mem, 4096)}kB',
+            'wal_buffers': '16MB',
+            'min_wal_size': settings['min_wal_size'],
+            'max_wal_size': settings['max_wal_size'],
+            'checkpoint_completion_target': 0.9,
+            'random_page_cost': 1.1,
+            'effective_io_concurrency': 200,
+            'max_worker_processes': max(resources.cpus, 8),
+            'max_parallel_workers': resources.cpus,
+            'max_parallel_workers_per_gather': per_gather,
+            'max_parallel_maintenance_workers': min(
+                max(resources.cpus // 2, 1), 4),
+        }
+        header = (f'# Generated by scripts/docker_config.py for '
+                  f'{resources.cpus} CPUs, {memory_mb}MB memory and the '
+                  f'{self.profile} profile')
+        lines = [header, *(f'{k} = {v}' for k, v in conf.items())]
+        return '\n'.join(lines) + '\n'
+
+    def _service_resources(self, shares: Dict[str, float]) -> Dict[str, str]:
+        """
+        Convert host resource shares into Docker Compose service limits.
+
+        :param shares: share of host CPUs, memory and shared memory
+        :return: `cpus`, `mem_limit` and `shm_size` service settings
+        """
+        cpus = max(round(shares['cpus'] * self.host.cpus, 2), MIN_CPUS)
+        memory = max(shares['memory'] * self.host.memory, MIN_MEMORY)
+        resources = {
+            'cpus': f'{cpus:g}',
+            'mem_limit': docker_bytes(memory),
+        }
+        if 'shm' in shares:
+            resources['shm_size'] = docker_bytes(
+                min(shares['shm'] * self.host.memory, memory))
+        return resources
 
     def add_service(self, service_name: ComposeService):
         """
@@ -379,8 +923,20 @@ class ComposeConfiguration:
 
         :param service_name: Name of the Docker service to remove
         """
+        is_ray = service_name == ComposeService.RAY
         service_name = service_name.value
-        del self._config['services'][service_name]
+        services = self._config['services']
+        for name in list(services):
+            if (name == service_name
+                    or name.startswith(f'{service_name}_worker_')):
+                del services[name]
+        py_tag = services.get(ComposeService.PYTHON.value, {})
+        if service_name in py_tag.get('depends_on', []):
+            py_tag['depends_on'].remove(service_name)
+        if is_ray:
+            self._set_environment(ComposeService.PYTHON.value,
+                                  {'RAY_ADDRESS': None})
+            self._size_ray()
         logger.debug('Docker service removed: %s' % service_name)
 
     def write(self, des: Optional[Path] = None):
@@ -390,16 +946,34 @@ class ComposeConfiguration:
         :param des: Destination path to write configuration (default: the \
             initial filepath supplied during instantiation)
         """
-        des = des if des else self.filepath
+        des = Path(des) if des else self.filepath
+        services = self._config['services']
+        service_files = {
+            k: v
+            for k, v in SERVICE_FILES.items() if k in services
+        }
+        for service, (file_name, mount, _) in service_files.items():
+            volume = f'./{file_name}:{mount}:ro'
+            volumes = services[service].setdefault('volumes', [])
+            if volume not in volumes:
+                volumes.insert(0, volume)
+
         with open(des, 'w') as f:
             yaml.dump(self._config, f)
         logger.debug('Docker Compose Configuration file written: %s' % des)
 
+        for file_name, _, render in service_files.values():
+            file_path = des.parent / file_name
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            file_path.write_text(getattr(self, render)())
+            logger.debug('Service configuration file written: %s' % file_path)
+
 
 if __name__ == '__main__':
     config = ComposeConfiguration()
     services = (ComposeService.STREAMLIT, )
     for s in services:
         config.add_service(s)
+    config.add_resource_profile(os.getenv('RESOURCE_PROFILE', 'dev'))
     config.add_gpu()
     config.write()
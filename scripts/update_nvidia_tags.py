@@ -3,36 +3,208 @@
 """ Script to update NVIDIA NGC Docker Tags.
 
 """
+import argparse
+import concurrent.futures as cf
+import json
+import logging
+import os
+from pathlib import Path
 import re
+import tempfile
+from typing import Dict, Iterable, Optional, Union
+import urllib.error
 import urllib.request
 
-from pyproject_starter.pkg_globals import PACKAGE_ROOT
+from pyproject_starter.pkg_globals import CACHE_DIR, PACKAGE_ROOT
 
+logger = logging.getLogger('package')
+
+CACHE_FILE = CACHE_DIR / 'nvidia_tags.json'
+CHUNK_SIZE = 2**16
 DOCKER_DIR = PACKAGE_ROOT / 'docker'
+FROM_REGEX = re.compile(r'^(FROM\s+[^\s:]+:)(\S*)')
 NVIDIA_NGC_URL = 'https://catalog.ngc.nvidia.com/orgs/nvidia/containers/'
-REGEX = r'(?<=latestTag":")(.*?)(?=")'
+REGEX = re.compile(rb'(?<=latestTag":")(.*?)(?=")')
+TIMEOUT = 10
 FRAMEWORKS = (
     'pytorch',
     'tensorflow',
 )
 
 
-def update_dockerfiles():
-    """Update NVIDIA Dockerfiles with the latest tags."""
+def _search_response(response, chunk_size: int = CHUNK_SIZE) -> Optional[str]:
+    """
+    Read a response until the tag is found.
+
+    Only the tail of the previous chunk is kept, so a match spanning two \
+    chunks is found without holding the whole page in memory.
+
+    :param response: open HTTP response
+    :param chunk_size: number of bytes read at a time
+    :return: latest tag or None if the page does not contain one
+    """
+    tail = b''
+    while True:
+        chunk = response.read(chunk_size)
+        if not chunk:
+            return None
+        buffer = tail + chunk
+        match = REGEX.search(buffer)
+        if match:
+            return match.group(0).decode()
+        tail = buffer[-256:]
+
+
+def fetch_tag(framework: str,
+              entry: Optional[Dict[str, str]] = None,
+              base_url: str = NVIDIA_NGC_URL,
+              timeout: float = TIMEOUT) -> Dict[str, str]:
+    """
+    Look up the latest tag of an NVIDIA NGC container.
+
+    When a cached entry is supplied the request is conditional, so an \
+    unchanged page costs a `304 Not Modified` response instead of a download.
+
+    :param framework: NGC container name
+    :param entry: cached `tag`, `etag` and `last_modified` of the container
+    :param base_url: URL of the NGC container catalog
+    :param timeout: seconds to wait for the server
+    :return: entry holding the latest tag and response validators
+    """
+    request = urllib.request.Request(f'{base_url}{framework}')
+    if entry:
+        if entry.get('etag'):
+            request.add_header('If-None-Match', entry['etag'])
+        if entry.get('last_modified'):
+            request.add_header('If-Modified-Since', entry['last_modified'])
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            tag = _search_response(response)
+            headers = response.headers
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and entry:
+            logger.debug('NVIDIA tag not modified: %s' % framework)
+            return entry
+        raise
+    if tag is None:
+        raise LookupError(f'No tag found for NVIDIA container: {framework}')
+    return {
+        'etag': headers.get('ETag'),
+        'last_modified': headers.get('Last-Modified'),
+        'tag': tag,
+    }
+
+
+def load_cache(file_path: Union[Path, str] = CACHE_FILE) -> Dict[str, dict]:
+    """
+    Load cached tag lookups.
+
+    :param file_path: path to cache file
+    :return: cached entries by framework (empty if there is no valid cache)
+    """
+    try:
+        with open(file_path, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_cache(cache: Dict[str, dict],
+               file_path: Union[Path, str] = CACHE_FILE):
+    """
+    Atomically save tag lookups.
+
+    :param cache: entries by framework
+    :param file_path: path to cache file
+    """
+    file_path = Path(file_path)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile('w', dir=file_path.parent,
+                                     delete=False) as f:
+        json.dump(cache, f, indent=2)
+    os.replace(f.name, file_path)
+
+
+def update_dockerfile(file_path: Union[Path, str], tag: str) -> bool:
+    """
+    Set the base image tag in the first line of a Dockerfile.
+
+    :param file_path: path to Dockerfile
+    :param tag: base image tag
+    :return: True if the file was rewritten, False if the tag was current
+    """
+    with open(file_path, 'r') as f:
+        lines = f.readlines()
+    match = FROM_REGEX.match(lines[0])
+    if match is None:
+        raise ValueError(f'No tagged base image found in: {file_path}')
+    if match.group(2) == tag:
+        return False
+    lines[0] = f'{match.group(1)}{tag}{lines[0][match.end():]}'
+    with open(file_path, 'w') as f:
+        f.writelines(lines)
+    return True
+
+
+def update_dockerfiles(frameworks: Iterable[str] = FRAMEWORKS,
+                       offline: bool = False,
+                       base_url: str = NVIDIA_NGC_URL,
+                       cache_file: Union[Path, str] = CACHE_FILE,
+                       docker_dir: Union[Path, str] = DOCKER_DIR,
+                       timeout: float = TIMEOUT) -> Dict[str, str]:
+    """
+    Update NVIDIA Dockerfiles with the latest tags.
+
+    Tags are looked up concurrently. If a lookup fails, or in offline mode, \
+    the cached tag is used.
 
-    for framework in FRAMEWORKS:
-        page = urllib.request.urlopen(f'{NVIDIA_NGC_URL}{framework}')
-        text = page.read().decode()
-        match = re.search(REGEX, text)
-        tag = match.group(0)
+    :param frameworks: NGC container names with a matching Dockerfile
+    :param offline: if True only use cached tags
+    :param base_url: URL of the NGC container catalog
+    :param cache_file: path to tag cache file
+    :param docker_dir: directory containing the Dockerfiles
+    :param timeout: seconds to wait for the server
+    :return: new tag of every Dockerfile that was rewritten
+    """
+    frameworks = tuple(frameworks)
+    cache = load_cache(cache_file)
+    if not offline and frameworks:
+        with cf.ThreadPoolExecutor(max_workers=len(frameworks)) as executor:
+            futures = {
+                framework: executor.submit(fetch_tag, framework,
+                                           cache.get(framework), base_url,
+                                           timeout)
+                for framework in frameworks
+            }
+        for framework, future in futures.items():
+            try:
+                cache[framework] = future.result()
+            except (LookupError, OSError) as e:
+                logger.warning('NVIDIA tag lookup failed for %s: %s' %
+                               (framework, e))
+        save_cache(cache, cache_file)
 
-        with open(DOCKER_DIR / f'{framework}.Dockerfile', 'r+') as f:
-            lines = f.readlines()
-            lines[0] = lines[0].replace('\n', f'{tag}\n')
-            f.seek(0)
-            f.writelines(lines)
-            f.truncate()
+    updated = {}
+    for framework in frameworks:
+        if framework not in cache:
+            logger.warning('No tag available for: %s' % framework)
+            continue
+        tag = cache[framework]['tag']
+        if update_dockerfile(Path(docker_dir) / f'{framework}.Dockerfile',
+                             tag):
+            updated[framework] = tag
+            logger.info('%s Dockerfile updated to tag: %s' % (framework, tag))
+    return updated
 
 
 if __name__ == '__main__':
-    update_dockerfiles()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--offline',
+                        action='store_true',
+                        help='only use cached tags')
+    parser.add_argument('--timeout',
+                        type=float,
+                        default=TIMEOUT,
+                        help='seconds to wait for the server')
+    args = parser.parse_args()
+    update_dockerfiles(offline=args.offline, timeout=args.timeout)
@@ -143,6 +143,7 @@ setup(
     include_package_data=True,
     entry_points={'console_scripts': [
         'count=pyproject_starter.cli:count',
+        'pyproject_starter=pyproject_starter.cli:main',
     ]})
 
 if __name__ == '__main__':